@@ -1,15 +1,69 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
 
+from .utils.metrics import instrument_engine
+
 load_dotenv()
 
-SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./fitness.db")
+
+# Server databases (PostgreSQL): connections kept open per process, extra
+# connections allowed under burst, and how long a request waits for one
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# SQLite: how long a writer waits on the database lock before failing
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Async drivers used for the AsyncSession path, by sync driver backend
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+def is_sqlite(url) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+def engine_options(url) -> dict:
+    """Keyword arguments for `create_engine` / `create_async_engine` on `url`."""
+    if is_sqlite(url):
+        # SQLite connections are cheap; the default pool per dialect is fine
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    WAL lets readers proceed while a write is in progress, and busy_timeout
+    makes concurrent writers wait for the lock instead of failing with
+    "database is locked". synchronous=NORMAL is durable under WAL except for
+    the last transactions on power loss.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-16000")  # 16 MB page cache
+    cursor.close()
+
+def configure_engine(engine):
+    """Apply per-connection tuning for the engine's database, and count and time its queries."""
+    if engine.dialect.name == "sqlite" and engine.url.database not in (None, "", ":memory:"):
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    instrument_engine(engine)
+    return engine
+
+engine = configure_engine(
+    create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -21,4 +75,55 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+def upsert_insert(dialect: str, table):
+    """`insert(table)` for `dialect` with `.on_conflict_do_update` (SQLite, PostgreSQL)."""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"No upsert support for {dialect}")
+    return insert(table)
+
+def async_database_url(url) -> str:
+    """`url` with its driver swapped for the matching async driver."""
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise RuntimeError(f"No async driver known for {url.get_backend_name()}")
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+_async_engine = None
+_AsyncSessionLocal = None
+
+def get_async_engine():
+    """
+    Lazily create the async engine, so the async driver (aiosqlite or
+    asyncpg) is only needed once a route actually uses `get_async_db`.
+    """
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+        url = ASYNC_DATABASE_URL or async_database_url(SQLALCHEMY_DATABASE_URL)
+        _async_engine = create_async_engine(url, **engine_options(url))
+        configure_engine(_async_engine.sync_engine)
+        # Objects stay readable after commit without a lazy (blocking) refresh
+        _AsyncSessionLocal = sessionmaker(
+            _async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
+# Async dependency, for `async def` routes that shouldn't block the event loop
+async def get_async_db():
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
+
+async def dispose_async_engine():
+    if _async_engine is not None:
+        await _async_engine.dispose()
@@ -1,13 +1,34 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from app.database import engine, Base
+from app.database import dispose_async_engine
 from app.routes import auth, macro, food, food_log
+from app.utils.usda import usda_client
+from app.utils.auth import hash_pool
+from app.utils.worker_pool import PoolBusy
+from app.services.macros import registry, prediction_cache, predict_pool
+from app.utils import metrics
+from app.utils.compression import CompressionMiddleware
+from app.utils import rate_limit
+from app.utils.responses import FastJSONResponse
+from app.utils.auth import token_cache, user_cache
+from app.utils.usda import search_cache
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# The schema is managed by Alembic: run `alembic upgrade head` before starting
 
-app = FastAPI(title="Fitness App API")
+# orjson instead of json.dumps for every JSON response
+app = FastAPI(title="Fitness App API", default_response_class=FastJSONResponse)
+
+# gzip/brotli for large text bodies; innermost, so its CPU shows up in /metrics latency
+app.add_middleware(CompressionMiddleware)
+
+# Per-route latency and DB query counts, served at /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Caps requests in flight and sheds the excess with 503; outside metrics so
+# shed requests don't skew route latency, inside CORS so browsers can read them
+app.add_middleware(rate_limit.LoadShedMiddleware)
 
 # Configure CORS
 app.add_middleware(
@@ -16,6 +37,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Food-Log-Version", "ETag"],
 )
 
 # Include routers
@@ -24,6 +46,83 @@ app.include_router(macro.router, tags=["macros"])
 app.include_router(food.router, prefix="/api", tags=["food"])
 app.include_router(food_log.router, prefix="/api", tags=["food_log"])
 
+@app.exception_handler(PoolBusy)
+async def pool_busy_handler(request: Request, exc: PoolBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+CACHES = {
+    "auth_token": token_cache,
+    "auth_user": user_cache,
+    "macro_prediction": prediction_cache,
+    "usda_search": search_cache,
+}
+POOLS = {"bcrypt": hash_pool, "model": predict_pool}
+
+def _cache_stats(field):
+    return lambda: {(name,): cache.stats()[field] for name, cache in CACHES.items()}
+
+def _pool_stats(field):
+    return lambda: {(name,): pool.stats()[field] for name, pool in POOLS.items()}
+
+metrics.register_collector("cache_entries", "Entries held per cache", ("cache",), _cache_stats("size"))
+metrics.register_collector(
+    "cache_hits_total", "Cache hits since start", ("cache",), _cache_stats("hits"), kind="counter"
+)
+metrics.register_collector(
+    "cache_misses_total", "Cache misses since start", ("cache",), _cache_stats("misses"), kind="counter"
+)
+metrics.register_collector("worker_pool_in_use", "Calls running or queued per pool", ("pool",), _pool_stats("in_use"))
+metrics.register_collector(
+    "worker_pool_completed_total", "Calls completed per pool", ("pool",), _pool_stats("completed"), kind="counter"
+)
+metrics.register_collector(
+    "worker_pool_rejected_total", "Calls shed with 503 per pool", ("pool",), _pool_stats("rejected"), kind="counter"
+)
+metrics.register_collector(
+    "usda_requests_total", "USDA searches sent upstream or coalesced with one in flight", ("kind",),
+    lambda: {(kind,): usda_client.stats()[kind] for kind in ("upstream_calls", "coalesced")}, kind="counter"
+)
+metrics.register_collector(
+    "usda_in_flight", "USDA searches awaiting an upstream response", (),
+    lambda: {(): usda_client.stats()["in_flight"]}
+)
+metrics.register_collector(
+    "rate_limited_total", "Requests rejected with 429 per route budget", ("route",),
+    lambda: {(name,): count for name, count in rate_limit.rejected.items()}, kind="counter"
+)
+metrics.register_collector(
+    "requests_in_flight", "Requests admitted by the concurrency cap and still running", (),
+    lambda: {(): rate_limit.admission["in_flight"]}
+)
+metrics.register_collector(
+    "requests_shed_total", "Requests shed with 503 by the concurrency cap", (),
+    lambda: {(): rate_limit.admission["shed"]}, kind="counter"
+)
+metrics.register_collector(
+    "model_info", "Macro model version being served", ("version",),
+    lambda: {(registry.live.version,): 1}
+)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
-    return {"message": "Welcome to the Fitness App API"} 
\ No newline at end of file
+    return {"message": "Welcome to the Fitness App API"}
+
+@app.on_event("startup")
+async def start_model_reloader():
+    # Picks up newly promoted model versions without a restart
+    registry.start()
+
+@app.on_event("shutdown")
+async def close_resources():
+    await registry.stop()
+    await usda_client.aclose()
+    hash_pool.shutdown()
+    await dispose_async_engine()
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, Date
+
+from ..database import Base
+
+class DailyTotal(Base):
+    """
+    Per-user, per-local-day sums of food_logs, kept current by the food log
+    routes and rebuilt by app.services.daily_totals. Days are calendar days
+    in the user's timezone.
+    """
+    __tablename__ = "daily_totals"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    calories = Column(Float, nullable=False, default=0)
+    protein = Column(Float, nullable=False, default=0)
+    carbs = Column(Float, nullable=False, default=0)
+    fat = Column(Float, nullable=False, default=0)
+    grams = Column(Float, nullable=False, default=0)
+    entries = Column(Integer, nullable=False, default=0)
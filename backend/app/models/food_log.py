@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -16,6 +16,30 @@ class FoodLog(Base):
     fat = Column(Float)
     grams = Column(Float, default=100.0)
     logged_at = Column(DateTime(timezone=True), server_default=func.now())
+    # The user's food_log_version when this row was last inserted or updated
+    version = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationship with User
-    user = relationship("User", back_populates="food_logs") 
\ No newline at end of file
+    user = relationship("User", back_populates="food_logs")
+
+    __table_args__ = (
+        # Per-user range scans (dashboards, summaries) walk this index instead
+        # of the whole table
+        Index("ix_food_logs_user_id_logged_at", "user_id", "logged_at"),
+        # Delta sync: rows changed after a given version
+        Index("ix_food_logs_user_id_version", "user_id", "version"),
+    )
+
+class FoodLogTombstone(Base):
+    """Marks a deleted food log, so delta sync can tell clients to drop it."""
+    __tablename__ = "food_log_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    food_log_id = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_food_log_tombstones_user_id_version", "user_id", "version"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey
+from sqlalchemy import Column, Integer, Float, ForeignKey, String, DateTime, Index
 from sqlalchemy.orm import relationship
 
 from ..database import Base
@@ -12,6 +12,14 @@ class Macro(Base):
     protein = Column(Float)
     carbs = Column(Float)
     fat = Column(Float)
+    # Hash of the profile inputs and model version these targets were computed from
+    inputs_hash = Column(String(64))
+    computed_at = Column(DateTime(timezone=True))
 
     # Relationship with User
-    user = relationship("User", back_populates="macros") 
\ No newline at end of file
+    user = relationship("User", back_populates="macros")
+
+    __table_args__ = (
+        # One row of targets per user, found by user_id on every /macro call
+        Index("ux_macros_user_id", "user_id", unique=True),
+    )
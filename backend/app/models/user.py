@@ -17,6 +17,12 @@ class User(Base):
     height = Column(Float)
     activity_level = Column(String)
     fitness_goal = Column(String)
+    # IANA name; defines the calendar days of daily_totals
+    timezone = Column(String, nullable=False, default="UTC", server_default="UTC")
+
+    # Bumped on every food log insert, update or delete; drives ETags and
+    # delta sync of the food log
+    food_log_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     macros = relationship("Macro", back_populates="user", uselist=False)
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index
+
+from ..database import Base
+
+class UserFood(Base):
+    """
+    One row per (user, food name) the user has logged: how often, when last,
+    and the values of the latest entry. Maintained alongside food_logs by
+    app.services.user_foods.
+    """
+    __tablename__ = "user_foods"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    food_name = Column(String, primary_key=True)
+    # Values of the most recent entry, as logged (for `grams` grams)
+    calories = Column(Float)
+    protein = Column(Float)
+    carbs = Column(Float)
+    fat = Column(Float)
+    grams = Column(Float)
+    use_count = Column(Integer, nullable=False, default=0)
+    last_used_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # Top-N reads for quick-add, by frequency or by recency
+        Index("ix_user_foods_user_id_use_count", "user_id", "use_count", "last_used_at"),
+        Index("ix_user_foods_user_id_last_used_at", "user_id", "last_used_at"),
+    )
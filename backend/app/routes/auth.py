@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import timedelta
+from typing import Optional
 
 from ..database import get_db
 from ..models.user import User
-from ..schemas.user import UserCreate, Token, User as UserSchema
+from ..schemas.user import UserCreate, UserUpdate, Token, User as UserSchema
+from ..services.macros import refresh_user_macros
+from ..services import daily_totals
+from ..utils.rate_limit import rate_limit
 from ..utils.auth import (
-    verify_password,
-    get_password_hash,
+    verify_and_update_password,
+    hash_password,
     create_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     get_current_user
@@ -16,6 +22,34 @@ from ..utils.auth import (
 
 router = APIRouter()
 
+# Sync database steps of the routes below, run with asyncio.to_thread so a
+# slow query or a commit waiting on SQLite's write lock doesn't stall the
+# event loop. Each ends its transaction, so no pooled connection is held
+# while a route awaits bcrypt.
+
+def _registration_conflict(db: Session, user: UserCreate) -> Optional[str]:
+    """Why `user` can't be registered (username or email taken), or None."""
+    try:
+        if db.query(User.id).filter(User.username == user.username).first():
+            return "Username already registered"
+        if db.query(User.id).filter(User.email == user.email).first():
+            return "Email already registered"
+        return None
+    finally:
+        db.rollback()
+
+def _find_login(db: Session, email: str):
+    """(id, username, hashed_password) of the user with `email`, or None."""
+    try:
+        return db.query(User.id, User.username, User.hashed_password).filter(User.email == email).first()
+    finally:
+        db.rollback()
+
+def _store_password_hash(db: Session, user_id: int, hashed_password: str) -> None:
+    db_user = db.get(User, user_id)
+    db_user.hashed_password = hashed_password
+    db.commit()
+
 @router.get("/me", response_model=UserSchema, tags=["authentication"])
 async def read_users_me(current_user: User = Depends(get_current_user)):
     """
@@ -23,26 +57,51 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
     """
     return current_user
 
-@router.post("/register", response_model=Token)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    # Check if username exists
-    db_user = db.query(User).filter(User.username == user.username).first()
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
-        )
-    
-    # Check if email exists
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
+@router.patch("/me", response_model=UserSchema, tags=["authentication"])
+async def update_users_me(
+    profile: UserUpdate,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Update profile fields of the currently logged in user. Macro targets are
+    recomputed in the background when an input to them changed. A new
+    timezone re-buckets the user's daily totals in the same transaction.
+    """
+    changes = profile.model_dump(exclude_unset=True, exclude_none=True)
+
+    # All of it blocks on the database (the commit on SQLite's write lock),
+    # so it runs off the event loop
+    def update() -> User:
+        db_user = db.query(User).filter(User.id == current_user.id).first()
+        rebucket = "timezone" in changes and changes["timezone"] != db_user.timezone
+        for key, value in changes.items():
+            setattr(db_user, key, value.value if hasattr(value, "value") else value)
+        if rebucket:
+            db.flush()
+            daily_totals.rebuild(db, db_user.id)
+        db.commit()
+        db.refresh(db_user)
+        return db_user
+
+    db_user = await asyncio.to_thread(update)
+
+    if changes:
+        background_tasks.add_task(refresh_user_macros, db_user.id)
+    return db_user
+
+@router.post("/register", response_model=Token, dependencies=[Depends(rate_limit("register"))])
+async def register(user: UserCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    conflict = await asyncio.to_thread(_registration_conflict, db, user)
+    if conflict:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
+            detail=conflict
         )
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password(user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -52,11 +111,19 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         weight=user.weight,
         height=user.height,
         activity_level=user.activity_level,
-        fitness_goal=user.fitness_goal
+        fitness_goal=user.fitness_goal,
+        timezone=user.timezone
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+
+    def create() -> None:
+        db.add(db_user)
+        db.commit()
+        db.refresh(db_user)
+
+    await asyncio.to_thread(create)
+
+    # Have macro targets ready before the client first asks for them
+    background_tasks.add_task(refresh_user_macros, db_user.id)
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -65,15 +132,22 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
-@router.post("/token", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+@router.post("/token", response_model=Token, dependencies=[Depends(rate_limit("login"))])
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await asyncio.to_thread(_find_login, db, form_data.username)
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+    if not user or not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Transparently upgrade hashes made with outdated cost parameters
+    if new_hash:
+        await asyncio.to_thread(_store_password_hash, db, user.id, new_hash)
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
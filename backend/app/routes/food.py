@@ -1,23 +1,25 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Literal
 from ..schemas.food import FoodItem
-from ..utils.usda import search_foods
+from ..utils.rate_limit import rate_limit
+from ..utils.usda import search_foods_async
 
 router = APIRouter()
 
-@router.get("/search-foods", response_model=List[FoodItem])
-async def search_food_items(query: str):
+@router.get("/search-foods", response_model=List[FoodItem], dependencies=[Depends(rate_limit("search"))])
+async def search_food_items(query: str, mode: Literal["remote", "local"] | None = None):
     """
     Search for foods using the USDA FoodData Central API.
     
     Args:
         query (str): The search query (e.g., "apple")
+        mode (str): "local" searches only the offline food index
         
     Returns:
         List[FoodItem]: List of food items with nutritional information
     """
     try:
-        foods = search_foods(query)
+        foods = await search_foods_async(query, mode)
         return foods
     except ValueError as e:
         raise HTTPException(status_code=500, detail=str(e))
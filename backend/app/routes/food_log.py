@@ -1,11 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import func, or_, and_, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, AsyncIterator, List, Literal, Tuple
+from datetime import date, datetime, timedelta, timezone
+import json
 
-from ..database import get_db
-from ..models.food_log import FoodLog
-from ..schemas.food_log import FoodLogCreate, FoodLogResponse
+import numpy as np
+
+from ..database import get_async_db
+from ..models.food_log import FoodLog, FoodLogTombstone
+from ..schemas.food_log import (
+    FoodLogCreate,
+    FoodLogResponse,
+    FoodLogChanges,
+    QuickAddFood,
+    MacroTotals,
+    FoodLogTrends,
+    BulkFoodLogResult,
+    BulkFoodLogResponse
+)
 from ..utils.auth import get_current_user
+from ..utils.dates import resolve_timezone, local_range_to_utc, local_bucket, parse_bucket, to_utc
+from ..utils.pagination import encode_cursor, decode_cursor
+from ..utils.responses import FastJSONResponse, rows_response
+from ..utils.compression import choose_encoding
+from ..utils.export import export_food_logs
+from ..services.user_foods import record_food_logs, refresh_user_foods, top_user_foods
+from ..services.daily_totals import NUTRIENTS, apply_food_log_changes, food_log_values, load_trends
+from ..utils.sync import (
+    bump_food_log_version,
+    get_food_log_version,
+    food_log_etag,
+    etag_matches,
+    set_version_headers,
+    not_modified
+)
+from ..models.macro import Macro
 from ..models.user import User
 
 router = APIRouter()
@@ -13,65 +45,462 @@ router = APIRouter()
 @router.post("/food-log", response_model=FoodLogResponse)
 async def create_food_log(
     food_log: FoodLogCreate,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
+    version, tz = await bump_food_log_version(db, current_user.id)
+    values = food_log.model_dump()
+    values["logged_at"] = values["logged_at"] or datetime.now(timezone.utc)
     db_food_log = FoodLog(
         user_id=current_user.id,
-        **food_log.model_dump()
+        version=version,
+        **values
     )
     db.add(db_food_log)
-    db.commit()
-    db.refresh(db_food_log)
+    await record_food_logs(db, current_user.id, [values])
+    await apply_food_log_changes(db, current_user.id, tz, added=[values])
+    await db.commit()
+    await db.refresh(db_food_log)
+    set_version_headers(response, version)
     return db_food_log
 
+MAX_BULK_ITEMS = 5000
+
+async def _ndjson_items(request: Request) -> AsyncIterator[Tuple[Any, str | None]]:
+    """Yield (item, parse error) per non-blank line of an NDJSON body as it streams in."""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_line(line)
+    if buffer.strip():
+        yield _parse_line(buffer)
+
+def _parse_line(line: bytes) -> Tuple[Any, str | None]:
+    try:
+        return json.loads(line), None
+    except ValueError as e:
+        return None, f"Invalid JSON: {e}"
+
+async def _json_array_items(request: Request) -> AsyncIterator[Tuple[Any, str | None]]:
+    try:
+        items = json.loads(await request.body())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of food logs")
+    for item in items:
+        yield item, None
+
+@router.post("/food-log/bulk", response_model=BulkFoodLogResponse)
+async def create_food_logs_bulk(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Log many foods in one request, as a JSON array or, with
+    `Content-Type: application/x-ndjson`, one `FoodLogCreate` object per line.
+
+    Every item is validated first; valid items are then inserted with a single
+    executemany in one transaction, and invalid ones are reported with their
+    error instead of failing the whole request. Results come back in request
+    order with the new ids, taken from INSERT ... RETURNING. All rows share
+    one new food log version.
+    """
+    content_type = request.headers.get("content-type", "")
+    stream = _ndjson_items(request) if "ndjson" in content_type else _json_array_items(request)
+
+    results: List[BulkFoodLogResult] = []
+    rows, row_indexes, version = [], [], None
+    now = datetime.now(timezone.utc)
+    async for item, error in stream:
+        index = len(results)
+        if index >= MAX_BULK_ITEMS:
+            raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ITEMS} items per request")
+        if error is None:
+            try:
+                values = FoodLogCreate.model_validate(item).model_dump()
+                values["user_id"] = current_user.id
+                # executemany needs the same columns on every row
+                values["logged_at"] = values["logged_at"] or now
+                rows.append(values)
+                row_indexes.append(index)
+            except ValidationError as e:
+                error = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+        results.append(BulkFoodLogResult(index=index, error=error))
+
+    if rows:
+        version, tz = await bump_food_log_version(db, current_user.id)
+        for values in rows:
+            values["version"] = version
+        inserted = (await db.execute(
+            insert(FoodLog).returning(FoodLog.id, FoodLog.logged_at, sort_by_parameter_order=True),
+            rows
+        )).all()
+        await record_food_logs(db, current_user.id, rows)
+        await apply_food_log_changes(db, current_user.id, tz, added=rows)
+        await db.commit()
+        for index, (row_id, logged_at) in zip(row_indexes, inserted):
+            results[index].id = row_id
+            results[index].logged_at = logged_at
+
+    # Already validated; dumped directly rather than re-validated by response_model
+    response = FastJSONResponse(BulkFoodLogResponse(
+        inserted=len(rows),
+        failed=len(results) - len(rows),
+        results=results
+    ).model_dump())
+    if version is not None:
+        set_version_headers(response, version)
+    return response
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+@router.get("/food-log/export")
+async def export_food_log(
+    request: Request,
+    format: Literal["csv", "ndjson"] = "csv",
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Download the user's complete food log history as CSV or NDJSON.
+
+    Rows are streamed from the database in chunks, so memory use stays flat
+    regardless of history size. The body is gzip-compressed when the client
+    accepts gzip (with a nonzero q-value).
+    """
+    use_gzip = choose_encoding(request.headers.get("accept-encoding", ""), supported=("gzip",)) == "gzip"
+    headers = {
+        "Content-Disposition": f'attachment; filename="food_log.{format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        export_food_logs(current_user.id, format, gzip=use_gzip),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers=headers
+    )
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Columns of FoodLogResponse, read as plain tuples for listings
+LEAN_COLUMNS = (
+    FoodLog.id, FoodLog.user_id, FoodLog.food_name, FoodLog.calories,
+    FoodLog.protein, FoodLog.carbs, FoodLog.fat, FoodLog.grams, FoodLog.logged_at
+)
+LEAN_KEYS = [column.key for column in LEAN_COLUMNS]
+
 @router.get("/food-log", response_model=List[FoodLogResponse])
 async def get_food_logs(
-    db: Session = Depends(get_db),
+    request: Request,
+    from_: datetime | None = Query(None, alias="from"),
+    to: datetime | None = None,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    lean: bool = Query(False, deprecated=True, description="Ignored; every listing is served lean"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    food_logs = db.query(FoodLog).filter(FoodLog.user_id == current_user.id).all()
-    return food_logs
+    """
+    List the user's food logs, newest first, one page at a time.
+
+    Pages are keyed on (logged_at, id): when more rows exist, the
+    `X-Next-Cursor` response header holds the cursor for the next page.
+    `from` is inclusive and `to` exclusive. Rows are read as plain column
+    tuples and serialized directly with orjson, skipping ORM hydration and
+    response model validation.
+
+    Responses carry an ETag tied to the user's food log version and the
+    query parameters; a request whose `If-None-Match` still matches gets a
+    bodyless 304 without the listing query running.
+    """
+    version = await get_food_log_version(db, current_user.id)
+    etag = food_log_etag(request, current_user.id, version)
+    if etag_matches(request, etag):
+        return not_modified(version, etag)
+
+    filters = [FoodLog.user_id == current_user.id]
+    if from_ is not None:
+        filters.append(FoodLog.logged_at >= to_utc(from_))
+    if to is not None:
+        filters.append(FoodLog.logged_at < to_utc(to))
+    if cursor is not None:
+        try:
+            cursor_logged_at, cursor_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        filters.append(or_(
+            FoodLog.logged_at < cursor_logged_at,
+            and_(FoodLog.logged_at == cursor_logged_at, FoodLog.id < cursor_id)
+        ))
+
+    # Fetch one extra row to learn whether another page follows
+    rows = (await db.execute(select(*LEAN_COLUMNS).where(*filters).order_by(
+        FoodLog.logged_at.desc(), FoodLog.id.desc()
+    ).limit(limit + 1))).all()
+
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(rows[-1].logged_at, rows[-1].id)
+
+    response = rows_response(LEAN_KEYS, rows, headers)
+    set_version_headers(response, version, etag)
+    return response
+
+MAX_SUMMARY_DAYS = 366
+
+@router.get("/food-log/summary", response_model=List[MacroTotals])
+async def get_food_log_summary(
+    request: Request,
+    start: date,
+    end: date,
+    period: Literal["day", "week"] = "day",
+    tz: str = Query("UTC", description="IANA timezone used to define day boundaries"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Per-day or per-week macro totals between two local dates (inclusive).
+
+    Totals are summed in the database over the (user_id, logged_at) index, so
+    the cost depends on the size of the range rather than the whole history.
+    Days/weeks without entries are omitted. Supports `If-None-Match` like the
+    listing.
+    """
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days >= MAX_SUMMARY_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range cannot exceed {MAX_SUMMARY_DAYS} days")
+    try:
+        zone = resolve_timezone(tz)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    version = await get_food_log_version(db, current_user.id)
+    etag = food_log_etag(request, current_user.id, version)
+    if etag_matches(request, etag):
+        return not_modified(version, etag)
+
+    range_start, range_end = local_range_to_utc(start, end, zone)
+    bucket = local_bucket(
+        FoodLog.logged_at, period, zone, db.get_bind().dialect.name, range_start, range_end
+    ).label("bucket")
+
+    rows = (await db.execute(select(
+        bucket,
+        func.sum(FoodLog.calories),
+        func.sum(FoodLog.protein),
+        func.sum(FoodLog.carbs),
+        func.sum(FoodLog.fat),
+        func.sum(FoodLog.grams),
+        func.count(FoodLog.id),
+    ).where(
+        FoodLog.user_id == current_user.id,
+        FoodLog.logged_at >= range_start,
+        FoodLog.logged_at < range_end
+    ).group_by(bucket).order_by(bucket))).all()
+
+    response = rows_response(
+        list(MacroTotals.model_fields),
+        ((parse_bucket(row[0]), *(total or 0 for total in row[1:6]), row[6]) for row in rows)
+    )
+    set_version_headers(response, version, etag)
+    return response
+
+MAX_QUICK_ADD = 50
+
+@router.get("/food-log/quick-add", response_model=List[QuickAddFood])
+async def get_quick_add_foods(
+    request: Request,
+    response: Response,
+    limit: int = Query(10, ge=1, le=MAX_QUICK_ADD),
+    sort: Literal["frequent", "recent"] = "frequent",
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    The user's most logged (or most recently logged) foods, with the
+    nutrients and grams of their latest entry, so repeats can be logged
+    without a search. Read from the per-user user_foods index.
+    """
+    version = await get_food_log_version(db, current_user.id)
+    etag = food_log_etag(request, current_user.id, version)
+    if etag_matches(request, etag):
+        return not_modified(version, etag)
+    set_version_headers(response, version, etag)
+    return await top_user_foods(db, current_user.id, limit, sort)
+
+MAX_TREND_DAYS = 366
+
+def _macro_values(values) -> dict:
+    """MacroValues fields from a NUTRIENTS-ordered array row, NaN as null."""
+    return {
+        name: None if np.isnan(value) else round(float(value), 1) for name, value in zip(NUTRIENTS, values)
+    }
+
+@router.get("/food-log/trends", response_model=FoodLogTrends)
+async def get_food_log_trends(
+    days: int = Query(90, ge=1, le=MAX_TREND_DAYS),
+    end: date | None = Query(None, description="Last local day of the range; defaults to today"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Per-day totals over the last `days` local days with rolling 7/30-day
+    averages, percent of the user's macro targets, and logging streaks.
+
+    Read from the daily_totals rollup (one row per logged day) and computed
+    with array operations, so the cost depends on the range, not on how many
+    foods were logged. The payload is assembled as plain data and serialized
+    once, without a model per day.
+    """
+    zone = resolve_timezone(current_user.timezone)
+    today = datetime.now(zone).date()
+    end = end or today
+    start = end - timedelta(days=days - 1)
+
+    macro = (await db.execute(select(Macro).where(Macro.user_id == current_user.id))).scalar_one_or_none()
+    target = None
+    if macro is not None and macro.total_calories is not None:
+        target = np.array(
+            [macro.total_calories, macro.protein, macro.carbs, macro.fat], dtype=float
+        )
+    trends = await load_trends(db, current_user.id, start, end, target, today)
+
+    return FastJSONResponse({
+        "start": start,
+        "end": end,
+        "timezone": zone.key,
+        "target": _macro_values(target) if target is not None else None,
+        "current_streak": trends.current_streak,
+        "longest_streak": trends.longest_streak,
+        "logged_days": int(np.count_nonzero(trends.entries)),
+        "on_target_days": trends.on_target_days,
+        "days": [
+            {
+                "day": day,
+                "totals": _macro_values(trends.totals[i]),
+                "entries": int(trends.entries[i]),
+                "avg_7": _macro_values(trends.short_avg[i]),
+                "avg_30": _macro_values(trends.long_avg[i]),
+                "percent_of_target": (
+                    _macro_values(trends.percent_of_target[i]) if trends.percent_of_target is not None else None
+                )
+            }
+            for i, day in enumerate(trends.days)
+        ]
+    })
+
+MAX_SYNC_CHANGES = 1000
+
+@router.get("/food-log/changes", response_model=FoodLogChanges)
+async def get_food_log_changes(
+    request: Request,
+    since: int = Query(..., ge=0, description="`version` from the previous sync or X-Food-Log-Version header"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Food logs inserted, updated or deleted after version `since`, for clients
+    keeping a local copy: apply `upserts` and `deleted`, then pass `version`
+    as `since` next time.
+
+    Responds 410 when the client should drop its copy and refetch the listing
+    instead: `since` is ahead of the server, or more than MAX_SYNC_CHANGES
+    rows changed.
+    """
+    version = await get_food_log_version(db, current_user.id)
+    etag = food_log_etag(request, current_user.id, version)
+    if etag_matches(request, etag):
+        return not_modified(version, etag)
+    if since > version:
+        raise HTTPException(status_code=410, detail="Unknown version; refetch the food log")
+
+    upserts, deleted = [], []
+    if since < version:
+        # Bounded by `version` too, so rows committed meanwhile come with the next sync
+        window = (FoodLog.user_id == current_user.id, FoodLog.version > since, FoodLog.version <= version)
+        upserts = (await db.execute(
+            select(*LEAN_COLUMNS).where(*window).order_by(FoodLog.version, FoodLog.id).limit(MAX_SYNC_CHANGES + 1)
+        )).all()
+        if len(upserts) > MAX_SYNC_CHANGES:
+            raise HTTPException(status_code=410, detail="Too many changes; refetch the food log")
+        deleted = (await db.execute(
+            select(FoodLogTombstone.food_log_id).where(
+                FoodLogTombstone.user_id == current_user.id,
+                FoodLogTombstone.version > since,
+                FoodLogTombstone.version <= version
+            ).order_by(FoodLogTombstone.version)
+        )).scalars().all()
+
+    response = FastJSONResponse({
+        "version": version,
+        "upserts": [dict(zip(LEAN_KEYS, row)) for row in upserts],
+        "deleted": deleted
+    })
+    set_version_headers(response, version, etag)
+    return response
 
 @router.put("/food-log/{food_log_id}", response_model=FoodLogResponse)
 async def update_food_log(
     food_log_id: int,
     food_log: FoodLogCreate,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    db_food_log = db.query(FoodLog).filter(
+    db_food_log = (await db.execute(select(FoodLog).where(
         FoodLog.id == food_log_id,
         FoodLog.user_id == current_user.id
-    ).first()
+    ))).scalar_one_or_none()
     
     if not db_food_log:
         raise HTTPException(status_code=404, detail="Food log not found")
     
     # Don't overwrite logged_at
+    old_name, old_values = db_food_log.food_name, food_log_values(db_food_log)
     for key, value in food_log.model_dump().items():
         if key != "logged_at":
             setattr(db_food_log, key, value)
+    db_food_log.version, tz = await bump_food_log_version(db, current_user.id)
+    await refresh_user_foods(db, current_user.id, {old_name, db_food_log.food_name})
+    await apply_food_log_changes(
+        db, current_user.id, tz, added=[food_log_values(db_food_log)], removed=[old_values]
+    )
 
-    
-    db.commit()
-    db.refresh(db_food_log)
+    await db.commit()
+    await db.refresh(db_food_log)
+    set_version_headers(response, db_food_log.version)
     return db_food_log
 
 @router.delete("/food-log/{food_log_id}")
 async def delete_food_log(
     food_log_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    db_food_log = db.query(FoodLog).filter(
+    db_food_log = (await db.execute(select(FoodLog).where(
         FoodLog.id == food_log_id,
         FoodLog.user_id == current_user.id
-    ).first()
+    ))).scalar_one_or_none()
     
     if not db_food_log:
         raise HTTPException(status_code=404, detail="Food log not found")
     
-    db.delete(db_food_log)
-    db.commit()
+    version, tz = await bump_food_log_version(db, current_user.id)
+    await db.delete(db_food_log)
+    # Lets clients syncing with `since` learn about the deletion
+    db.add(FoodLogTombstone(user_id=current_user.id, food_log_id=food_log_id, version=version))
+    await refresh_user_foods(db, current_user.id, [db_food_log.food_name])
+    await apply_food_log_changes(db, current_user.id, tz, removed=[food_log_values(db_food_log)])
+    await db.commit()
+    set_version_headers(response, version)
     return {"message": "Food log deleted successfully"} 
\ No newline at end of file
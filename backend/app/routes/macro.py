@@ -1,70 +1,75 @@
-import os
-import joblib
-import pandas as pd
-import numpy as np
-from fastapi import APIRouter, Depends
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from typing import Any, Dict, List
 
 from ..database import get_db
 from ..models.user import User
 from ..models.macro import Macro
-from ..schemas.macro import MacroCreate, MacroResponse
+from ..schemas.macro import MacroCreate, MacroResponse, MacroProfile
+from ..services.macros import (
+    feature_key,
+    predict_base_async,
+    adjust_targets,
+    profile_hash,
+    get_stored_targets,
+    store_targets,
+    registry
+)
 from ..utils.auth import get_current_user
+from ..utils.rate_limit import rate_limit
 
 router = APIRouter()
 
-# Load model once at startup
-dir_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-model_path = os.path.join(dir_path, 'model/macro_predictor.pkl')
-model = joblib.load(model_path)
+MAX_BATCH_SIZE = 1000
 
-@router.post("/macro", response_model=MacroResponse)
+@router.post("/macro", response_model=MacroResponse, dependencies=[Depends(rate_limit("macro"))])
 async def calculate_macros(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    # Convert gender to numeric (1=male, 2=female)
-    gender_num = 1 if current_user.gender.lower() == "male" else 2
+    # Stored targets are reused until the profile or model changes. The sync
+    # session runs off the event loop: a commit waiting on SQLite's write
+    # lock would otherwise stall every other request for up to busy_timeout
+    inputs_hash = profile_hash(current_user)
+    stored = await asyncio.to_thread(get_stored_targets, db, current_user.id, inputs_hash)
+    if stored is not None:
+        return stored
 
     # Input: [age, gender, weight, height]
-    X = pd.DataFrame([{
-        'RIDAGEYR': current_user.age,
-        'RIAGENDR': gender_num,
-        'BMXWT': current_user.weight,
-        'BMXHT': current_user.height
-    }])
+    key = feature_key(current_user.age, current_user.gender, current_user.weight, current_user.height)
 
-    # Predict
-    y_pred = model.predict(X)[0]
-    y_pred[0] = np.exp(y_pred[0])  # Inverse log-transform calories
+    # Predict (served from the prediction cache for repeat profiles)
+    [prediction] = await predict_base_async([key])
 
-    # Apply activity level multiplier (PAL-based)
-    activity_multipliers = {
-        "sedentary": 1.2,
-        "light": 1.375,
-        "moderate": 1.55,
-        "very active": 1.725,
-        "extra active": 1.9
-    }
-    activity_key = current_user.activity_level.strip().lower()
-    activity_multiplier = activity_multipliers.get(activity_key, 1.2)
-    y_pred[0] *= activity_multiplier  # Adjust calories
+    targets = adjust_targets(prediction, current_user.activity_level, current_user.fitness_goal)
+    await asyncio.to_thread(store_targets, db, current_user.id, targets, inputs_hash)
+    return MacroResponse(**targets)
 
-    # Apply fitness goal adjustment
-    goal = current_user.fitness_goal.strip().lower()
-    if goal == "gain_muscle":
-        y_pred[0] *= 1.10  # +10% calories
-        y_pred[1] *= 1.20  # +20% protein
-    elif goal == "lose_fat":
-        y_pred[0] *= 0.85  # -15% calories
-        y_pred[1] *= 1.05
+@router.post("/macro/batch", response_model=List[MacroResponse], dependencies=[Depends(rate_limit("macro"))])
+async def calculate_macros_batch(
+    profiles: List[MacroProfile],
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Macro targets for many profiles at once, in request order. Profiles not
+    already cached are predicted together in a single model call.
+    """
+    if len(profiles) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} profiles per request")
 
-    # Convert to integers
-    total_calories, protein, carbs, fat = map(int, y_pred)
+    keys = [feature_key(p.age, p.gender, p.weight, p.height) for p in profiles]
+    predictions = await predict_base_async(keys)
+    return [
+        MacroResponse(**adjust_targets(prediction, p.activity_level, p.fitness_goal))
+        for p, prediction in zip(profiles, predictions)
+    ]
 
-    return MacroResponse(
-        total_calories=total_calories,
-        protein=protein,
-        carbs=carbs,
-        fat=fat
-    )
+@router.get("/macro/model")
+async def get_model_info(current_user: User = Depends(get_current_user)) -> Dict[str, Any]:
+    """
+    The model version being served with its metadata (metrics, features),
+    and latency and prediction drift of the shadow model, if one is set.
+    """
+    return registry.info()
@@ -1,5 +1,12 @@
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import AfterValidator, BaseModel, field_validator
+from datetime import date, datetime
+from typing import Annotated, List
+
+from ..utils.dates import to_utc
+
+# Timestamps are stored naive in UTC; responses carry the offset so clients
+# don't read them as local time
+UTCDateTime = Annotated[datetime, AfterValidator(to_utc)]
 
 # ✅ Enforce that responses always return a real timestamp
 class FoodLogBase(BaseModel):
@@ -14,10 +21,76 @@ class FoodLogCreate(FoodLogBase):
     # Optional: Let users provide a date if they’re back-logging food
     logged_at: datetime | None = None
 
+    @field_validator("logged_at")
+    @classmethod
+    def normalize_logged_at(cls, value: datetime | None) -> datetime | None:
+        # Stored without an offset, so every write has to be in UTC; this also
+        # keeps daily totals bucketing an entry the same on insert and delete
+        return to_utc(value) if value is not None else None
+
 class FoodLogResponse(FoodLogBase):
     id: int
     user_id: int
-    logged_at: datetime  # ✅ Require a real datetime in responses
+    logged_at: UTCDateTime  # ✅ Require a real datetime in responses
+
+    class Config:
+        from_attributes = True
+
+class BulkFoodLogResult(BaseModel):
+    index: int  # Position of the item in the request
+    id: int | None = None
+    logged_at: UTCDateTime | None = None
+    error: str | None = None
+
+class BulkFoodLogResponse(BaseModel):
+    inserted: int
+    failed: int
+    results: List[BulkFoodLogResult]
+
+class MacroTotals(BaseModel):
+    period_start: date  # Local day, or Monday of the local week
+    calories: float
+    protein: float
+    carbs: float
+    fat: float
+    grams: float
+    entries: int
+
+class FoodLogChanges(BaseModel):
+    version: int  # Pass as `since` on the next sync
+    upserts: List[FoodLogResponse]  # Rows inserted or updated since `since`
+    deleted: List[int]  # Ids of rows deleted since `since`
+
+class QuickAddFood(FoodLogBase):
+    # Nutrients and grams are those of the latest entry for this food
+    use_count: int
+    last_used_at: UTCDateTime
 
     class Config:
         from_attributes = True
+
+class MacroValues(BaseModel):
+    calories: float | None
+    protein: float | None
+    carbs: float | None
+    fat: float | None
+
+class TrendDay(BaseModel):
+    day: date  # Local day
+    totals: MacroValues
+    entries: int
+    # Averages over the logged days of the 7/30 days ending here; null if none
+    avg_7: MacroValues
+    avg_30: MacroValues
+    percent_of_target: MacroValues | None = None  # Null without macro targets
+
+class FoodLogTrends(BaseModel):
+    start: date
+    end: date
+    timezone: str
+    target: MacroValues | None = None  # Daily macro targets, if computed
+    current_streak: int  # Consecutive logged days up to `end`
+    longest_streak: int  # Within the range
+    logged_days: int
+    on_target_days: int | None = None  # Logged days within 10% of the calorie target
+    days: List[TrendDay]
@@ -11,4 +11,12 @@ class MacroCreate(MacroBase):
 
 class MacroResponse(MacroBase):
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class MacroProfile(BaseModel):
+    age: int
+    gender: str
+    weight: float  # in kg
+    height: float  # in cm
+    activity_level: str
+    fitness_goal: str
@@ -1,6 +1,8 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, field_validator
 from enum import Enum
 
+from ..utils.dates import resolve_timezone
+
 class ActivityLevel(str, Enum):
     SEDENTARY = "sedentary"
     LIGHT = "light"
@@ -22,10 +24,30 @@ class UserBase(BaseModel):
     height: float  # in cm
     activity_level: ActivityLevel
     fitness_goal: FitnessGoal
+    timezone: str = "UTC"  # IANA name, e.g. "America/Toronto"
+
+    @field_validator("timezone")
+    @classmethod
+    def check_timezone(cls, value: str) -> str:
+        return resolve_timezone(value).key
 
 class UserCreate(UserBase):
     password: str
 
+class UserUpdate(BaseModel):
+    age: int | None = None
+    gender: str | None = None
+    weight: float | None = None  # in kg
+    height: float | None = None  # in cm
+    activity_level: ActivityLevel | None = None
+    fitness_goal: FitnessGoal | None = None
+    timezone: str | None = None
+
+    @field_validator("timezone")
+    @classmethod
+    def check_timezone(cls, value: str | None) -> str | None:
+        return value if value is None else resolve_timezone(value).key
+
 class User(UserBase):
     id: int
 
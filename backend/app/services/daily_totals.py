@@ -0,0 +1,257 @@
+"""
+Per-user daily nutrient totals (the daily_totals rollup) and the trends
+computed from them.
+
+A day is a calendar day in the user's timezone (`users.timezone`). The food
+log routes apply each write's delta to the affected days in the same
+transaction: inserts add, deletes subtract, and updates add the difference.
+`rebuild` regenerates the rollup from food_logs, e.g. after importing rows
+directly or after a user changes timezone.
+
+Usage:
+    python -m app.services.daily_totals [--user-id N]
+"""
+import argparse
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import upsert_insert
+from ..models.daily_total import DailyTotal
+from ..models.food_log import FoodLog
+from ..models.user import User
+
+# Summed per day, in this order in the arrays below
+NUTRIENTS = ("calories", "protein", "carbs", "fat")
+TOTAL_COLUMNS = (*NUTRIENTS, "grams")
+
+# Rolling windows, in days
+SHORT_WINDOW = 7
+LONG_WINDOW = 30
+
+# A day is on target when its calories are within this fraction of the target
+ON_TARGET_TOLERANCE = 0.10
+
+def local_day(logged_at: datetime, zone: ZoneInfo) -> date:
+    """The user's calendar day of a `logged_at` value; naive values are UTC, as stored."""
+    if logged_at.tzinfo is None:
+        logged_at = logged_at.replace(tzinfo=timezone.utc)
+    return logged_at.astimezone(zone).date()
+
+def _upsert(dialect: str):
+    """INSERT ... ON CONFLICT adding the new row's values to the existing day."""
+    stmt = upsert_insert(dialect, DailyTotal)
+    table = DailyTotal.__table__
+    return stmt.on_conflict_do_update(
+        index_elements=[DailyTotal.user_id, DailyTotal.day],
+        set_={column: table.c[column] + stmt.excluded[column] for column in (*TOTAL_COLUMNS, "entries")},
+    )
+
+async def apply_food_log_changes(
+    db: AsyncSession, user_id: int, timezone_name: str, added: Iterable[Dict] = (), removed: Iterable[Dict] = ()
+) -> None:
+    """
+    Apply inserted (`added`) and deleted (`removed`) food logs, as dicts of
+    FoodLog columns with logged_at set, to the user's daily totals. An update
+    is the old row removed and the new one added. Days left without entries
+    are dropped. `timezone_name` is the one returned by
+    `bump_food_log_version` in the same transaction. The caller commits.
+    """
+    zone = ZoneInfo(timezone_name)
+
+    deltas: Dict[date, Dict[str, float]] = defaultdict(lambda: dict.fromkeys((*TOTAL_COLUMNS, "entries"), 0))
+    for sign, rows in ((1, added), (-1, removed)):
+        for row in rows:
+            delta = deltas[local_day(row["logged_at"], zone)]
+            for column in TOTAL_COLUMNS:
+                delta[column] += sign * (row[column] or 0)
+            delta["entries"] += sign
+    if not deltas:
+        return
+
+    await db.execute(
+        _upsert(db.get_bind().dialect.name),
+        [{"user_id": user_id, "day": day, **delta} for day, delta in deltas.items()]
+    )
+    emptied = [day for day, delta in deltas.items() if delta["entries"] < 0]
+    if emptied:
+        await db.execute(delete(DailyTotal).where(
+            DailyTotal.user_id == user_id, DailyTotal.day.in_(emptied), DailyTotal.entries <= 0
+        ))
+
+def food_log_values(food_log: FoodLog) -> Dict:
+    """The columns of a loaded FoodLog that daily totals are computed from."""
+    return {column: getattr(food_log, column) for column in (*TOTAL_COLUMNS, "logged_at")}
+
+def rebuild(connection, user_id: Optional[int] = None) -> int:
+    """
+    Regenerate the rollup from food_logs, for one user or everyone.
+    `connection` is a sync Connection or Session; the caller commits.
+    Returns the number of days written.
+
+    PostgreSQL buckets every user in one INSERT ... SELECT. SQLite has no
+    timezone rules, so only UTC users are bucketed in SQL there; the rest are
+    summed in Python, one user at a time.
+    """
+    clear = delete(DailyTotal)
+    if user_id is not None:
+        clear = clear.where(DailyTotal.user_id == user_id)
+    connection.execute(clear)
+
+    dialect = connection.get_bind().dialect.name if hasattr(connection, "get_bind") else connection.dialect.name
+    filters = [FoodLog.logged_at.is_not(None)]
+    if user_id is not None:
+        filters.append(FoodLog.user_id == user_id)
+    if dialect == "postgresql":
+        day = func.date(func.timezone(User.timezone, FoodLog.logged_at))
+    else:
+        day = func.date(FoodLog.logged_at)
+        filters.append(User.timezone == "UTC")
+    written = connection.execute(insert(DailyTotal).from_select(
+        ["user_id", "day", *TOTAL_COLUMNS, "entries"],
+        select(
+            FoodLog.user_id,
+            day,
+            *(func.sum(func.coalesce(getattr(FoodLog, column), 0)) for column in TOTAL_COLUMNS),
+            func.count(),
+        ).join(User, User.id == FoodLog.user_id).where(*filters).group_by(FoodLog.user_id, day)
+    )).rowcount
+
+    if dialect != "postgresql":
+        users = select(User.id, User.timezone).where(User.timezone != "UTC")
+        if user_id is not None:
+            users = users.where(User.id == user_id)
+        for uid, name in connection.execute(users).all():
+            written += _rebuild_in_python(connection, uid, ZoneInfo(name))
+    return written
+
+def _rebuild_in_python(connection, user_id: int, zone: ZoneInfo) -> int:
+    days: Dict[date, List[float]] = {}
+    rows = connection.execute(
+        select(FoodLog.logged_at, *(getattr(FoodLog, column) for column in TOTAL_COLUMNS))
+        .where(FoodLog.user_id == user_id, FoodLog.logged_at.is_not(None))
+    )
+    for logged_at, *values in rows:
+        sums = days.setdefault(local_day(logged_at, zone), [0.0] * len(TOTAL_COLUMNS) + [0])
+        for index, value in enumerate(values):
+            sums[index] += value or 0
+        sums[-1] += 1
+    if days:
+        connection.execute(insert(DailyTotal), [
+            {"user_id": user_id, "day": day, **dict(zip((*TOTAL_COLUMNS, "entries"), sums))}
+            for day, sums in days.items()
+        ])
+    return len(days)
+
+@dataclass
+class Trends:
+    """Arrays over the days of a trends range, rows in NUTRIENTS order where 2-D."""
+    days: List[date]
+    totals: np.ndarray  # (days, nutrients)
+    entries: np.ndarray  # (days,)
+    short_avg: np.ndarray  # (days, nutrients), NaN where the window has no logged day
+    long_avg: np.ndarray
+    percent_of_target: Optional[np.ndarray]  # (days, nutrients), None without targets
+    current_streak: int
+    longest_streak: int
+    on_target_days: Optional[int]
+
+async def load_trends(
+    db: AsyncSession, user_id: int, start: date, end: date, target: Optional[np.ndarray], today: date
+) -> Trends:
+    """
+    Read the rollup for [start - LONG_WINDOW + 1, end] and compute trends
+    over [start, end]. `target` is the user's daily (calories, protein,
+    carbs, fat) targets, if known.
+
+    Rolling averages are over the logged days within each window, so a
+    missed day doesn't pull the average toward zero. The current streak is
+    the run of logged days ending at `end`, or the day before when `end` is
+    `today` and nothing is logged yet. The longest streak is within the range.
+    """
+    fetch_start = start - timedelta(days=LONG_WINDOW - 1)
+    rows = (await db.execute(
+        select(DailyTotal.day, DailyTotal.entries, *(getattr(DailyTotal, column) for column in NUTRIENTS))
+        .where(DailyTotal.user_id == user_id, DailyTotal.day >= fetch_start, DailyTotal.day <= end)
+    )).all()
+    return compute_trends(rows, fetch_start, start, end, target, today)
+
+def compute_trends(
+    rows, fetch_start: date, start: date, end: date, target: Optional[np.ndarray], today: date
+) -> Trends:
+    """`load_trends` on already fetched (day, entries, *NUTRIENTS) rows."""
+    span = (end - fetch_start).days + 1
+    offset = (start - fetch_start).days
+
+    # Dense per-day arrays; days without a row stay zero
+    totals = np.zeros((span, len(NUTRIENTS)))
+    entries = np.zeros(span, dtype=np.int64)
+    if rows:
+        index = np.array([(row[0] - fetch_start).days for row in rows])
+        entries[index] = [row[1] for row in rows]
+        totals[index] = np.array([row[2:] for row in rows], dtype=float)
+    logged = entries > 0
+
+    def rolling_mean(window: int) -> np.ndarray:
+        # Window sums as differences of prefix sums, over logged days only
+        sums = np.cumsum(np.vstack([np.zeros(len(NUTRIENTS)), totals]), axis=0)
+        counts = np.cumsum(np.concatenate([[0], logged]))
+        stop = np.arange(offset + 1, span + 1)
+        begin = np.maximum(stop - window, 0)
+        window_counts = (counts[stop] - counts[begin])[:, None]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(window_counts > 0, (sums[stop] - sums[begin]) / window_counts, np.nan)
+
+    range_totals, range_entries, range_logged = totals[offset:], entries[offset:], logged[offset:]
+
+    # Runs of logged days from the rises and falls of the padded mask
+    edges = np.diff(np.concatenate([[0], range_logged.astype(np.int8), [0]]))
+    run_starts, run_ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    lengths = run_ends - run_starts
+    days_in_range = len(range_logged)
+    current_streak = 0
+    if len(lengths) and (
+        run_ends[-1] == days_in_range or (end == today and run_ends[-1] == days_in_range - 1)
+    ):
+        current_streak = int(lengths[-1])
+
+    percent_of_target, on_target_days = None, None
+    if target is not None:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            percent_of_target = np.where(target > 0, range_totals / target * 100, np.nan)
+        if target[0] > 0:
+            on_target_days = int(np.count_nonzero(
+                range_logged & (np.abs(range_totals[:, 0] - target[0]) <= target[0] * ON_TARGET_TOLERANCE)
+            ))
+
+    return Trends(
+        days=[start + timedelta(days=i) for i in range(days_in_range)],
+        totals=range_totals,
+        entries=range_entries,
+        short_avg=rolling_mean(SHORT_WINDOW),
+        long_avg=rolling_mean(LONG_WINDOW),
+        percent_of_target=percent_of_target,
+        current_streak=current_streak,
+        longest_streak=int(lengths.max()) if len(lengths) else 0,
+        on_target_days=on_target_days,
+    )
+
+if __name__ == '__main__':
+    from ..database import engine
+    from ..models import macro  # noqa: F401  (resolves User.macros)
+
+    parser = argparse.ArgumentParser(description="Rebuild the daily_totals rollup from food_logs")
+    parser.add_argument('--user-id', type=int, help="Only rebuild this user's days")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with engine.begin() as connection:
+        count = rebuild(connection, args.user_id)
+    print(f"✅ Rebuilt {count} daily totals in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,137 @@
+"""
+Evaluation artifact for the macro predictor.
+
+Training writes the test-split indices, actual and predicted values (in
+original units) and the resulting metrics next to the model:
+
+    model/evaluation.npz   train_idx, test_idx, y_true, y_pred
+    model/evaluation.json  targets, metrics, calibration, params, checksums
+
+Plots and reports (scripts/visualize_predictions.py) read these instead of
+re-splitting the data and re-running the model. To evaluate a model on new
+data, e.g. after retraining elsewhere:
+
+    python -m app.services.evaluation [--model DIR_OR_PKL] [--data CSV]
+"""
+import argparse
+import json
+import os
+import warnings
+from typing import Dict, List
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EVALUATION_PATH = os.path.join(BASE_DIR, 'model/evaluation')
+
+TARGET_LABELS = {
+    'DR1TKCAL': 'calories',
+    'DR1TPROT': 'protein',
+    'DR1TCARB': 'carbs',
+    'DR1TTFAT': 'fat',
+}
+
+# Rows per model call when predicting a whole dataset
+BATCH_SIZE = 4096
+
+def predict_batched(model, X: np.ndarray, batch_size: int = BATCH_SIZE) -> np.ndarray:
+    """
+    Predict X in fixed-size vectorized batches (bounded memory), with
+    calories mapped back from the log scale the model was trained on.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    with warnings.catch_warnings():
+        # The sklearn model was fitted on a DataFrame; plain arrays are fine
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        y = np.vstack([model.predict(X[start:start + batch_size]) for start in range(0, len(X), batch_size)])
+    y[:, 0] = np.exp(y[:, 0])
+    return y
+
+def metrics(y_true: np.ndarray, y_pred: np.ndarray, targets: List[str]) -> Dict:
+    """Overall and per-target MSE, MAE, R² and mean residual (bias)."""
+    residuals = y_pred - y_true
+    mse = np.mean(residuals ** 2, axis=0)
+    variance = np.var(y_true, axis=0)
+    r2 = 1 - mse / variance
+    per_target = {
+        target: {
+            'mse': float(mse[i]),
+            'mae': float(np.mean(np.abs(residuals[:, i]))),
+            'r2': float(r2[i]),
+            'bias': float(np.mean(residuals[:, i])),
+        }
+        for i, target in enumerate(targets)
+    }
+    # Uniform averages, as sklearn's mean_squared_error / r2_score report them
+    return {'mse': float(mse.mean()), 'r2': float(r2.mean()), 'n': int(len(y_true)), 'targets': per_target}
+
+def calibration(y_true: np.ndarray, y_pred: np.ndarray, targets: List[str], bins: int = 10) -> Dict:
+    """
+    Mean predicted vs mean actual value per prediction decile (or `bins`
+    quantile bins) for each target. A calibrated model has the two equal.
+    """
+    report = {}
+    for i, target in enumerate(targets):
+        edges = np.quantile(y_pred[:, i], np.linspace(0, 1, bins + 1))
+        bin_ids = np.clip(np.searchsorted(edges, y_pred[:, i], side='right') - 1, 0, bins - 1)
+        counts = np.bincount(bin_ids, minlength=bins)
+        nonzero = counts > 0
+        report[target] = {
+            'predicted': (np.bincount(bin_ids, y_pred[:, i], bins)[nonzero] / counts[nonzero]).tolist(),
+            'actual': (np.bincount(bin_ids, y_true[:, i], bins)[nonzero] / counts[nonzero]).tolist(),
+            'count': counts[nonzero].tolist(),
+        }
+    return report
+
+def save_evaluation(path: str, train_idx: np.ndarray, test_idx: np.ndarray, y_true: np.ndarray,
+                    y_pred: np.ndarray, targets: List[str], **info) -> Dict:
+    """Write the artifact and return its JSON part."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    np.savez(f'{path}.npz', train_idx=train_idx, test_idx=test_idx, y_true=y_true, y_pred=y_pred)
+    report = {
+        'targets': targets,
+        'metrics': metrics(y_true, y_pred, targets),
+        'calibration': calibration(y_true, y_pred, targets),
+        **info,
+    }
+    with open(f'{path}.json', 'w') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+def load_evaluation(path: str = EVALUATION_PATH):
+    """The artifact's arrays (an NpzFile) and its JSON report."""
+    with open(f'{path}.json') as f:
+        report = json.load(f)
+    return np.load(f'{path}.npz'), report
+
+def print_report(report: Dict) -> None:
+    overall = report['metrics']
+    print(f"✅ Evaluation on {overall['n']} rows: MSE {overall['mse']:.2f}, R² {overall['r2']:.2f}")
+    for target, values in overall['targets'].items():
+        print(f"  • {TARGET_LABELS.get(target, target)}: R² {values['r2']:.2f}, "
+              f"MAE {values['mae']:.1f}, bias {values['bias']:+.1f}")
+
+if __name__ == '__main__':
+    import joblib
+    import pandas as pd
+
+    from .forest import CompiledForest
+    from .train_model import COMPILED_MODEL_PATH, DATA_PATH, FEATURES, TARGETS, file_checksum
+
+    parser = argparse.ArgumentParser(description="Evaluate the macro predictor on a dataset")
+    parser.add_argument('--model', default=COMPILED_MODEL_PATH, help="Compiled model directory or sklearn .pkl")
+    parser.add_argument('--data', default=DATA_PATH, help="Cleaned NHANES CSV")
+    parser.add_argument('--output', default=os.path.join(BASE_DIR, 'model/evaluation_full'))
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+    y_true = df[TARGETS].to_numpy(dtype=np.float64)
+    model = CompiledForest(args.model) if os.path.isdir(args.model) else joblib.load(args.model)
+    y_pred = predict_batched(model, df[FEATURES].to_numpy(dtype=np.float64))
+    rows = np.arange(len(df))
+    report = save_evaluation(
+        args.output, np.empty(0, dtype=np.int64), rows, y_true, y_pred, TARGETS,
+        data_checksum=file_checksum(args.data), model=os.path.abspath(args.model)
+    )
+    print_report(report)
+    print(f"✅ Evaluation written to: {args.output}.npz / .json")
@@ -0,0 +1,129 @@
+"""
+Compact, pure-NumPy inference format for the macro predictor.
+
+`export_forest` flattens a fitted `MultiOutputRegressor(RandomForestRegressor)`
+into a handful of `.npy` arrays (one entry per tree node) plus `meta.json`.
+`CompiledForest` loads them, memory-mapped by default so every uvicorn worker
+shares the same pages, and predicts without importing sklearn or pandas.
+
+Export an existing pickle:
+    python -m app.services.forest app/model/macro_predictor.pkl app/model/macro_predictor
+"""
+import json
+import os
+import sys
+from typing import List
+
+import numpy as np
+
+FORMAT_VERSION = 1
+ARRAYS = ('feature', 'threshold', 'children', 'value', 'roots', 'output_offsets')
+
+def export_forest(model, path: str, feature_names: List[str] = None) -> None:
+    """
+    Write a fitted multi-output random forest to `path` (a directory).
+
+    Children are interleaved (`children[2 * i]` is node i's left child,
+    `children[2 * i + 1]` its right), and leaves are stored as self-loops, so
+    prediction can advance every tree a fixed number of steps without
+    checking which ones have finished.
+    """
+    forests = model.estimators_
+    feature, threshold, children, value, roots, output_offsets = [], [], [], [], [], [0]
+    offset = 0
+    max_depth = 0
+
+    for forest in forests:
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            ids = np.arange(n)
+            is_leaf = tree.children_left == -1
+
+            feature.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+            pairs = np.empty(2 * n, dtype=np.int32)
+            pairs[0::2] = np.where(is_leaf, ids, tree.children_left) + offset
+            pairs[1::2] = np.where(is_leaf, ids, tree.children_right) + offset
+            children.append(pairs)
+            value.append(tree.value[:, 0, 0])
+            roots.append(offset)
+
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+        output_offsets.append(len(roots))
+
+    os.makedirs(path, exist_ok=True)
+    arrays = {
+        'feature': np.concatenate(feature),
+        'threshold': np.concatenate(threshold).astype(np.float64),
+        'children': np.concatenate(children),
+        'value': np.concatenate(value).astype(np.float64),
+        'roots': np.asarray(roots, dtype=np.int32),
+        'output_offsets': np.asarray(output_offsets, dtype=np.int32),
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f'{name}.npy'), np.ascontiguousarray(array))
+
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'n_features': int(forests[0].n_features_in_),
+        'n_outputs': len(forests),
+        'max_depth': int(max_depth),
+        'n_nodes': int(offset),
+        'feature_names': list(feature_names) if feature_names is not None else None,
+    }
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+class CompiledForest:
+    """Pure-NumPy predictor for forests written by `export_forest`."""
+
+    def __init__(self, path: str, mmap: bool = True):
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta['format_version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled forest version: {self.meta['format_version']}")
+
+        mode = 'r' if mmap else None
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mode))
+
+        self.max_depth = self.meta['max_depth']
+        self.n_outputs = self.meta['n_outputs']
+        self.feature_names = self.meta.get('feature_names')
+        self._tree_counts = np.diff(self.output_offsets)
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Predict every output for each row of X, matching sklearn's result.
+
+        Returns:
+            np.ndarray: (n_samples, n_outputs) array of forest means
+        """
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        n_samples, n_features = X.shape
+        flat_X = X.ravel()
+        row_starts = (np.arange(n_samples) * n_features)[:, None]
+
+        # One column per tree, all advanced together one level at a time
+        nodes = np.repeat(self.roots[None, :], n_samples, axis=0)
+        for _ in range(self.max_depth):
+            x = flat_X.take(row_starts + self.feature.take(nodes))
+            nodes = self.children.take(2 * nodes + (x > self.threshold.take(nodes)))
+
+        leaf_values = self.value.take(nodes)
+        sums = np.add.reduceat(leaf_values, self.output_offsets[:-1], axis=1)
+        return sums / self._tree_counts
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m app.services.forest <model.pkl> <output dir>")
+
+    import joblib
+
+    model = joblib.load(sys.argv[1])
+    names = getattr(model.estimators_[0], 'feature_names_in_', None)
+    export_forest(model, sys.argv[2], None if names is None else list(names))
+    print(f"✅ Compiled forest written to: {sys.argv[2]}")
@@ -0,0 +1,107 @@
+"""
+Bulk-import a FoodData Central export (e.g. FNDDS survey foods) into the local
+food store so `search_foods(..., mode="local")` works without the USDA API.
+
+Accepts either:
+  * a JSON download (e.g. `FoodData_Central_survey_food_json_*.json`), or
+  * an extracted CSV download directory containing `food.csv` and
+    `food_nutrient.csv`.
+
+Usage:
+    python -m app.services.import_foods path/to/export [--db app/data/usda_cache.db]
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from typing import Dict, Iterator, Tuple
+
+from ..utils.food_store import FoodStore, DEFAULT_PATH
+
+# FoodData Central nutrient ids -> our field names
+NUTRIENT_IDS = {
+    1008: 'calories',  # Energy (kcal)
+    1003: 'protein',
+    1005: 'carbs',     # Carbohydrate, by difference
+    1004: 'fat',       # Total lipid (fat)
+}
+
+FoodRow = Tuple[int, str, float, float, float, float]
+
+def _row(fdc_id: int, name: str, nutrients: Dict[str, float]) -> FoodRow:
+    return (
+        fdc_id,
+        name,
+        nutrients.get('calories', 0.0),
+        nutrients.get('protein', 0.0),
+        nutrients.get('carbs', 0.0),
+        nutrients.get('fat', 0.0),
+    )
+
+def read_json(path: str) -> Iterator[FoodRow]:
+    """Yield food rows from a FoodData Central JSON download."""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    # Downloads wrap the list in a single key such as "SurveyFoods"
+    if isinstance(data, dict):
+        data = next((v for v in data.values() if isinstance(v, list)), [])
+
+    for food in data:
+        nutrients = {}
+        for item in food.get('foodNutrients', []):
+            nutrient = item.get('nutrient', {})
+            field = NUTRIENT_IDS.get(nutrient.get('id'))
+            if field is not None and item.get('amount') is not None:
+                nutrients[field] = float(item['amount'])
+        yield _row(int(food['fdcId']), food.get('description', ''), nutrients)
+
+def read_csv_dir(path: str) -> Iterator[FoodRow]:
+    """
+    Yield food rows from an extracted FoodData Central CSV download.
+
+    `food_nutrient.csv` can be large, so it is streamed and only the four
+    nutrients we keep are held in memory.
+    """
+    names = {}
+    with open(os.path.join(path, 'food.csv'), newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            names[int(row['fdc_id'])] = row['description']
+
+    nutrients: Dict[int, Dict[str, float]] = {}
+    with open(os.path.join(path, 'food_nutrient.csv'), newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            field = NUTRIENT_IDS.get(int(row['nutrient_id']))
+            if field is None or not row['amount']:
+                continue
+            fdc_id = int(row['fdc_id'])
+            if fdc_id in names:
+                nutrients.setdefault(fdc_id, {})[field] = float(row['amount'])
+
+    for fdc_id, name in names.items():
+        yield _row(fdc_id, name, nutrients.get(fdc_id, {}))
+
+def import_foods(path: str, db_path: str = DEFAULT_PATH) -> int:
+    """
+    Load an export into the food store in one transaction.
+
+    Returns:
+        int: Number of foods imported
+    """
+    rows = read_csv_dir(path) if os.path.isdir(path) else read_json(path)
+    store = FoodStore(db_path)
+    try:
+        return store.bulk_upsert(rows)
+    finally:
+        store.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Import FoodData Central foods for offline search")
+    parser.add_argument('path', help="JSON file or extracted CSV directory")
+    parser.add_argument('--db', default=os.getenv('USDA_CACHE_PATH', DEFAULT_PATH), help="Food store to write to")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = import_foods(args.path, args.db)
+    print(f"✅ Imported {count} foods into {args.db} in {time.perf_counter() - start:.1f}s")
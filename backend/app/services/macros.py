@@ -0,0 +1,184 @@
+import hashlib
+import os
+import time
+import warnings
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .model_registry import LEGACY_COMPILED_PATH, LEGACY_MODEL_PATH, LoadedModel, ModelRegistry
+from ..database import SessionLocal, upsert_insert
+from ..models.macro import Macro
+from ..models.user import User
+from ..utils.cache import TTLCache
+from ..utils.metrics import stage_latency
+from ..utils.worker_pool import BoundedWorkerPool
+
+# The live model comes from the versioned registry and may be swapped at runtime
+registry = ModelRegistry()
+
+# Pre-registry locations, still used as the fallback model
+model_path = LEGACY_MODEL_PATH
+compiled_model_path = LEGACY_COMPILED_PATH
+
+# Model inputs, in training column order
+FEATURES = ['RIDAGEYR', 'RIAGENDR', 'BMXWT', 'BMXHT']
+
+# Apply activity level multiplier (PAL-based)
+ACTIVITY_MULTIPLIERS = {
+    "sedentary": 1.2,
+    "light": 1.375,
+    "moderate": 1.55,
+    "very active": 1.725,
+    "extra active": 1.9
+}
+
+# Base predictions depend only on the four body features, so they are
+# memoized per model version and quantized feature tuple. Weight and height
+# are rounded to 0.1, the precision NHANES measures them at.
+MACRO_CACHE_SIZE = int(os.getenv("MACRO_CACHE_SIZE", "4096"))
+prediction_cache = TTLCache(maxsize=MACRO_CACHE_SIZE, ttl=float("inf"))
+
+# Entries for a replaced model can never be hit again
+registry.on_swap(lambda loaded: prediction_cache.clear())
+
+# Forest inference releases the GIL, so misses run off the event loop
+MODEL_WORKERS = int(os.getenv("MODEL_WORKERS", "2"))
+predict_pool = BoundedWorkerPool("model", MODEL_WORKERS, MODEL_WORKERS * 8)
+
+FeatureKey = Tuple[int, int, float, float]
+Prediction = Tuple[float, float, float, float]
+
+def feature_key(age: int, gender: str, weight: float, height: float) -> FeatureKey:
+    """Quantized model input: (age, gender 1=male/2=female, weight kg, height cm)."""
+    gender_num = 1 if gender.strip().lower() == "male" else 2
+    return (int(age), gender_num, round(float(weight), 1), round(float(height), 1))
+
+def predict_uncached(keys: List[FeatureKey], live: LoadedModel = None) -> np.ndarray:
+    """
+    Run the live model (or `live`) on many feature tuples in one vectorized
+    call. If a shadow model is configured it scores the same batch in the
+    background.
+
+    Returns:
+        np.ndarray: (n, 4) calories (kcal), protein, carbs, fat (g)
+    """
+    live = live or registry.live
+    X = np.asarray(keys, dtype=np.float64)
+    started = time.perf_counter()
+    with warnings.catch_warnings():
+        # The sklearn model was fitted on a DataFrame; plain arrays are fine
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        y = live.model.predict(X)
+    elapsed = time.perf_counter() - started
+    stage_latency.observe(elapsed, "model_inference")
+    y[:, 0] = np.exp(y[:, 0])  # Inverse log-transform calories
+    registry.score_shadow(X, y, elapsed)
+    return y
+
+def _split_cached(live: LoadedModel, keys: List[FeatureKey]) -> Tuple[Dict[FeatureKey, Prediction], List[FeatureKey]]:
+    found, missing = {}, []
+    for key in dict.fromkeys(keys):
+        hit = prediction_cache.get((live.version, key))
+        if hit is None:
+            missing.append(key)
+        else:
+            found[key] = hit
+    return found, missing
+
+def _store(live: LoadedModel, found: Dict[FeatureKey, Prediction], missing: List[FeatureKey], y: np.ndarray) -> None:
+    for key, row in zip(missing, y.tolist()):
+        prediction = tuple(row)
+        prediction_cache.set((live.version, key), prediction)
+        found[key] = prediction
+
+def predict_base(keys: List[FeatureKey]) -> List[Prediction]:
+    """Cached base predictions for each key, predicting all misses in one batch."""
+    live = registry.live
+    found, missing = _split_cached(live, keys)
+    if missing:
+        _store(live, found, missing, predict_uncached(missing, live))
+    return [found[key] for key in keys]
+
+async def predict_base_async(keys: List[FeatureKey]) -> List[Prediction]:
+    """`predict_base` with the model call run on the inference pool."""
+    live = registry.live
+    found, missing = _split_cached(live, keys)
+    if missing:
+        _store(live, found, missing, await predict_pool.run(predict_uncached, missing, live))
+    return [found[key] for key in keys]
+
+def adjust_targets(prediction: Prediction, activity_level: str, fitness_goal: str) -> Dict[str, int]:
+    """Scale a base prediction for activity level and fitness goal."""
+    calories, protein, carbs, fat = prediction
+
+    activity_key = activity_level.strip().lower()
+    calories *= ACTIVITY_MULTIPLIERS.get(activity_key, 1.2)  # Adjust calories
+
+    # Apply fitness goal adjustment
+    goal = fitness_goal.strip().lower()
+    if goal == "gain_muscle":
+        calories *= 1.10  # +10% calories
+        protein *= 1.20  # +20% protein
+    elif goal == "lose_fat":
+        calories *= 0.85  # -15% calories
+        protein *= 1.05
+
+    # Convert to integers
+    return {
+        "total_calories": int(calories),
+        "protein": int(protein),
+        "carbs": int(carbs),
+        "fat": int(fat)
+    }
+
+def profile_hash(user) -> str:
+    """
+    Hash of everything a user's targets depend on: the quantized body
+    features, activity level, fitness goal and model version.
+    """
+    key = feature_key(user.age, user.gender, user.weight, user.height)
+    parts = (*key, user.activity_level.strip().lower(), user.fitness_goal.strip().lower(), registry.live.version)
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+def get_stored_targets(db: Session, user_id: int, inputs_hash: str):
+    """The user's stored targets if they were computed from `inputs_hash`, else None."""
+    stored = db.query(Macro).filter(Macro.user_id == user_id).first()
+    if stored is not None and stored.inputs_hash == inputs_hash:
+        return stored
+    return None
+
+def store_targets(db: Session, user_id: int, targets: Dict[str, int], inputs_hash: str) -> None:
+    """
+    Insert or overwrite the user's row in `macros` and commit. A single
+    upsert, so a /macro call racing the background refresh after register
+    or a profile update can't trip the per-user unique index.
+    """
+    values = {**targets, "inputs_hash": inputs_hash, "computed_at": datetime.now(timezone.utc)}
+    stmt = upsert_insert(db.get_bind().dialect.name, Macro.__table__).values(user_id=user_id, **values)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[Macro.user_id], set_={column: stmt.excluded[column] for column in values}
+    ))
+    db.commit()
+
+def refresh_user_macros(user_id: int) -> None:
+    """
+    Recompute and store a user's targets if their inputs changed. Meant to run
+    as a background task after registration or a profile update, so the next
+    /macro call is a single lookup.
+    """
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            return
+        inputs_hash = profile_hash(user)
+        if get_stored_targets(db, user_id, inputs_hash) is not None:
+            return
+        key = feature_key(user.age, user.gender, user.weight, user.height)
+        [prediction] = predict_base([key])
+        store_targets(db, user_id, adjust_targets(prediction, user.activity_level, user.fitness_goal), inputs_hash)
+    finally:
+        db.close()
@@ -0,0 +1,357 @@
+"""
+Versioned registry for the macro predictor.
+
+Each published version is a directory holding a compiled forest (see
+`forest.py`) and a `metadata.json` with its metrics and feature schema:
+
+    model/registry/
+        20261018T120000-3f2a9c1b/   feature.npy ... meta.json metadata.json
+        CURRENT                     version served live
+        SHADOW                      optional candidate scored alongside it
+
+The API polls the pointer files; when one changes, the new version is
+loaded off the event loop and swapped in with a single reference
+assignment, so in-flight predictions finish on the model they started
+with and no worker restart is needed.
+
+    python -m app.services.model_registry publish app/model/macro_predictor [--promote]
+    python -m app.services.model_registry promote <version>
+    python -m app.services.model_registry shadow <version>|--clear
+    python -m app.services.model_registry list
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .forest import CompiledForest, export_forest
+
+dir_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", os.path.join(dir_path, 'model/registry'))
+# Models used when nothing has been published to the registry yet
+LEGACY_MODEL_PATH = os.path.join(dir_path, 'model/macro_predictor.pkl')
+LEGACY_COMPILED_PATH = os.path.join(dir_path, 'model/macro_predictor')
+
+# Seconds between checks of the CURRENT / SHADOW pointers; 0 disables reloading
+MODEL_RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", "30"))
+# Fraction of live model calls the shadow model also scores
+MODEL_SHADOW_SAMPLE = float(os.getenv("MODEL_SHADOW_SAMPLE", "1.0"))
+# Shadow batches waiting to be scored; beyond this they are dropped, not queued
+MODEL_SHADOW_MAX_PENDING = int(os.getenv("MODEL_SHADOW_MAX_PENDING", "32"))
+
+CURRENT, SHADOW = 'CURRENT', 'SHADOW'
+
+def fingerprint(path: str) -> str:
+    """Short content hash of a model file or directory."""
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        files = [os.path.join(path, name) for name in sorted(os.listdir(path))]
+    else:
+        files = [path]
+    for file_path in files:
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+def read_pointer(name: str, registry_dir: str = REGISTRY_DIR) -> Optional[str]:
+    try:
+        with open(os.path.join(registry_dir, name)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def write_pointer(name: str, version: Optional[str], registry_dir: str = REGISTRY_DIR) -> None:
+    """Point `name` at `version` (or clear it), replacing the file atomically."""
+    path = os.path.join(registry_dir, name)
+    if version is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    if not os.path.isdir(os.path.join(registry_dir, version)):
+        raise ValueError(f"Unknown model version: {version}")
+    fd, tmp = tempfile.mkstemp(dir=registry_dir)
+    with os.fdopen(fd, 'w') as f:
+        f.write(version + '\n')
+    os.replace(tmp, path)
+
+def read_metadata(version: str, registry_dir: str = REGISTRY_DIR) -> Dict[str, Any]:
+    with open(os.path.join(registry_dir, version, 'metadata.json')) as f:
+        return json.load(f)
+
+def list_versions(registry_dir: str = REGISTRY_DIR) -> List[str]:
+    if not os.path.isdir(registry_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(registry_dir)
+        if os.path.isfile(os.path.join(registry_dir, name, 'metadata.json'))
+    )
+
+def publish(model_path: str, metadata: Optional[Dict[str, Any]] = None,
+            registry_dir: str = REGISTRY_DIR) -> str:
+    """
+    Copy a compiled forest directory (or export a sklearn .pkl) into a new
+    registry version and return its name. Nothing is served until the
+    version is promoted.
+    """
+    os.makedirs(registry_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=registry_dir, prefix='.staging-')
+    try:
+        if os.path.isdir(model_path):
+            for name in os.listdir(model_path):
+                shutil.copy2(os.path.join(model_path, name), staging)
+        else:
+            import joblib
+
+            model = joblib.load(model_path)
+            names = getattr(model.estimators_[0], 'feature_names_in_', None)
+            export_forest(model, staging, None if names is None else list(names))
+
+        with open(os.path.join(staging, 'meta.json')) as f:
+            forest_meta = json.load(f)
+        created = datetime.now(timezone.utc)
+        version = f"{created:%Y%m%dT%H%M%S}-{fingerprint(staging)[:8]}"
+        info = {
+            'version': version,
+            'created_at': created.isoformat(),
+            'source': os.path.abspath(model_path),
+            'features': forest_meta.get('feature_names'),
+            'n_outputs': forest_meta['n_outputs'],
+            **(metadata or {}),
+        }
+        with open(os.path.join(staging, 'metadata.json'), 'w') as f:
+            json.dump(info, f, indent=2)
+        # Appears in the registry complete or not at all
+        os.replace(staging, os.path.join(registry_dir, version))
+        return version
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+@dataclass(frozen=True)
+class LoadedModel:
+    version: str
+    model: Any
+    metadata: Dict[str, Any]
+
+def load_version(version: str, registry_dir: str = REGISTRY_DIR) -> LoadedModel:
+    path = os.path.join(registry_dir, version)
+    return LoadedModel(version, CompiledForest(path), read_metadata(version, registry_dir))
+
+def load_legacy() -> LoadedModel:
+    """
+    The model at the fixed pre-registry paths: the compiled forest if it has
+    been exported, else the sklearn pickle.
+    """
+    if os.path.isdir(LEGACY_COMPILED_PATH):
+        return LoadedModel(fingerprint(LEGACY_COMPILED_PATH), CompiledForest(LEGACY_COMPILED_PATH), {})
+    import joblib
+    return LoadedModel(fingerprint(LEGACY_MODEL_PATH), joblib.load(LEGACY_MODEL_PATH), {})
+
+@dataclass
+class ShadowStats:
+    """Running comparison of a shadow model against the live one."""
+    version: str
+    batches: int = 0
+    rows: int = 0
+    dropped: int = 0
+    live_seconds: float = 0.0
+    shadow_seconds: float = 0.0
+    abs_diff_sum: List[float] = field(default_factory=list)
+    max_abs_diff: List[float] = field(default_factory=list)
+
+    def record(self, live: np.ndarray, shadow: np.ndarray, live_seconds: float, shadow_seconds: float) -> None:
+        diff = np.abs(shadow - live)
+        if not self.abs_diff_sum:
+            self.abs_diff_sum = [0.0] * diff.shape[1]
+            self.max_abs_diff = [0.0] * diff.shape[1]
+        self.batches += 1
+        self.rows += len(diff)
+        self.live_seconds += live_seconds
+        self.shadow_seconds += shadow_seconds
+        self.abs_diff_sum = [a + b for a, b in zip(self.abs_diff_sum, diff.sum(axis=0).tolist())]
+        self.max_abs_diff = [max(a, b) for a, b in zip(self.max_abs_diff, diff.max(axis=0).tolist())]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'batches': self.batches,
+            'rows': self.rows,
+            'dropped': self.dropped,
+            'live_ms_per_batch': 1000 * self.live_seconds / self.batches if self.batches else None,
+            'shadow_ms_per_batch': 1000 * self.shadow_seconds / self.batches if self.batches else None,
+            'mean_abs_diff': [total / self.rows for total in self.abs_diff_sum] if self.rows else None,
+            'max_abs_diff': self.max_abs_diff or None,
+        }
+
+class ModelRegistry:
+    """
+    Holds the live model (and an optional shadow) for this process and
+    swaps them when the registry pointers change.
+
+    Readers take `registry.live` once per call and use that snapshot
+    throughout, so a swap never mixes two models within one prediction.
+    """
+
+    def __init__(self, registry_dir: str = REGISTRY_DIR):
+        self.registry_dir = registry_dir
+        self.live = self._load_current()
+        self.shadow: Optional[LoadedModel] = None
+        self.shadow_stats: Optional[ShadowStats] = None
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        self._listeners: List[Callable[[LoadedModel], None]] = []
+        self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self._shadow_pending = 0
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        shadow_version = read_pointer(SHADOW, registry_dir)
+        if shadow_version is not None and shadow_version != self.live.version:
+            self._set_shadow(load_version(shadow_version, registry_dir))
+
+    def _load_current(self) -> LoadedModel:
+        version = read_pointer(CURRENT, self.registry_dir)
+        return load_version(version, self.registry_dir) if version else load_legacy()
+
+    def on_swap(self, listener: Callable[[LoadedModel], None]) -> None:
+        """Call `listener(new_live)` after every live model swap."""
+        self._listeners.append(listener)
+
+    def swap(self, loaded: LoadedModel) -> None:
+        self.live = loaded
+        self.reloads += 1
+        for listener in self._listeners:
+            listener(loaded)
+
+    def _set_shadow(self, loaded: Optional[LoadedModel]) -> None:
+        self.shadow = loaded
+        self.shadow_stats = ShadowStats(loaded.version) if loaded is not None else None
+
+    def refresh(self) -> bool:
+        """
+        Load whatever the pointers now name, if it differs from what is
+        served. Blocking; returns True if anything changed.
+        """
+        changed = False
+        live_version = read_pointer(CURRENT, self.registry_dir)
+        if live_version is not None and live_version != self.live.version:
+            self.swap(load_version(live_version, self.registry_dir))
+            changed = True
+
+        shadow_version = read_pointer(SHADOW, self.registry_dir)
+        if shadow_version == self.live.version:
+            shadow_version = None
+        current_shadow = self.shadow.version if self.shadow is not None else None
+        if shadow_version != current_shadow:
+            self._set_shadow(load_version(shadow_version, self.registry_dir) if shadow_version else None)
+            changed = True
+        return changed
+
+    async def watch(self, interval: float = MODEL_RELOAD_INTERVAL) -> None:
+        """Poll the pointers forever, loading new versions on a worker thread."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+                self.last_error = None
+            except Exception as e:  # A bad version must not take the API down
+                self.last_error = f"{type(e).__name__}: {e}"
+
+    def start(self, interval: float = MODEL_RELOAD_INTERVAL) -> None:
+        if interval > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.watch(interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._shadow_executor.shutdown(wait=False)
+
+    def score_shadow(self, X: np.ndarray, live_y: np.ndarray, live_seconds: float) -> None:
+        """
+        Score `X` with the shadow model in the background and record latency
+        and drift against the live predictions. Never delays the caller.
+        """
+        shadow, stats = self.shadow, self.shadow_stats
+        if shadow is None or random.random() >= MODEL_SHADOW_SAMPLE:
+            return
+        with self._lock:
+            if self._shadow_pending >= MODEL_SHADOW_MAX_PENDING:
+                stats.dropped += 1
+                return
+            self._shadow_pending += 1
+        self._shadow_executor.submit(self._run_shadow, shadow, stats, X, live_y, live_seconds)
+
+    def _run_shadow(self, shadow: LoadedModel, stats: ShadowStats, X, live_y, live_seconds) -> None:
+        try:
+            started = time.perf_counter()
+            y = shadow.model.predict(X)
+            elapsed = time.perf_counter() - started
+            y[:, 0] = np.exp(y[:, 0])
+            stats.record(live_y, y, live_seconds, elapsed)
+        finally:
+            with self._lock:
+                self._shadow_pending -= 1
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            'live': {'version': self.live.version, **self.live.metadata},
+            'shadow': self.shadow_stats.summary() if self.shadow_stats is not None else None,
+            'reloads': self.reloads,
+            'last_error': self.last_error,
+        }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Manage macro model versions")
+    commands = parser.add_subparsers(dest='command', required=True)
+    publish_parser = commands.add_parser('publish', help="Add a compiled model dir or .pkl as a new version")
+    publish_parser.add_argument('model_path')
+    publish_parser.add_argument('--evaluation', help="evaluation.json to attach as metrics")
+    publish_parser.add_argument('--promote', action='store_true', help="Also make it the live version")
+    promote_parser = commands.add_parser('promote', help="Serve a version live")
+    promote_parser.add_argument('version')
+    shadow_parser = commands.add_parser('shadow', help="Score a version alongside the live one")
+    shadow_parser.add_argument('version', nargs='?')
+    shadow_parser.add_argument('--clear', action='store_true')
+    commands.add_parser('list', help="List versions")
+    args = parser.parse_args()
+
+    if args.command == 'publish':
+        metadata = {}
+        if args.evaluation:
+            with open(args.evaluation) as f:
+                evaluation = json.load(f)
+            metadata = {key: evaluation[key] for key in ('metrics', 'params', 'cv_r2', 'data_checksum', 'targets') if key in evaluation}
+        version = publish(args.model_path, metadata)
+        print(f"✅ Published {version}")
+        if args.promote:
+            write_pointer(CURRENT, version)
+            print(f"✅ {version} is now live")
+    elif args.command == 'promote':
+        write_pointer(CURRENT, args.version)
+        print(f"✅ {args.version} is now live")
+    elif args.command == 'shadow':
+        if args.clear == (args.version is not None):
+            sys.exit("Give a version or --clear")
+        write_pointer(SHADOW, None if args.clear else args.version)
+        print("✅ Shadow cleared" if args.clear else f"✅ Shadowing {args.version}")
+    else:
+        live, shadow = read_pointer(CURRENT), read_pointer(SHADOW)
+        for version in list_versions():
+            marks = [label for label, v in (('live', live), ('shadow', shadow)) if v == version]
+            r2 = read_metadata(version).get('metrics', {}).get('r2')
+            print(f"{version}  {'R² %.3f' % r2 if r2 is not None else '':8}  {', '.join(marks)}")
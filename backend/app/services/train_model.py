@@ -1,68 +1,258 @@
+"""
+Train the macro predictor.
+
+    python -m app.services.train_model [--jobs N] [--cv K] [--fresh]
+
+The cleaned NHANES CSV is turned into feature/target arrays once and cached
+as .npy files next to a checksum of the source, so later runs skip pandas
+parsing. Every (candidate, fold) fit of the hyperparameter search runs as its
+own task on a process pool, and each result is appended to a checkpoint
+file as soon as it finishes: an interrupted search picks up where it left
+off. The cross-validated R² of the winning candidate comes from those same
+fold fits instead of refitting the model again.
+"""
+import argparse
+import hashlib
+import itertools
+import json
 import os
-import pandas as pd
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+
 import numpy as np
+import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
+from sklearn.model_selection import KFold, train_test_split
 from sklearn.multioutput import MultiOutputRegressor
-from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.metrics import r2_score
 import joblib
 
+from .evaluation import EVALUATION_PATH, predict_batched, save_evaluation
+from .forest import export_forest
+from .model_registry import CURRENT, publish, write_pointer
+
 # Paths
-DATA_PATH = os.path.join(os.path.dirname(__file__), '../data/nhanes_cleaned.csv')
-MODEL_PATH = os.path.join(os.path.dirname(__file__), '../model/macro_predictor.pkl')
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(BASE_DIR, 'data/nhanes_cleaned.csv')
+CACHE_DIR = os.path.join(BASE_DIR, 'data/cache/training')
+MODEL_PATH = os.path.join(BASE_DIR, 'model/macro_predictor.pkl')
+COMPILED_MODEL_PATH = os.path.join(BASE_DIR, 'model/macro_predictor')
 
-# Load data
-df = pd.read_csv(DATA_PATH)
+FEATURES = ['RIDAGEYR', 'RIAGENDR', 'BMXWT', 'BMXHT']
+TARGETS = ['DR1TKCAL', 'DR1TPROT', 'DR1TCARB', 'DR1TTFAT']
 
-# Select features and targets
-X = df[['RIDAGEYR', 'RIAGENDR', 'BMXWT', 'BMXHT']]
+PARAM_GRID = {
+    'n_estimators': [100, 200],
+    'max_depth': [None, 10, 20],
+}
 
-# Optional: try both with and without log-transform
-y = df[['DR1TKCAL', 'DR1TPROT', 'DR1TCARB', 'DR1TTFAT']].copy()
-y['DR1TKCAL'] = np.log(y['DR1TKCAL'])
+def file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-# Split
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.1, random_state=42
-)
+def prepare_data(data_path: str = DATA_PATH, cache_dir: str = CACHE_DIR) -> Tuple[str, str]:
+    """
+    Cached feature/target arrays for `data_path`, rebuilt when its checksum
+    changes. Calories are log-transformed to stabilize their distribution.
 
-# Grid search
-print("🔍 Running GridSearchCV to tune RandomForest...")
-param_grid = {
-    'estimator__n_estimators': [100, 200],
-    'estimator__max_depth': [None, 10, 20]
-}
-grid_search = GridSearchCV(
-    MultiOutputRegressor(RandomForestRegressor(random_state=42)),
-    param_grid,
-    cv=3,
-    scoring='r2',
-    n_jobs=-1
-)
-grid_search.fit(X_train, y_train)
-model = grid_search.best_estimator_
-
-# Predict
-y_pred = model.predict(X_test)
-
-# Inverse log on calories
-y_pred[:, 0] = np.exp(y_pred[:, 0])
-y_test_vals = y_test.copy()
-y_test_vals['DR1TKCAL'] = np.exp(y_test_vals['DR1TKCAL'])
-
-# Evaluate
-mse = mean_squared_error(y_test_vals, y_pred)
-r2 = r2_score(y_test_vals, y_pred)
-
-print("✅ Evaluation on Test Set:")
-print(f"  • Mean Squared Error: {mse:.2f}")
-print(f"  • R² Score: {r2:.2f}")
-print(f"  • Best Hyperparameters: {grid_search.best_params_}")
-
-cv_scores = cross_val_score(model, X, y, cv=5, scoring='r2')
-print(f"  • Cross-Validated R²: {cv_scores.mean():.2f}")
-
-# Save model
-os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
-joblib.dump(model, MODEL_PATH)
-print(f"\n✅ Model trained and saved to: {MODEL_PATH}")
+    Returns:
+        Tuple[str, str]: Directory holding X.npy / y.npy, and the source checksum
+    """
+    checksum = file_checksum(data_path)
+    meta_path = os.path.join(cache_dir, 'meta.json')
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get('checksum') == checksum and meta.get('features') == FEATURES and meta.get('targets') == TARGETS:
+            return cache_dir, checksum
+
+    df = pd.read_csv(data_path)
+    X = df[FEATURES].to_numpy(dtype=np.float64)
+    y = df[TARGETS].to_numpy(dtype=np.float64)
+    y[:, 0] = np.log(y[:, 0])
+
+    os.makedirs(cache_dir, exist_ok=True)
+    np.save(os.path.join(cache_dir, 'X.npy'), X)
+    np.save(os.path.join(cache_dir, 'y.npy'), y)
+    # Written last, so a partial write is never mistaken for a valid cache
+    with open(meta_path, 'w') as f:
+        json.dump({'checksum': checksum, 'features': FEATURES, 'targets': TARGETS, 'rows': len(X)}, f, indent=2)
+    return cache_dir, checksum
+
+def load_arrays(cache_dir: str, mmap: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    mode = 'r' if mmap else None
+    return (
+        np.load(os.path.join(cache_dir, 'X.npy'), mmap_mode=mode),
+        np.load(os.path.join(cache_dir, 'y.npy'), mmap_mode=mode),
+    )
+
+def split_indices(n: int, test_size: float, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Row indices of the train and test splits."""
+    return train_test_split(np.arange(n), test_size=test_size, random_state=seed)
+
+def build_model(params: Dict, seed: int) -> MultiOutputRegressor:
+    return MultiOutputRegressor(RandomForestRegressor(random_state=seed, **params))
+
+def candidates(grid: Dict[str, List]) -> List[Dict]:
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+def candidate_key(params: Dict) -> str:
+    return json.dumps(params, sort_keys=True)
+
+# Per-worker training split, loaded once by the pool initializer
+_worker_data = {}
+
+def _init_worker(cache_dir: str, test_size: float, seed: int) -> None:
+    X, y = load_arrays(cache_dir, mmap=True)
+    train_idx, _ = split_indices(len(X), test_size, seed)
+    _worker_data['train'] = (X[train_idx], y[train_idx])
+
+def _fit_fold(params: Dict, fold: int, train_idx: np.ndarray, val_idx: np.ndarray, seed: int) -> Dict:
+    X_train, y_train = _worker_data['train']
+    started = time.perf_counter()
+    model = build_model(params, seed).fit(X_train[train_idx], y_train[train_idx])
+    score = r2_score(y_train[val_idx], model.predict(X_train[val_idx]))
+    return {
+        'params': params,
+        'fold': fold,
+        'score': float(score),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+def run_id(checksum: str, grid: Dict, folds: int, test_size: float, seed: int) -> str:
+    """Identifies a search; checkpoints are only reused by an identical one."""
+    spec = json.dumps([checksum, grid, folds, test_size, seed], sort_keys=True)
+    return hashlib.sha256(spec.encode()).hexdigest()[:12]
+
+def load_checkpoint(path: str) -> Dict[Tuple[str, int], Dict]:
+    done = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue  # Line cut short by an interruption
+                done[(candidate_key(result['params']), result['fold'])] = result
+    return done
+
+def search(cache_dir: str, checksum: str, grid: Dict, folds: int, jobs: int,
+           test_size: float, seed: int, fresh: bool = False) -> Dict[str, List[float]]:
+    """
+    Cross-validate every candidate in `grid` on the training split.
+
+    Returns:
+        Dict[str, List[float]]: Fold scores per candidate key
+    """
+    checkpoint_path = os.path.join(cache_dir, f'cv_{run_id(checksum, grid, folds, test_size, seed)}.jsonl')
+    if fresh and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    done = load_checkpoint(checkpoint_path)
+
+    X, _ = load_arrays(cache_dir, mmap=True)
+    train_idx, _ = split_indices(len(X), test_size, seed)
+    splits = list(KFold(n_splits=folds).split(train_idx))
+
+    tasks = [
+        (params, fold, train_idx, val_idx)
+        for params in candidates(grid)
+        for fold, (train_idx, val_idx) in enumerate(splits)
+        if (candidate_key(params), fold) not in done
+    ]
+    total = len(candidates(grid)) * folds
+    if done:
+        print(f"↩️  Resuming: {len(done)}/{total} fits already checkpointed")
+
+    if tasks:
+        print(f"🔍 Running {len(tasks)} fits on {jobs} worker(s)...")
+        with open(checkpoint_path, 'a') as checkpoint, ProcessPoolExecutor(
+            max_workers=jobs, initializer=_init_worker, initargs=(cache_dir, test_size, seed)
+        ) as pool:
+            futures = [pool.submit(_fit_fold, *task, seed) for task in tasks]
+            for future in as_completed(futures):
+                result = future.result()
+                checkpoint.write(json.dumps(result) + '\n')
+                checkpoint.flush()
+                done[(candidate_key(result['params']), result['fold'])] = result
+                print(f"  • {result['params']} fold {result['fold']}: R² {result['score']:.3f} ({result['seconds']}s)")
+
+    scores = {}
+    for (key, fold), result in sorted(done.items()):
+        scores.setdefault(key, []).append(result['score'])
+    return scores
+
+def parse_depth(value: str):
+    return None if value.lower() == 'none' else int(value)
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Train the macro predictor")
+    parser.add_argument('--data', default=DATA_PATH, help="Cleaned NHANES CSV")
+    parser.add_argument('--cv', type=int, default=3, help="Cross-validation folds")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument('--n-estimators', type=int, nargs='+', default=PARAM_GRID['n_estimators'])
+    parser.add_argument('--max-depth', type=parse_depth, nargs='+', default=PARAM_GRID['max_depth'])
+    parser.add_argument('--test-size', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--fresh', action='store_true', help="Ignore checkpointed CV results")
+    parser.add_argument('--publish', action='store_true', help="Add the model to the registry as a new version")
+    parser.add_argument('--promote', action='store_true', help="Publish and serve it live")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    cache_dir, checksum = prepare_data(args.data)
+    grid = {'n_estimators': args.n_estimators, 'max_depth': args.max_depth}
+    scores = search(cache_dir, checksum, grid, args.cv, args.jobs, args.test_size, args.seed, args.fresh)
+
+    best_key = max(scores, key=lambda key: np.mean(scores[key]))
+    best_params = json.loads(best_key)
+
+    # One final fit of the winner on the whole training split
+    X, y = load_arrays(cache_dir)
+    train_idx, test_idx = split_indices(len(X), args.test_size, args.seed)
+    model = build_model(best_params, args.seed).fit(pd.DataFrame(X[train_idx], columns=FEATURES), y[train_idx])
+
+    # Evaluate on the test split, in original units, and keep the
+    # predictions so reports and plots never have to recompute them
+    y_test = y[test_idx].copy()
+    y_test[:, 0] = np.exp(y_test[:, 0])
+    cv_r2 = float(np.mean(scores[best_key]))
+    report = save_evaluation(
+        EVALUATION_PATH, train_idx, test_idx, y_test, predict_batched(model, X[test_idx]), TARGETS,
+        params=best_params, cv_r2=cv_r2, cv_folds=args.cv, data_checksum=checksum
+    )
+
+    print("✅ Evaluation on Test Set:")
+    print(f"  • Mean Squared Error: {report['metrics']['mse']:.2f}")
+    print(f"  • R² Score: {report['metrics']['r2']:.2f}")
+    print(f"  • Best Hyperparameters: {best_params}")
+    print(f"  • Cross-Validated R²: {cv_r2:.2f} ({args.cv} folds)")
+    print(f"  • Evaluation saved to: {EVALUATION_PATH}.npz / .json")
+
+    # Save model
+    os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
+    joblib.dump(model, MODEL_PATH)
+    print(f"\n✅ Model trained and saved to: {MODEL_PATH}")
+
+    # Export the compact NumPy format the API serves from
+    export_forest(model, COMPILED_MODEL_PATH, FEATURES)
+    print(f"✅ Compiled model exported to: {COMPILED_MODEL_PATH}")
+
+    if args.publish or args.promote:
+        version = publish(COMPILED_MODEL_PATH, {
+            'metrics': report['metrics'], 'params': best_params, 'cv_r2': cv_r2,
+            'data_checksum': checksum, 'targets': TARGETS,
+        })
+        print(f"✅ Published model version: {version}")
+        if args.promote:
+            # Running API workers pick it up on their next registry poll
+            write_pointer(CURRENT, version)
+            print(f"✅ {version} is now live")
+    print(f"⏱️  Total time: {time.perf_counter() - started:.1f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Per-user index of logged foods behind quick-add: how often each food name
+was logged, when last, and the values of the latest entry.
+
+The food log routes keep it current in the same transaction as their
+writes. Inserts are applied incrementally with an upsert. Updates and
+deletes recompute just the names they touch from food_logs. `rebuild`
+regenerates it from scratch, e.g. after importing rows directly.
+
+Usage:
+    python -m app.services.user_foods [--user-id N]
+"""
+import argparse
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Literal, Optional
+
+from sqlalchemy import case, delete, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import upsert_insert
+from ..models.food_log import FoodLog
+from ..models.user_food import UserFood
+
+# Taken from the latest entry of each food
+LATEST_COLUMNS = ("calories", "protein", "carbs", "fat", "grams")
+
+def _upsert(dialect: str):
+    """INSERT ... ON CONFLICT adding to use_count and keeping the newest entry's values."""
+    stmt = upsert_insert(dialect, UserFood)
+    excluded = stmt.excluded
+    newer = or_(UserFood.last_used_at.is_(None), excluded.last_used_at >= UserFood.last_used_at)
+    return stmt.on_conflict_do_update(
+        index_elements=[UserFood.user_id, UserFood.food_name],
+        set_={
+            **{column: case((newer, excluded[column]), else_=UserFood.__table__.c[column]) for column in LATEST_COLUMNS},
+            "last_used_at": case((newer, excluded.last_used_at), else_=UserFood.last_used_at),
+            "use_count": UserFood.use_count + excluded.use_count,
+        },
+    )
+
+async def record_food_logs(db: AsyncSession, user_id: int, rows: Iterable[Dict]) -> None:
+    """
+    Count newly inserted food logs (dicts of FoodLog columns, with logged_at
+    set) into the user's index, one upsert per distinct food name.
+    """
+    by_name: Dict[str, List[Dict]] = defaultdict(list)
+    for row in rows:
+        by_name[row["food_name"]].append(row)
+    if not by_name:
+        return
+
+    params = []
+    for name, entries in by_name.items():
+        # Ties go to the later row (higher id), as in `rebuild`
+        latest = max(reversed(entries), key=lambda entry: entry["logged_at"])
+        params.append({
+            "user_id": user_id,
+            "food_name": name,
+            **{column: latest[column] for column in LATEST_COLUMNS},
+            "use_count": len(entries),
+            "last_used_at": latest["logged_at"],
+        })
+    await db.execute(_upsert(db.get_bind().dialect.name), params)
+
+async def refresh_user_foods(db: AsyncSession, user_id: int, names: Iterable[str]) -> None:
+    """
+    Recompute the user's index entries for `names` from food_logs, after rows
+    with those names were updated or deleted. Pending changes are flushed first.
+    """
+    await db.flush()
+    for name in set(names):
+        await db.execute(delete(UserFood).where(UserFood.user_id == user_id, UserFood.food_name == name))
+        where = (FoodLog.user_id == user_id, FoodLog.food_name == name)
+        use_count = (await db.execute(select(func.count()).select_from(FoodLog).where(*where))).scalar_one()
+        if not use_count:
+            continue
+        latest = (await db.execute(
+            select(FoodLog).where(*where).order_by(FoodLog.logged_at.desc(), FoodLog.id.desc()).limit(1)
+        )).scalar_one()
+        await db.execute(insert(UserFood).values(
+            user_id=user_id,
+            food_name=name,
+            **{column: getattr(latest, column) for column in LATEST_COLUMNS},
+            use_count=use_count,
+            last_used_at=latest.logged_at,
+        ))
+
+async def top_user_foods(
+    db: AsyncSession, user_id: int, limit: int, sort: Literal["frequent", "recent"] = "frequent"
+) -> List[UserFood]:
+    """The user's top foods, most logged or most recently logged first."""
+    if sort == "frequent":
+        order = (UserFood.use_count.desc(), UserFood.last_used_at.desc())
+    else:
+        order = (UserFood.last_used_at.desc(),)
+    return (await db.execute(
+        select(UserFood).where(UserFood.user_id == user_id).order_by(*order).limit(limit)
+    )).scalars().all()
+
+def rebuild(connection, user_id: Optional[int] = None) -> int:
+    """
+    Regenerate the index from food_logs, for one user or everyone, in a
+    single INSERT ... SELECT. `connection` is a sync Connection or Session;
+    the caller commits. Returns the number of entries written.
+    """
+    partition = (FoodLog.user_id, FoodLog.food_name)
+    filters = [FoodLog.user_id.is_not(None), FoodLog.food_name.is_not(None)]
+    if user_id is not None:
+        filters.append(FoodLog.user_id == user_id)
+    ranked = select(
+        FoodLog.user_id,
+        FoodLog.food_name,
+        *(getattr(FoodLog, column) for column in LATEST_COLUMNS),
+        func.count().over(partition_by=partition).label("use_count"),
+        FoodLog.logged_at.label("last_used_at"),
+        func.row_number().over(
+            partition_by=partition, order_by=(FoodLog.logged_at.desc(), FoodLog.id.desc())
+        ).label("recency_rank"),
+    ).where(*filters).subquery()
+
+    columns = ["user_id", "food_name", *LATEST_COLUMNS, "use_count", "last_used_at"]
+    clear = delete(UserFood)
+    if user_id is not None:
+        clear = clear.where(UserFood.user_id == user_id)
+    connection.execute(clear)
+    return connection.execute(insert(UserFood).from_select(
+        columns, select(*(ranked.c[column] for column in columns)).where(ranked.c.recency_rank == 1)
+    )).rowcount
+
+if __name__ == '__main__':
+    from ..database import engine
+
+    parser = argparse.ArgumentParser(description="Rebuild the quick-add food index from food_logs")
+    parser.add_argument('--user-id', type=int, help="Only rebuild this user's entries")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with engine.begin() as connection:
+        count = rebuild(connection, args.user_id)
+    print(f"✅ Rebuilt {count} quick-add entries in {time.perf_counter() - start:.1f}s")
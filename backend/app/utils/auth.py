@@ -1,21 +1,37 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+import asyncio
 import os
+import time
 from dotenv import load_dotenv
 
 from ..database import get_db
 from ..models.user import User
 from ..schemas.user import TokenData
+from .cache import TTLCache
+from .metrics import timed, timed_stage
+from .worker_pool import BoundedWorkerPool
 
 load_dotenv()
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing. Hashes made with a different cost are upgraded on the
+# next successful login (see verify_and_update_password).
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# bcrypt releases the GIL, so a dedicated thread pool gives real parallelism
+# without tying up the server's shared threadpool
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 2)))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", str(HASH_WORKERS * 4)))
+HASH_WAIT_TIMEOUT = float(os.getenv("HASH_WAIT_TIMEOUT", "2"))
+hash_pool = BoundedWorkerPool("bcrypt", HASH_WORKERS, HASH_MAX_PENDING, HASH_WAIT_TIMEOUT)
 
 # JWT settings
 SECRET_KEY = os.getenv("SECRET_KEY")
@@ -24,11 +40,93 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Auth caches. Entries are per process, so a profile change made by another
+# worker is picked up after at most AUTH_CACHE_TTL seconds.
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+
+token_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+user_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Detached, read-only copy of a user's columns, safe to share between requests."""
+    id: int
+    username: str
+    email: str
+    age: int
+    gender: str
+    weight: float
+    height: float
+    activity_level: str
+    fitness_goal: str
+    timezone: str
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            age=user.age,
+            gender=user.gender,
+            weight=user.weight,
+            height=user.height,
+            activity_level=user.activity_level,
+            fitness_goal=user.fitness_goal,
+            timezone=user.timezone
+        )
+
+def invalidate_user(username: str) -> None:
+    """Drop a cached user snapshot so the next request reloads it."""
+    user_cache.pop(username)
+
+# Usernames whose cached snapshot a session's pending changes make stale,
+# kept in Session.info until the transaction ends
+CHANGED_USERS = "changed_usernames"
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _collect_changed_user(mapper, connection, target):
+    changed = object_session(target).info.setdefault(CHANGED_USERS, set())
+    changed.add(target.username)
+    # A rename leaves the snapshot cached under the old username too
+    changed.update(inspect(target).attrs.username.history.deleted)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    # Only once committed: dropping the snapshot at flush would let another
+    # request reload the old row and cache it again before the commit
+    for username in session.info.pop(CHANGED_USERS, ()):
+        invalidate_user(username)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_changed_users(session, previous_transaction):
+    # A savepoint rolling back leaves the outer transaction's changes pending
+    if previous_transaction.parent is None:
+        session.info.pop(CHANGED_USERS, None)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+@timed_stage("bcrypt_hash")
+async def hash_password(password: str) -> str:
+    """`get_password_hash` run on the bcrypt pool."""
+    return await hash_pool.run(pwd_context.hash, password)
+
+@timed_stage("bcrypt_verify")
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the bcrypt pool.
+
+    Returns:
+        Tuple[bool, Optional[str]]: Whether it matched, and a replacement hash
+        when the stored one uses outdated parameters
+    """
+    return await hash_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
  
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -40,22 +138,57 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+def decode_token(token: str) -> Optional[str]:
+    """
+    Verify a token and return its subject (username), or None if it has none.
+    Verified subjects are cached until the token expires or AUTH_CACHE_TTL
+    passes, whichever comes first.
+
+    Raises:
+        JWTError: If the token is invalid or expired
+    """
+    username = token_cache.get(token)
+    if username is None:
+        with timed("jwt_decode"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        username = payload.get("sub")
+        if username is None:
+            return None
+        ttl = min(AUTH_CACHE_TTL, payload["exp"] - time.time()) if "exp" in payload else AUTH_CACHE_TTL
+        if ttl > 0:
+            token_cache.set(token, username, ttl)
+    return username
+
+def _load_user(db: Session, username: str) -> Optional[UserSnapshot]:
+    # Run off the event loop: a checkout waiting on a drained pool or a slow
+    # query would otherwise stall every request
+    try:
+        db_user = db.query(User).filter(User.username == username).first()
+        return UserSnapshot.from_user(db_user) if db_user is not None else None
+    finally:
+        # Hand the connection back now rather than at the end of the request,
+        # so in-flight requests don't each pin one
+        db.rollback()
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UserSnapshot:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
+        username = decode_token(token)
         if username is None:
             raise credentials_exception
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    
-    user = db.query(User).filter(User.username == token_data.username).first()
+
+    user = user_cache.get(token_data.username)
     if user is None:
-        raise credentials_exception
+        with timed("user_lookup"):
+            user = await asyncio.to_thread(_load_user, db, token_data.username)
+        if user is None:
+            raise credentials_exception
+        user_cache.set(user.username, user)
     return user 
\ No newline at end of file
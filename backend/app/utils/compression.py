@@ -0,0 +1,141 @@
+"""
+Negotiated response compression: brotli when the `brotli` package is
+installed and the client accepts it, otherwise gzip.
+
+Bodies smaller than COMPRESS_MIN_SIZE, non-text media types and responses
+that already carry a Content-Encoding (the gzip export) pass through
+untouched. Streamed bodies are compressed chunk by chunk and flushed, so
+NDJSON still reaches the client as it is produced.
+"""
+import os
+import zlib
+from typing import Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+# 4 compresses JSON close to gzip -9 at a fraction of the CPU; 11 is for static assets
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "application/javascript")
+
+def choose_encoding(accept_encoding: str, supported: Optional[Tuple[str, ...]] = None) -> Optional[str]:
+    """
+    The encoding in `supported` (by default "br" and "gzip", or just "gzip"
+    without brotli) the client prefers by q-value, the earlier one on a tie,
+    or None for identity.
+    """
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    wildcard = accepted.get("*", 0.0)
+    if supported is None:
+        supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    # max keeps the first of equal preferences, so br wins ties
+    best = max(supported, key=lambda name: accepted.get(name, wildcard))
+    return best if accepted.get(best, wildcard) > 0 else None
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self._brotli is not None:
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if final else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing eligible responses per `choose_encoding`."""
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = next((value.decode("latin-1") for key, value in scope["headers"] if key == b"accept-encoding"), "")
+        encoding = choose_encoding(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = {key.lower(): value for key, value in message.get("headers", [])}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                passthrough = (
+                    b"content-encoding" in headers
+                    or message["status"] in (204, 304)
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    # Held until the first body chunk shows whether compressing pays off
+                    start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding)
+                body = compressor.compress(body, final=not more_body)
+                # A streamed body's length isn't known up front
+                await send(_compressed_start(start_message, encoding, None if more_body else len(body)))
+            else:
+                body = compressor.compress(body, final=not more_body)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+def _compressed_start(message, encoding: str, content_length: Optional[int]):
+    """`message` with Content-Encoding, Vary and Content-Length set for the compressed body."""
+    headers, vary = [], [b"Accept-Encoding"]
+    for key, value in message.get("headers", []):
+        name = key.lower()
+        if name == b"content-length":
+            continue
+        if name == b"vary":
+            vary.insert(0, value)
+            continue
+        if name == b"etag" and not value.startswith(b"W/"):
+            # The compressed bytes differ, so a strong validator no longer holds
+            value = b"W/" + value
+        headers.append((key, value))
+    headers.append((b"content-encoding", encoding.encode()))
+    headers.append((b"vary", b", ".join(vary)))
+    if content_length is not None:
+        headers.append((b"content-length", str(content_length).encode()))
+    return {**message, "headers": headers}
@@ -0,0 +1,103 @@
+import math
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import case, func
+from sqlalchemy.sql.elements import ColumnElement
+
+def resolve_timezone(name: str) -> ZoneInfo:
+    """
+    Look up an IANA timezone name (e.g. "America/Toronto").
+
+    Raises:
+        ValueError: If the name is not a known timezone
+    """
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone: {name}")
+
+def to_utc(value: datetime) -> datetime:
+    """
+    `value` as an aware UTC datetime. Naive values are taken to be UTC already,
+    which is how `logged_at` is stored and read back.
+    """
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def local_range_to_utc(start: date, end: date, tz: ZoneInfo) -> Tuple[datetime, datetime]:
+    """
+    Convert an inclusive range of local calendar days into a half-open
+    [start, end) range of UTC datetimes suitable for filtering `logged_at`.
+    """
+    start_local = datetime.combine(start, time.min, tzinfo=tz)
+    end_local = datetime.combine(end + timedelta(days=1), time.min, tzinfo=tz)
+    return start_local.astimezone(timezone.utc), end_local.astimezone(timezone.utc)
+
+def utc_offset_changes(tz: ZoneInfo, start: datetime, end: datetime) -> List[Tuple[datetime, timedelta]]:
+    """
+    The UTC offsets of `tz` over the UTC range [start, end): the offset at
+    `start`, then (instant, new offset) for each DST or other transition
+    within the range, found to the second.
+    """
+    def offset(seconds: int) -> timedelta:
+        return datetime.fromtimestamp(seconds, tz).utcoffset()
+
+    first, last = math.floor(start.timestamp()), math.ceil(end.timestamp())
+    changes = [(start, offset(first))]
+    # Transitions are months apart, so checking once a day finds each one;
+    # they fall on whole seconds, so bisecting over seconds finds it exactly
+    low = first
+    while low < last:
+        high = min(low + 86400, last)
+        if offset(high) != changes[-1][1]:
+            before, after = low, high
+            while after - before > 1:
+                middle = (before + after) // 2
+                if offset(middle) == changes[-1][1]:
+                    before = middle
+                else:
+                    after = middle
+            changes.append((datetime.fromtimestamp(after, timezone.utc), offset(after)))
+        low = high
+    return changes
+
+def local_bucket(column, period: str, tz: ZoneInfo, dialect: str, start: datetime, end: datetime) -> ColumnElement:
+    """
+    SQL expression truncating a UTC timestamp column to the start of its local
+    day or (ISO, Monday-based) week, for rows in the UTC range [start, end).
+
+    PostgreSQL converts with the full timezone rules. SQLite has no timezone
+    support, so the offsets in effect over the range are looked up here and
+    applied with a CASE over the instants they change at.
+    """
+    if dialect == "postgresql":
+        return func.date(func.date_trunc(period, func.timezone(tz.key, column)))
+
+    def shifted(offset: timedelta) -> ColumnElement:
+        modifiers = [f"{int(offset.total_seconds() // 60):+d} minutes"]
+        if period == "week":
+            # Jump forward to Sunday, then back to that week's Monday
+            modifiers += ["weekday 0", "-6 days"]
+        return func.date(column, *modifiers)
+
+    # Normalized to naive UTC, the form logged_at is stored and compared in
+    changes = [(at.astimezone(timezone.utc).replace(tzinfo=None), offset)
+               for at, offset in utc_offset_changes(tz, start, end)]
+    if len(changes) == 1:
+        return shifted(changes[0][1])
+    # Each offset applies until the instant of the next change
+    return case(
+        *((column < changes[i + 1][0], shifted(changes[i][1])) for i in range(len(changes) - 1)),
+        else_=shifted(changes[-1][1])
+    )
+
+def parse_bucket(value) -> date:
+    """Normalize a bucket value returned by `local_bucket` to a date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+import zlib
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+
+from ..database import SessionLocal
+from ..models.food_log import FoodLog
+from .dates import to_utc
+
+EXPORT_COLUMNS = (
+    FoodLog.id, FoodLog.food_name, FoodLog.calories, FoodLog.protein,
+    FoodLog.carbs, FoodLog.fat, FoodLog.grams, FoodLog.logged_at
+)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+# Rows fetched from the database per round trip, and bytes buffered per chunk sent
+FETCH_SIZE = 1000
+CHUNK_SIZE = 64 * 1024
+
+def _timestamp(value) -> Optional[str]:
+    # Stored naive in UTC; written with the offset so it isn't read as local time
+    return to_utc(value).isoformat() if value else None
+
+def _rows(user_id: int) -> Iterator[tuple]:
+    """
+    Stream a user's food logs oldest first in FETCH_SIZE batches, using a
+    server-side cursor where the database supports one. The session is owned
+    here so it stays open for as long as the response is being streamed.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            select(*EXPORT_COLUMNS)
+            .where(FoodLog.user_id == user_id)
+            .order_by(FoodLog.logged_at, FoodLog.id)
+            .execution_options(stream_results=True, yield_per=FETCH_SIZE)
+        )
+        for row in result:
+            yield row
+    finally:
+        db.close()
+
+def _csv_chunks(user_id: int) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for row in _rows(user_id):
+        writer.writerow((*row[:-1], _timestamp(row[-1]) or ""))
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def _ndjson_chunks(user_id: int) -> Iterator[str]:
+    lines, size = [], 0
+    for row in _rows(user_id):
+        item = dict(zip(EXPORT_FIELDS, row))
+        item["logged_at"] = _timestamp(item["logged_at"])
+        line = json.dumps(item)
+        lines.append(line)
+        size += len(line) + 1
+        if size >= CHUNK_SIZE:
+            yield "\n".join(lines) + "\n"
+            lines, size = [], 0
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+def _gzip(chunks: Iterator[str]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_food_logs(user_id: int, fmt: str, gzip: bool = False) -> Iterator[bytes]:
+    """
+    Iterate over a user's complete food log as CSV or NDJSON, optionally
+    gzip-compressed, in bounded chunks so memory use does not depend on how
+    many rows the user has.
+    """
+    chunks = _csv_chunks(user_id) if fmt == "csv" else _ndjson_chunks(user_id)
+    if gzip:
+        return _gzip(chunks)
+    return (chunk.encode() for chunk in chunks)
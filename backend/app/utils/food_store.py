@@ -0,0 +1,187 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Dict, Any, Optional, Tuple
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data/usda_cache.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS foods (
+    fdc_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    calories REAL NOT NULL,
+    protein REAL NOT NULL,
+    carbs REAL NOT NULL,
+    fat REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS search_cache (
+    query TEXT PRIMARY KEY,
+    fdc_ids TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+"""
+
+# Full-text index over food names, kept in sync with `foods` by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS foods_fts USING fts5(
+    name, content='foods', content_rowid='fdc_id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS foods_fts_insert AFTER INSERT ON foods BEGIN
+    INSERT INTO foods_fts (rowid, name) VALUES (new.fdc_id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS foods_fts_delete AFTER DELETE ON foods BEGIN
+    INSERT INTO foods_fts (foods_fts, rowid, name) VALUES ('delete', old.fdc_id, old.name);
+END;
+CREATE TRIGGER IF NOT EXISTS foods_fts_update AFTER UPDATE OF name ON foods BEGIN
+    INSERT INTO foods_fts (foods_fts, rowid, name) VALUES ('delete', old.fdc_id, old.name);
+    INSERT INTO foods_fts (rowid, name) VALUES (new.fdc_id, new.name);
+END;
+"""
+
+FOOD_FIELDS = ('name', 'calories', 'protein', 'carbs', 'fat')
+
+UPSERT_FOOD = (
+    "INSERT INTO foods (fdc_id, name, calories, protein, carbs, fat, updated_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (fdc_id) DO UPDATE SET name = excluded.name, calories = excluded.calories, "
+    "protein = excluded.protein, carbs = excluded.carbs, fat = excluded.fat, "
+    "updated_at = excluded.updated_at"
+)
+
+def fts_query(query: str) -> str:
+    """
+    Turn free text into an FTS5 expression where every word must match as a
+    prefix, e.g. "chick bre" -> '"chick"* "bre"*'.
+    """
+    terms = re.findall(r"\w+", query.lower())
+    return " ".join(f'"{term}"*' for term in terms)
+
+class FoodStore:
+    """
+    Local SQLite store for USDA food data.
+
+    `foods` holds one row of nutrients per FoodData Central id, filled from
+    every search response we see and from bulk imports. `search_cache` maps a
+    normalized query to the ordered ids it returned, so repeat searches never
+    leave the machine. `foods_fts` indexes the names for offline search.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        try:
+            fts_exists = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'foods_fts'"
+            ).fetchone() is not None
+            self._conn.executescript(FTS_SCHEMA)
+            if not fts_exists:
+                # Index foods cached before the full-text table existed
+                with self._conn:
+                    self._conn.execute("INSERT INTO foods_fts (foods_fts) VALUES ('rebuild')")
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: local search falls back to LIKE
+            self.has_fts = False
+
+    def get_search(self, query: str, max_age: float) -> Optional[List[Dict[str, Any]]]:
+        """Cached results for a normalized query, or None if absent or stale."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fdc_ids, fetched_at FROM search_cache WHERE query = ?", (query,)
+            ).fetchone()
+            if row is None or time.time() - row[1] > max_age:
+                return None
+            fdc_ids = json.loads(row[0])
+            if not fdc_ids:
+                return []
+            placeholders = ",".join("?" * len(fdc_ids))
+            foods = {
+                r[0]: dict(zip(FOOD_FIELDS, r[1:]))
+                for r in self._conn.execute(
+                    f"SELECT fdc_id, {', '.join(FOOD_FIELDS)} FROM foods WHERE fdc_id IN ({placeholders})",
+                    fdc_ids
+                )
+            }
+        return [foods[fdc_id] for fdc_id in fdc_ids if fdc_id in foods]
+
+    def put_search(self, query: str, foods: List[Dict[str, Any]]) -> None:
+        """Store a search response: upsert each food, then the query's id list."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                UPSERT_FOOD,
+                [(f['fdc_id'], *(f[k] for k in FOOD_FIELDS), now) for f in foods]
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache (query, fdc_ids, fetched_at) VALUES (?, ?, ?)",
+                (query, json.dumps([f['fdc_id'] for f in foods]), now)
+            )
+
+    def bulk_upsert(self, rows: Iterable[Tuple], batch_size: int = 5000) -> int:
+        """
+        Insert or update many `(fdc_id, name, calories, protein, carbs, fat)`
+        tuples in a single transaction.
+
+        Returns:
+            int: Number of rows written
+        """
+        now = time.time()
+        count = 0
+        batch = []
+        with self._lock, self._conn:
+            for row in rows:
+                batch.append((*row, now))
+                if len(batch) >= batch_size:
+                    self._conn.executemany(UPSERT_FOOD, batch)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                self._conn.executemany(UPSERT_FOOD, batch)
+                count += len(batch)
+            if self.has_fts:
+                self._conn.execute("INSERT INTO foods_fts (foods_fts) VALUES ('optimize')")
+        return count
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Offline search over every stored food. Each word of the query matches
+        as a prefix; results are ranked by BM25, shorter names first on ties.
+        """
+        expression = fts_query(query)
+        if not expression:
+            return []
+        columns = ", ".join(f"f.{field}" for field in FOOD_FIELDS)
+        with self._lock:
+            if self.has_fts:
+                rows = self._conn.execute(
+                    f"SELECT {columns} FROM foods_fts JOIN foods f ON f.fdc_id = foods_fts.rowid "
+                    "WHERE foods_fts MATCH ? ORDER BY bm25(foods_fts), length(f.name) LIMIT ?",
+                    (expression, limit)
+                ).fetchall()
+            else:
+                terms = re.findall(r"\w+", query.lower())
+                conditions = " AND ".join("lower(f.name) LIKE ?" for _ in terms)
+                rows = self._conn.execute(
+                    f"SELECT {columns} FROM foods f WHERE {conditions} ORDER BY length(f.name) LIMIT ?",
+                    (*(f"%{term}%" for term in terms), limit)
+                ).fetchall()
+        return [dict(zip(FOOD_FIELDS, row)) for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM foods").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM search_cache")
+            self._conn.execute("DELETE FROM foods")
+
+    def close(self) -> None:
+        self._conn.close()
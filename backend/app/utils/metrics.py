@@ -0,0 +1,214 @@
+"""
+In-process request and hot-path metrics, exposed in the Prometheus text
+format at /metrics.
+
+- `MetricsMiddleware` times every request by route template and status,
+  and counts the DB queries it ran.
+- `timed(stage)` measures a named hot-path stage (JWT decode, bcrypt,
+  model inference, USDA round trip, ...), as a context manager or
+  decorator for sync and async functions.
+- `instrument_engine` hooks SQLAlchemy so queries and commits are counted
+  and timed without touching the code that issues them.
+- `register_collector` adds values kept elsewhere, such as cache and pool
+  stats, read only when /metrics is scraped: gauges, or counters of events
+  since start (named with a `_total` suffix).
+
+Recording is a lock-free list increment per observation, so it is cheap
+enough to leave on. Values are per process; with several workers, scrape
+each one or aggregate in Prometheus.
+"""
+import asyncio
+import contextvars
+import functools
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Seconds; roughly log-spaced from 0.5ms to 10s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series.setdefault(labels, [0] * (len(self.buckets) + 2))
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in sorted(self._series.items()):
+            base = _labels(self.labelnames, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f'{self.name}_bucket{{{base}{"," if base else ""}le="{bound}"}} {cumulative}'
+            cumulative += series[len(self.buckets)]
+            yield f'{self.name}_bucket{{{base}{"," if base else ""}le="+Inf"}} {cumulative}'
+            yield f"{self.name}_sum{{{base}}} {series[-1]}"
+            yield f"{self.name}_count{{{base}}} {cumulative}"
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+request_latency = Histogram(
+    "http_request_duration_seconds", "Request latency by route and status",
+    ("method", "route", "status"), LATENCY_BUCKETS
+)
+request_queries = Histogram(
+    "http_request_db_queries", "Database queries issued per request",
+    ("method", "route"), QUERY_COUNT_BUCKETS
+)
+stage_latency = Histogram(
+    "stage_duration_seconds", "Latency of instrumented hot-path stages",
+    ("stage",), LATENCY_BUCKETS
+)
+HISTOGRAMS = [request_latency, request_queries, stage_latency]
+
+COLLECTOR_KINDS = ("gauge", "counter")
+
+# (name, help, label names, callable returning {labels tuple or (): value}, kind)
+_collectors: List[Tuple[str, str, Tuple[str, ...], Callable[[], Dict[Tuple[str, ...], float]], str]] = []
+
+def register_collector(name: str, help: str, labelnames: Tuple[str, ...],
+                       collect: Callable[[], Dict[Tuple[str, ...], float]], kind: str = "gauge") -> None:
+    """
+    Expose values computed by `collect()` at scrape time as a gauge, or as a
+    counter when they only ever grow (the name must then end in `_total`).
+    """
+    if kind not in COLLECTOR_KINDS:
+        raise ValueError(f"Unknown metric kind: {kind}")
+    if kind == "counter" and not name.endswith("_total"):
+        raise ValueError(f"Counter {name} must be named with a _total suffix")
+    _collectors.append((name, help, labelnames, collect, kind))
+
+# Per-request query counter; a mutable cell so threads that copy the
+# context still count into the same request
+_request_queries: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar(
+    "request_queries", default=None
+)
+
+@contextmanager
+def timed(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_latency.observe(time.perf_counter() - started, stage)
+
+def timed_stage(stage: str):
+    """Decorator form of `timed`, for sync and async functions."""
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with timed(stage):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's execution context rather than the pooled
+    # connection, so a statement that raises (and never reaches
+    # after_cursor_execute) leaves nothing behind to skew later timings
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+    counter = _request_queries.get()
+    if counter is not None:
+        counter[0] += 1
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is not None:
+        stage_latency.observe(time.perf_counter() - started, "db_query")
+
+def _before_commit(session):
+    session.info["commit_started"] = time.perf_counter()
+
+def _after_commit(session):
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        stage_latency.observe(time.perf_counter() - started, "db_commit")
+
+def instrument_engine(engine) -> None:
+    """Count and time every query run through `engine` (a sync Engine)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+# Commit timing (flush included) for every session, sync or async
+event.listen(Session, "before_commit", _before_commit)
+event.listen(Session, "after_commit", _after_commit)
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no per-request task or body buffering) recording
+    latency and DB query count per route template, e.g. /api/food-log/{food_log_id}.
+    """
+
+    def __init__(self, app, exclude: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.exclude = set(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        status = ["500"]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        counter = [0]
+        token = _request_queries.set(counter)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_queries.reset(token)
+            route = scope.get("route")
+            # Unmatched paths share one label so scanners can't blow up cardinality
+            path = getattr(route, "path", "<unmatched>")
+            request_latency.observe(elapsed, scope["method"], path, status[0])
+            request_queries.observe(counter[0], scope["method"], path)
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    for name, help, labelnames, collect, kind in _collectors:
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(collect().items()):
+            base = _labels(labelnames, labels)
+            lines.append(f"{name}{{{base}}} {value}" if base else f"{name} {value}")
+    return "\n".join(lines) + "\n"
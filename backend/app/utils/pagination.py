@@ -0,0 +1,22 @@
+import base64
+from datetime import datetime
+from typing import Tuple
+
+def encode_cursor(logged_at: datetime, row_id: int) -> str:
+    """Encode the (logged_at, id) keyset position of a row as an opaque string."""
+    raw = f"{logged_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        logged_at, row_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(logged_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
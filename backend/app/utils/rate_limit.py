@@ -0,0 +1,215 @@
+"""
+Admission control for the expensive endpoints.
+
+- Per-client token buckets with a budget per route (`rate_limit`): a client
+  over budget gets 429 with Retry-After instead of taking a bcrypt, model
+  or USDA slot from everyone else.
+- A global cap on in-flight requests (`LoadShedMiddleware`): past it,
+  requests wait briefly for a slot and are then shed with 503 and
+  Retry-After rather than queueing without bound.
+
+Bucket state lives in a backend, in process memory by default. Set
+RATE_LIMIT_BACKEND to "module:Class" to share it between workers (e.g. a
+Redis implementation of `RateLimitBackend`).
+"""
+import asyncio
+import importlib
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse
+
+from .auth import get_current_user
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") not in ("0", "false", "False")
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+# Global in-flight cap; 0 disables shedding
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "256"))
+# How long a request over the cap may wait for a slot before it is shed
+CONCURRENCY_WAIT_TIMEOUT = float(os.getenv("CONCURRENCY_WAIT_TIMEOUT", "0.5"))
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+@dataclass(frozen=True)
+class Budget:
+    """`capacity` requests per `period` seconds, refilled continuously."""
+    capacity: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, value: str) -> "Budget":
+        """Parse "10/minute" (or second/hour)."""
+        count, _, unit = value.partition("/")
+        if unit not in PERIODS:
+            raise ValueError(f"Invalid rate limit {value!r}; expected e.g. '10/minute'")
+        return cls(int(count), PERIODS[unit])
+
+# Per-route budgets and what they are counted per; override with
+# RATE_LIMIT_<NAME>, e.g. RATE_LIMIT_SEARCH=120/minute
+ROUTE_BUDGETS: Dict[str, Tuple[str, str]] = {
+    "login": ("10/minute", "ip"),  # bcrypt verify
+    "register": ("5/minute", "ip"),  # bcrypt hash
+    "search": ("60/minute", "ip"),  # USDA API quota
+    "macro": ("30/minute", "user"),  # model inference
+}
+
+def _budget(name: str) -> Budget:
+    default, _ = ROUTE_BUDGETS[name]
+    return Budget.parse(os.getenv(f"RATE_LIMIT_{name.upper()}", default))
+
+class RateLimitBackend(ABC):
+    """Where bucket state is kept. Implementations must be safe to call concurrently."""
+
+    @abstractmethod
+    async def take(self, key: str, budget: Budget, cost: float = 1.0) -> float:
+        """
+        Take `cost` tokens from bucket `key` (created full). Returns 0 when
+        they were taken, otherwise the seconds until enough have refilled.
+        """
+
+class MemoryBackend(RateLimitBackend):
+    """
+    Buckets in this process, as (tokens, last refill) per key. The least
+    recently used keys are dropped past `max_keys`; a dropped bucket comes
+    back full, which only ever errs toward admitting.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, budget: Budget, cost: float = 1.0) -> float:
+        now = self.clock()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (budget.capacity, now))
+            tokens = min(budget.capacity, tokens + (now - updated) * budget.rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / budget.rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+def load_backend(spec: str) -> RateLimitBackend:
+    """"memory", or "package.module:Class" for a RateLimitBackend constructed without arguments."""
+    if spec == "memory":
+        return MemoryBackend()
+    module_name, _, class_name = spec.partition(":")
+    backend = getattr(importlib.import_module(module_name), class_name)()
+    if not isinstance(backend, RateLimitBackend):
+        raise TypeError(f"{spec} is not a RateLimitBackend")
+    return backend
+
+backend = load_backend(RATE_LIMIT_BACKEND)
+# 429s per route, and requests in flight / shed with 503, for /metrics
+rejected: Dict[str, int] = defaultdict(int)
+admission = {"in_flight": 0, "shed": 0}
+
+def client_ip(request: Request) -> str:
+    # Behind a proxy, run uvicorn with --proxy-headers so this is the real client
+    return request.client.host if request.client else "unknown"
+
+async def _check(name: str, budget: Budget, key: str) -> None:
+    if not RATE_LIMIT_ENABLED:
+        return
+    wait = await backend.take(f"{name}:{key}", budget)
+    if wait > 0:
+        rejected[name] += 1
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, please slow down",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+def rate_limit(name: str):
+    """
+    Dependency charging one request to the caller's bucket for `name` (see
+    ROUTE_BUDGETS), per client IP or per authenticated user. Add it to the
+    route's `dependencies` so it runs before the expensive work.
+    """
+    budget = _budget(name)
+    _, per = ROUTE_BUDGETS[name]
+
+    if per == "user":
+        async def check_user(request: Request, current_user=Depends(get_current_user)) -> None:
+            await _check(name, budget, f"user:{current_user.id}")
+        return check_user
+
+    async def check_ip(request: Request) -> None:
+        await _check(name, budget, f"ip:{client_ip(request)}")
+    return check_ip
+
+class LoadShedMiddleware:
+    """
+    Pure ASGI middleware admitting at most `limit` requests at once. Later
+    requests wait up to `wait_timeout` seconds for a slot, then get 503 with
+    Retry-After, so latency stays bounded under overload instead of growing
+    with the queue. Paths in `exclude` (health checks, /metrics) always pass.
+    """
+
+    def __init__(
+        self, app, limit: int = MAX_CONCURRENT_REQUESTS, wait_timeout: float = CONCURRENCY_WAIT_TIMEOUT,
+        exclude: Iterable[str] = ("/", "/metrics"),
+    ):
+        self.app = app
+        self.limit = limit
+        self.wait_timeout = wait_timeout
+        self.exclude = set(exclude)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Semaphores belong to the loop they were first used on
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.limit)
+        return self._slots
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.limit <= 0 or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+        slots = self._semaphore()
+        if slots.locked():
+            try:
+                await asyncio.wait_for(slots.acquire(), self.wait_timeout)
+            except asyncio.TimeoutError:
+                admission["shed"] += 1
+                response = JSONResponse(
+                    status_code=503,
+                    content={"detail": "Server is busy, please retry shortly"},
+                    headers={"Retry-After": "1"},
+                )
+                await response(scope, receive, send)
+                return
+        else:
+            await slots.acquire()
+        admission["in_flight"] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission["in_flight"] -= 1
+            slots.release()
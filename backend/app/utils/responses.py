@@ -0,0 +1,36 @@
+"""
+JSON responses rendered with orjson, and shortcuts for routes that build
+their payload from rows the server just read.
+
+Returning a Response from a route skips FastAPI's response_model round trip
+(validate, re-serialize with jsonable_encoder, then json.dumps). Routes keep
+`response_model` for the OpenAPI schema and return these for the hot paths.
+"""
+from typing import Dict, Iterable, Optional, Sequence
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # falls back to the standard library encoder
+    orjson = None
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse encoded with orjson when it is installed. Also serializes
+    datetimes, dates and NumPy values directly; NaN becomes null. Naive
+    datetimes are stored in UTC, so they are written with a Z offset.
+    """
+
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=(
+            orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+        ))
+
+def rows_response(
+    keys: Sequence[str], rows: Iterable[Sequence], headers: Optional[Dict[str, str]] = None
+) -> FastJSONResponse:
+    """A JSON array of objects from column tuples, in `keys` order."""
+    return FastJSONResponse([dict(zip(keys, row)) for row in rows], headers=headers)
@@ -0,0 +1,72 @@
+"""
+Per-user food log versions, used for conditional GETs and delta sync.
+
+Every insert, update or delete of a user's food logs bumps
+`users.food_log_version` in the same transaction. The write takes the
+user's row lock (the database lock on SQLite), so versions become visible
+in the order they were assigned, and a client that has synced up to N
+never misses a change numbered N or lower.
+"""
+import hashlib
+from typing import Optional, Tuple
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.user import User
+
+VERSION_HEADER = "X-Food-Log-Version"
+
+async def bump_food_log_version(db: AsyncSession, user_id: int) -> Tuple[int, str]:
+    """
+    Increment the user's food log version. Returns the new value and the
+    user's timezone, read under the same lock so the write's daily totals are
+    bucketed consistently with any concurrent timezone change. The caller
+    commits.
+    """
+    return tuple((await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(food_log_version=User.food_log_version + 1)
+        .returning(User.food_log_version, User.timezone)
+        .execution_options(synchronize_session=False)
+    )).one())
+
+async def get_food_log_version(db: AsyncSession, user_id: int) -> int:
+    return (await db.execute(
+        select(User.food_log_version).where(User.id == user_id)
+    )).scalar_one()
+
+def food_log_etag(request: Request, user_id: int, version: int) -> str:
+    """
+    ETag of the requested food log resource at `version`. Every route and
+    set of query parameters is a different resource, so the path and
+    parameters are hashed in: a listing's ETag never revalidates a summary,
+    or another page of the listing.
+    """
+    resource = f"{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+    digest = hashlib.blake2b(resource.encode(), digest_size=8).hexdigest()
+    # Weak: the same version may be sent gzip-compressed or not
+    return f'W/"fl-{user_id}-{version}-{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match lists `etag` (weak comparison) or is `*`."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+def set_version_headers(response: Response, version: int, etag: Optional[str] = None) -> None:
+    response.headers[VERSION_HEADER] = str(version)
+    if etag is not None:
+        response.headers["ETag"] = etag
+        # Cache privately, but revalidate every time; the answer is usually a 304
+        response.headers["Cache-Control"] = "private, no-cache"
+
+def not_modified(version: int, etag: str) -> Response:
+    response = Response(status_code=304)
+    set_version_headers(response, version, etag)
+    return response
@@ -1,28 +1,84 @@
+import asyncio
 import os
+import threading
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 
+from .cache import TTLCache
+from .food_store import FoodStore, DEFAULT_PATH, FOOD_FIELDS
+from .metrics import timed
+from .usda_client import AsyncUSDAClient
+
 load_dotenv()
 
 USDA_API_KEY = os.getenv('USDA_API_KEY')
-USDA_API_URL = 'https://api.nal.usda.gov/fdc/v1/foods/search'
+# Overridable so tests and benchmarks can point at a local stand-in
+USDA_API_URL = os.getenv('USDA_API_URL', 'https://api.nal.usda.gov/fdc/v1/foods/search')
 
-def search_foods(query: str) -> List[Dict[str, Any]]:
-    """
-    Search for foods using the USDA FoodData Central API.
-    
-    Args:
-        query (str): The search query (e.g., "apple")
-        
-    Returns:
-        List[Dict[str, Any]]: List of simplified food items with nutritional information
-    """
-    if not USDA_API_KEY:
-        raise ValueError("USDA_API_KEY environment variable is not set")
+# Upstream connection settings
+USDA_TIMEOUT = float(os.getenv('USDA_TIMEOUT', '10'))
+USDA_CONNECT_TIMEOUT = float(os.getenv('USDA_CONNECT_TIMEOUT', '3'))
+USDA_MAX_CONNECTIONS = int(os.getenv('USDA_MAX_CONNECTIONS', '20'))
+USDA_MAX_CONCURRENCY = int(os.getenv('USDA_MAX_CONCURRENCY', '10'))
+
+# Cache settings
+USDA_CACHE_PATH = os.getenv('USDA_CACHE_PATH', DEFAULT_PATH)
+USDA_CACHE_SIZE = int(os.getenv('USDA_CACHE_SIZE', '1024'))
+USDA_CACHE_TTL = float(os.getenv('USDA_CACHE_TTL', str(60 * 60 * 24)))
+USDA_STORE_TTL = float(os.getenv('USDA_STORE_TTL', str(60 * 60 * 24 * 30)))
+
+# "remote" queries FoodData Central (through the caches); "local" only
+# searches foods imported with app.services.import_foods
+USDA_SEARCH_MODE = os.getenv('USDA_SEARCH_MODE', 'remote')
+
+search_cache = TTLCache(maxsize=USDA_CACHE_SIZE, ttl=USDA_CACHE_TTL)
+store_stats = {"hits": 0, "misses": 0}
 
-    params = {
-        'api_key': USDA_API_KEY,
+usda_client = AsyncUSDAClient(
+    USDA_API_URL,
+    USDA_API_KEY,
+    timeout=USDA_TIMEOUT,
+    connect_timeout=USDA_CONNECT_TIMEOUT,
+    max_connections=USDA_MAX_CONNECTIONS,
+    max_concurrency=USDA_MAX_CONCURRENCY,
+)
+_session = requests.Session()
+
+_store: Optional[FoodStore] = None
+_store_lock = threading.Lock()
+
+def get_food_store() -> FoodStore:
+    """Open the persistent food store on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = FoodStore(USDA_CACHE_PATH)
+    return _store
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive cache key for a search query."""
+    return " ".join(query.lower().split())
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters for the cache layers and upstream call counts."""
+    return {"memory": search_cache.stats(), "store": dict(store_stats), "upstream": usda_client.stats()}
+
+def parse_food(food: Dict[str, Any]) -> Dict[str, Any]:
+    """Simplify one FoodData Central search hit to our nutrient fields."""
+    nutrients = {item['nutrientName']: item['value'] for item in food.get('foodNutrients', [])}
+    return {
+        'fdc_id': food.get('fdcId'),
+        'name': food.get('description', ''),
+        'calories': nutrients.get('Energy', 0),
+        'protein': nutrients.get('Protein', 0),
+        'carbs': nutrients.get('Carbohydrate, by difference', 0),
+        'fat': nutrients.get('Total lipid (fat)', 0)
+    }
+
+def search_params(query: str) -> Dict[str, Any]:
+    return {
         'query': query,
         'pageSize': 10,
         'dataType': ['Survey (FNDDS)'],
@@ -30,27 +86,121 @@ def search_foods(query: str) -> List[Dict[str, Any]]:
         'sortOrder': 'asc'
     }
 
+def fetch_foods(query: str) -> List[Dict[str, Any]]:
+    """
+    Query the USDA FoodData Central API directly, bypassing all caches.
+
+    Returns:
+        List[Dict[str, Any]]: Parsed food items, including their `fdc_id`
+    """
+    if not USDA_API_KEY:
+        raise ValueError("USDA_API_KEY environment variable is not set")
+
+    params = {'api_key': USDA_API_KEY, **search_params(query)}
+
     try:
-        response = requests.get(USDA_API_URL, params=params)
+        with timed("usda_request"):
+            response = _session.get(USDA_API_URL, params=params, timeout=(USDA_CONNECT_TIMEOUT, USDA_TIMEOUT))
         response.raise_for_status()
         data = response.json()
-
-        foods = []
-        for food in data.get('foods', []):
-            # Extract nutrients
-            nutrients = {item['nutrientName']: item['value'] for item in food.get('foodNutrients', [])}
-            
-            # Create simplified food item
-            food_item = {
-                'name': food.get('description', ''),
-                'calories': nutrients.get('Energy', 0),
-                'protein': nutrients.get('Protein', 0),
-                'carbs': nutrients.get('Carbohydrate, by difference', 0),
-                'fat': nutrients.get('Total lipid (fat)', 0)
-            }
-            foods.append(food_item)
-
-        return foods
+        return [parse_food(food) for food in data.get('foods', [])]
 
     except requests.exceptions.RequestException as e:
-        raise Exception(f"Error fetching data from USDA API: {str(e)}") 
\ No newline at end of file
+        raise Exception(f"Error fetching data from USDA API: {str(e)}")
+
+def search_local(query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Search only the local food store (bulk imports plus past API results)."""
+    key = ("local", normalize_query(query))
+    foods = search_cache.get(key)
+    if foods is None:
+        foods = get_food_store().search(key[1], limit)
+        search_cache.set(key, foods)
+    return [dict(food) for food in foods]
+
+def search_foods(query: str, mode: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Search for foods using the USDA FoodData Central API.
+
+    In "remote" mode results are served from an in-process LRU first, then
+    from the persistent local store, and only fetched from the API on a miss
+    in both; if the API call fails, matching local foods are returned instead.
+    In "local" mode the API is never contacted.
+
+    Args:
+        query (str): The search query (e.g., "apple")
+        mode (str): "remote" or "local"; defaults to USDA_SEARCH_MODE
+
+    Returns:
+        List[Dict[str, Any]]: List of simplified food items with nutritional information
+    """
+    mode = mode or USDA_SEARCH_MODE
+    if mode == "local":
+        return search_local(query)
+    if mode != "remote":
+        raise ValueError(f"Unknown search mode: {mode}")
+
+    key = normalize_query(query)
+    foods = search_cache.get(key)
+
+    if foods is None:
+        store = get_food_store()
+        foods = store.get_search(key, USDA_STORE_TTL)
+        if foods is not None:
+            store_stats["hits"] += 1
+        else:
+            store_stats["misses"] += 1
+            try:
+                fetched = fetch_foods(key)
+            except Exception:
+                fallback = search_local(key)
+                if fallback:
+                    return fallback
+                raise
+            store.put_search(key, [food for food in fetched if food['fdc_id'] is not None])
+            foods = [{k: food[k] for k in FOOD_FIELDS} for food in fetched]
+        search_cache.set(key, foods)
+
+    # Callers get their own copies so cached entries can't be mutated
+    return [dict(food) for food in foods]
+
+async def _load_remote(key: str) -> List[Dict[str, Any]]:
+    """Async miss path of `search_foods_async`: store, then the API."""
+    store = get_food_store()
+    foods = await asyncio.to_thread(store.get_search, key, USDA_STORE_TTL)
+    if foods is not None:
+        store_stats["hits"] += 1
+    else:
+        store_stats["misses"] += 1
+        try:
+            data = await usda_client.get(search_params(key))
+        except Exception:
+            fallback = await asyncio.to_thread(search_local, key)
+            if fallback:
+                return fallback
+            raise
+        fetched = [parse_food(food) for food in data.get('foods', [])]
+        await asyncio.to_thread(
+            store.put_search, key, [food for food in fetched if food['fdc_id'] is not None]
+        )
+        foods = [{k: food[k] for k in FOOD_FIELDS} for food in fetched]
+    search_cache.set(key, foods)
+    return foods
+
+async def search_foods_async(query: str, mode: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Non-blocking `search_foods` for use inside async routes.
+
+    Upstream calls go through the shared `usda_client` pool, and concurrent
+    searches for the same normalized query share one upstream call.
+    """
+    mode = mode or USDA_SEARCH_MODE
+    if mode == "local":
+        return await asyncio.to_thread(search_local, query)
+    if mode != "remote":
+        raise ValueError(f"Unknown search mode: {mode}")
+
+    key = normalize_query(query)
+    foods = search_cache.get(key)
+    if foods is None:
+        foods = await usda_client.coalesce(key, lambda: _load_remote(key))
+    return [dict(food) for food in foods]
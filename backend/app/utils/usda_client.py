@@ -0,0 +1,102 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from .metrics import timed
+
+class AsyncUSDAClient:
+    """
+    Non-blocking FoodData Central client.
+
+    One keep-alive connection pool is shared by every request, at most
+    `max_concurrency` upstream calls run at once, and concurrent callers asking
+    for the same key share a single in-flight call (see `coalesce`).
+
+    The pool, semaphore and in-flight table belong to the event loop they were
+    created on and are rebuilt transparently if used from a different loop.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        api_key: Optional[str],
+        timeout: float = 10.0,
+        connect_timeout: float = 3.0,
+        max_connections: int = 20,
+        max_concurrency: int = 10,
+    ):
+        self.url = url
+        self.api_key = api_key
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections
+        )
+        self.max_concurrency = max_concurrency
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[Any, asyncio.Future] = {}
+
+    def _bind(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._inflight = {}
+
+    async def get(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Call the search endpoint and return its decoded JSON body.
+
+        Raises:
+            ValueError: If no API key is configured
+            Exception: If the request fails or returns an error status
+        """
+        if not self.api_key:
+            raise ValueError("USDA_API_KEY environment variable is not set")
+        self._bind()
+        async with self._semaphore:
+            self.upstream_calls += 1
+            try:
+                with timed("usda_request"):
+                    response = await self._client.get(self.url, params={'api_key': self.api_key, **params})
+                response.raise_for_status()
+                return response.json()
+            except httpx.HTTPError as e:
+                raise Exception(f"Error fetching data from USDA API: {str(e)}")
+
+    async def coalesce(self, key: Any, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `factory()` for `key` unless a call for the same key is already in
+        flight, in which case wait for and share its result (or exception).
+        """
+        self._bind()
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(factory())
+        self._inflight[key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
+
+    async def aclose(self) -> None:
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
@@ -0,0 +1,62 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+class PoolBusy(Exception):
+    """Raised when a bounded pool cannot accept more work in time."""
+
+    def __init__(self, name: str, retry_after: int = 1):
+        super().__init__(f"{name} pool is busy")
+        self.retry_after = retry_after
+
+class BoundedWorkerPool:
+    """
+    Dedicated thread pool for CPU-heavy calls made from async code.
+
+    At most `max_pending` calls may be running or queued. Further callers wait
+    up to `wait_timeout` seconds for a slot and then get `PoolBusy`, so a burst
+    is shed instead of growing an unbounded queue. Work runs outside the
+    shared server threadpool, so other endpoints keep their threads.
+
+    Suited to functions that release the GIL (bcrypt, NumPy); the slot
+    semaphore belongs to the event loop it was created on and is rebuilt
+    transparently for a different loop.
+    """
+
+    def __init__(self, name: str, workers: int, max_pending: int, wait_timeout: float = 2.0):
+        self.name = name
+        self.workers = workers
+        self.max_pending = max(max_pending, workers)
+        self.wait_timeout = wait_timeout
+        self.completed = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _bind(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_pending)
+        return loop
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        loop = self._bind()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.wait_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise PoolBusy(self.name)
+        try:
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self._slots.release()
+            self.completed += 1
+
+    def stats(self) -> Dict[str, int]:
+        in_use = 0 if self._slots is None else self.max_pending - self._slots._value
+        return {"in_use": in_use, "completed": self.completed, "rejected": self.rejected}
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,72 @@
+"""
+Micro-benchmark for the per-request cost of `get_current_user` with and
+without the token/user caches.
+
+Usage (from backend/):
+    python -m benchmarks.bench_auth [--users 1000] [--requests 5000]
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.common import configure, migrate
+
+configure("bench_auth")
+
+from app.database import SessionLocal
+from app.models import food_log, macro  # noqa: F401 (register mappers)
+from app.models.user import User
+from app.utils import auth
+
+def seed(count: int) -> list:
+    migrate()
+    db = SessionLocal()
+    try:
+        db.query(User).delete()
+        db.bulk_save_objects([
+            User(
+                username=f"user{i}", email=f"user{i}@example.com", hashed_password="x",
+                age=30, gender="male", weight=80.0, height=180.0,
+                activity_level="moderate", fitness_goal="maintain"
+            )
+            for i in range(count)
+        ])
+        db.commit()
+    finally:
+        db.close()
+    return [auth.create_access_token({"sub": f"user{i}"}) for i in range(count)]
+
+def run(tokens: list, requests: int, cached: bool) -> float:
+    """Average microseconds per `get_current_user` call."""
+    rng = random.Random(0)
+    picks = [rng.choice(tokens) for _ in range(requests)]
+
+    async def loop(db) -> float:
+        start = time.perf_counter()
+        for token in picks:
+            if not cached:
+                auth.token_cache.clear()
+                auth.user_cache.clear()
+            await auth.get_current_user(token, db)
+        return time.perf_counter() - start
+
+    db = SessionLocal()
+    try:
+        return asyncio.run(loop(db)) / requests * 1e6
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    tokens = seed(args.users)
+    uncached = run(tokens, args.requests, cached=False)
+    run(tokens, args.requests, cached=True)  # warm the caches
+    cached = run(tokens, args.requests, cached=True)
+    print(f"get_current_user uncached: {uncached:8.1f} µs/request")
+    print(f"get_current_user cached:   {cached:8.1f} µs/request")
+    print(f"saved per request:         {uncached - cached:8.1f} µs ({uncached / cached:.1f}x)")
@@ -0,0 +1,64 @@
+"""
+Throughput of logging N foods one POST /api/food-log at a time versus a single
+POST /api/food-log/bulk (JSON array and NDJSON).
+
+Usage (from backend/):
+    python -m benchmarks.bench_bulk [--items 1000]
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import configure, migrate
+
+configure("bench_bulk")
+
+import httpx
+
+from app.main import app
+
+def make_items(count: int) -> list:
+    return [
+        {"food_name": f"food {i}", "calories": 100 + i % 50, "protein": 10, "carbs": 20, "fat": 5, "grams": 100}
+        for i in range(count)
+    ]
+
+async def main(count: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/register", json={
+            "username": "bench", "email": "bench@example.com", "password": "bench-password",
+            "age": 30, "gender": "male", "weight": 80, "height": 180,
+            "activity_level": "moderate", "fitness_goal": "maintain",
+        })
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        items = make_items(count)
+
+        start = time.perf_counter()
+        for item in items:
+            (await client.post("/api/food-log", json=item, headers=headers)).raise_for_status()
+        per_item = time.perf_counter() - start
+
+        start = time.perf_counter()
+        (await client.post("/api/food-log/bulk", json=items, headers=headers)).raise_for_status()
+        bulk_json = time.perf_counter() - start
+
+        body = "\n".join(json.dumps(item) for item in items)
+        start = time.perf_counter()
+        (await client.post(
+            "/api/food-log/bulk", content=body,
+            headers={**headers, "Content-Type": "application/x-ndjson"}
+        )).raise_for_status()
+        bulk_ndjson = time.perf_counter() - start
+
+    for name, seconds in (("per-item", per_item), ("bulk JSON", bulk_json), ("bulk NDJSON", bulk_ndjson)):
+        print(f"{name:12} {seconds * 1000:9.1f} ms  {count / seconds:10.0f} rows/s")
+    print(f"bulk JSON speedup: {per_item / bulk_json:.0f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000)
+    args = parser.parse_args()
+    migrate()
+    asyncio.run(main(args.items))
@@ -0,0 +1,91 @@
+"""
+Load benchmark for /token: fires concurrent logins at the ASGI app and
+reports login throughput plus the latency of a cheap endpoint (`/`) served
+meanwhile, which shows whether hashing stalls the rest of the server.
+
+Usage (from backend/):
+    python -m benchmarks.bench_login [--users 50] [--logins 100] [--concurrency 16]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.common import configure, migrate, percentile
+
+# Production bcrypt cost unless BCRYPT_ROUNDS says otherwise
+configure("bench_login", BCRYPT_ROUNDS="12")
+
+import httpx
+
+from app.main import app
+from app.database import SessionLocal
+from app.models.user import User
+from app.utils.auth import get_password_hash, hash_pool
+
+PASSWORD = "correct horse battery staple"
+
+def seed(count: int) -> None:
+    migrate()
+    hashed = get_password_hash(PASSWORD)
+    db = SessionLocal()
+    try:
+        db.query(User).delete()
+        db.bulk_save_objects([
+            User(
+                username=f"user{i}", email=f"user{i}@example.com", hashed_password=hashed,
+                age=30, gender="male", weight=80.0, height=180.0,
+                activity_level="moderate", fitness_goal="maintain"
+            )
+            for i in range(count)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+async def main(users: int, logins: int, concurrency: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        semaphore = asyncio.Semaphore(concurrency)
+        login_times, statuses = [], []
+
+        async def login(i: int) -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/token", data={"username": f"user{i % users}@example.com", "password": PASSWORD}
+                )
+                login_times.append(time.perf_counter() - start)
+                statuses.append(response.status_code)
+
+        async def probe(stop: asyncio.Event, samples: list) -> None:
+            while not stop.is_set():
+                start = time.perf_counter()
+                await client.get("/")
+                samples.append(time.perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        stop, probe_times = asyncio.Event(), []
+        probe_task = asyncio.create_task(probe(stop, probe_times))
+        start = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(logins)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe_task
+
+    ok = statuses.count(200)
+    print(f"workers={hash_pool.workers} max_pending={hash_pool.max_pending} concurrency={concurrency}")
+    print(f"logins: {ok}/{logins} ok, {statuses.count(503)} shed (503), {ok / elapsed:.1f} logins/s")
+    print(f"login latency   p50={percentile(login_times, 0.5):7.1f} ms  p95={percentile(login_times, 0.95):7.1f} ms")
+    print(f"GET / latency   p50={percentile(probe_times, 0.5):7.1f} ms  p95={percentile(probe_times, 0.95):7.1f} ms"
+          f"  (mean {statistics.mean(probe_times) * 1000:.1f} ms)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    seed(args.users)
+    asyncio.run(main(args.users, args.logins, args.concurrency))
@@ -0,0 +1,88 @@
+"""
+Compare the sklearn pickle with the compiled NumPy forest: cold-start time and
+peak RSS of a fresh process that loads the model and predicts once, per-call
+latency for single and batched predictions, and the largest prediction
+difference between the two.
+
+Usage (from backend/, after exporting the compiled model):
+    python -m benchmarks.bench_model [--batch 1000] [--repeat 50]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from app.services.macros import model_path, compiled_model_path
+
+COLD_START = {
+    "pickle": (
+        "import joblib, numpy as np\n"
+        "m = joblib.load({path!r})\n"
+        "m.predict(np.array([[30, 1, 80.0, 180.0]]))\n"
+    ),
+    "compiled": (
+        "import numpy as np\n"
+        "from app.services.forest import CompiledForest\n"
+        "m = CompiledForest({path!r})\n"
+        "m.predict(np.array([[30, 1, 80.0, 180.0]]))\n"
+    ),
+}
+
+# Peak RSS comes from VmHWM: ru_maxrss survives exec on Linux and would
+# report the (larger) benchmark parent instead
+PROBE = (
+    "import json, time, warnings\n"
+    "warnings.simplefilter('ignore')\n"
+    "start = time.perf_counter()\n"
+    "{body}"
+    "seconds = time.perf_counter() - start\n"
+    "hwm = [l for l in open('/proc/self/status') if l.startswith('VmHWM')][0]\n"
+    "print(json.dumps({{'seconds': seconds, 'rss_mb': int(hwm.split()[1]) / 1024}}))\n"
+)
+
+def cold_start(kind: str, path: str) -> dict:
+    code = PROBE.format(body=COLD_START[kind].format(path=path))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def latency_ms(fn, X: np.ndarray, repeat: int) -> float:
+    fn(X)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(X)
+    return (time.perf_counter() - start) / repeat * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    import joblib
+    from app.services.forest import CompiledForest
+
+    warnings.simplefilter("ignore")
+    models = {"pickle": joblib.load(model_path), "compiled": CompiledForest(compiled_model_path)}
+    paths = {"pickle": model_path, "compiled": compiled_model_path}
+
+    rng = np.random.default_rng(0)
+    X = np.column_stack([
+        rng.integers(18, 80, args.batch),
+        rng.integers(1, 3, args.batch),
+        rng.uniform(45, 130, args.batch).round(1),
+        rng.uniform(145, 200, args.batch).round(1),
+    ])
+
+    print(f"{'':10} {'cold start':>11} {'peak RSS':>10} {'1 row':>10} {f'{args.batch} rows':>11}")
+    for kind, model in models.items():
+        cold = cold_start(kind, paths[kind])
+        single = latency_ms(model.predict, X[:1], args.repeat)
+        batch = latency_ms(model.predict, X, max(1, args.repeat // 10))
+        print(f"{kind:10} {cold['seconds'] * 1000:9.0f}ms {cold['rss_mb']:8.0f}MB {single:8.2f}ms {batch:9.2f}ms")
+
+    diff = np.abs(models["pickle"].predict(X) - models["compiled"].predict(X)).max()
+    print(f"max |pickle - compiled| = {diff:.3e}")
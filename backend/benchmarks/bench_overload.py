@@ -0,0 +1,146 @@
+"""
+Overload benchmark: a few clients send POST /token (bcrypt) at a fixed
+rate, far past both their budget and what the CPU can hash, while a
+well-behaved client polls GET /me; once with admission control off and once
+with it on. Reports p50/p95/p99 for logins that were served, for those
+turned away (429 from the rate limiter, 503 from the concurrency cap or the
+bcrypt pool), and for the well-behaved client.
+
+Logins are sent open loop, on a schedule rather than after the previous
+response, as clients that don't back off do. Each mode runs in a fresh
+process, since the limits are read from the environment at import time.
+
+Usage (from backend/):
+    python -m benchmarks.bench_overload [--attackers 4] [--rate 40] [--duration 15]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from benchmarks.common import BACKEND_DIR, configure, migrate, save_results, summarize
+
+# Production bcrypt cost, so a login really is expensive
+configure("bench_overload", BCRYPT_ROUNDS="12")
+
+PASSWORD = "correct horse battery staple"
+
+MODES = {
+    "unlimited": {"RATE_LIMIT_ENABLED": "0", "MAX_CONCURRENT_REQUESTS": "0"},
+    "limited": {"RATE_LIMIT_ENABLED": "1"},
+}
+
+def seed(count: int) -> None:
+    from app.database import SessionLocal
+    from app.models.user import User
+    from app.utils.auth import get_password_hash
+
+    migrate()
+    hashed = get_password_hash(PASSWORD)
+    db = SessionLocal()
+    try:
+        db.query(User).delete()
+        db.bulk_save_objects([
+            User(
+                username=f"user{i}", email=f"user{i}@example.com", hashed_password=hashed,
+                age=30, gender="male", weight=80.0, height=180.0,
+                activity_level="moderate", fitness_goal="maintain"
+            )
+            for i in range(count)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+async def run(attackers: int, rate: float, duration: float) -> Dict:
+    import httpx
+
+    from app.main import app
+    from app.utils.auth import create_access_token
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    deadline = time.perf_counter() + duration
+
+    async def login(client: "httpx.AsyncClient", user: int) -> None:
+        started = time.perf_counter()
+        response = await client.post(
+            "/token", data={"username": f"user{user}@example.com", "password": PASSWORD}
+        )
+        outcome = "login_ok" if response.status_code == 200 else f"login_{response.status_code}"
+        latencies[outcome].append(time.perf_counter() - started)
+
+    async def attack() -> None:
+        # Round robin over the attacker addresses, `rate` logins per second in all
+        sent, tasks, begin = 0, [], time.perf_counter()
+        while time.perf_counter() < deadline:
+            tasks.append(asyncio.create_task(login(clients[sent % attackers], sent % attackers)))
+            sent += 1
+            await asyncio.sleep(max(0.0, begin + sent / rate - time.perf_counter()))
+        await asyncio.gather(*tasks)
+
+    async def bystander(client: "httpx.AsyncClient") -> None:
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': 'user0'})}"}
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.get("/me", headers=headers)
+            outcome = "me_ok" if response.status_code == 200 else f"me_{response.status_code}"
+            latencies[outcome].append(time.perf_counter() - started)
+            await asyncio.sleep(0.05)
+
+    # One address per attacker, and another for the bystander
+    clients = [
+        httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app, client=(f"10.0.0.{i + 1}", 1234)),
+            base_url="http://bench", timeout=60
+        )
+        for i in range(attackers + 1)
+    ]
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(bystander(clients[-1]), attack())
+    finally:
+        for client in clients:
+            await client.aclose()
+    elapsed = time.perf_counter() - started
+    return {outcome: summarize(values, elapsed) for outcome, values in sorted(latencies.items())}
+
+def run_mode(mode: str, args) -> Dict:
+    env = {**os.environ, **MODES[mode]}
+    if mode == "limited":
+        env.setdefault("MAX_CONCURRENT_REQUESTS", str(args.max_concurrent))
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_overload", "--only", mode, "--attackers", str(args.attackers),
+         "--rate", str(args.rate), "--duration", str(args.duration)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--attackers", type=int, default=4, help="Client addresses sending logins")
+    parser.add_argument("--rate", type=float, default=40, help="Logins per second across attackers")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds per mode")
+    parser.add_argument("--max-concurrent", type=int, default=64, help="MAX_CONCURRENT_REQUESTS in the limited mode")
+    parser.add_argument("--only", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.only:
+        # Child process: run one mode and print its results as the last line
+        seed(args.attackers)
+        print(json.dumps(asyncio.run(run(args.attackers, args.rate, args.duration))))
+        sys.exit(0)
+
+    results = {}
+    for mode in MODES:
+        for outcome, summary in run_mode(mode, args).items():
+            results[f"{mode} {outcome}"] = summary
+
+    print(f"\n{'mode / outcome':26} {'count':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, r in results.items():
+        print(f"{name:26} {r['count']:7} {r['rps']:8.1f} {r['p50_ms']:9.1f} {r['p95_ms']:9.1f} {r['p99_ms']:9.1f}")
+    save_results("overload", results, vars(args))
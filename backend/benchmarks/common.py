@@ -0,0 +1,118 @@
+"""
+Shared setup for the benchmarks: environment defaults, schema migration,
+latency summaries, and saving results so runs can be compared.
+
+Import this before anything from `app`, since app modules read their
+configuration from the environment at import time.
+"""
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+def configure(name: str, **overrides: str) -> None:
+    """
+    Default the app's settings for a benchmark run: a throwaway SQLite
+    database, a fixed JWT secret, cheap bcrypt and no per-client rate
+    limits (every request comes from one address) unless overridden.
+    """
+    defaults = {
+        "DATABASE_URL": f"sqlite:///{tempfile.mkdtemp()}/{name}.db",
+        "SECRET_KEY": "benchmark-secret",
+        "ALGORITHM": "HS256",
+        "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+        "BCRYPT_ROUNDS": "4",
+        "RATE_LIMIT_ENABLED": "0",
+        **overrides,
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+
+def migrate() -> None:
+    """Bring the DATABASE_URL database up to the current schema."""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    command.upgrade(config, "head")
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of seconds, in milliseconds."""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))] * 1000
+
+def summarize(latencies: List[float], elapsed: Optional[float] = None) -> Dict[str, float]:
+    """p50/p95/p99 (ms) of a list of latencies in seconds, plus throughput."""
+    summary = {
+        "count": len(latencies),
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+    }
+    if elapsed:
+        summary["rps"] = len(latencies) / elapsed
+    return summary
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def save_results(name: str, results: Dict, config: Dict) -> str:
+    """
+    Write results to benchmarks/results/<name>-<timestamp>.json, print how
+    they compare with the previous run of the same benchmark, and return the
+    path.
+    """
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    previous = latest_results(name)
+    path = os.path.join(RESULTS_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w") as f:
+        json.dump({
+            "name": name,
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "config": config,
+            "results": results,
+        }, f, indent=2)
+    print(f"\nResults saved to {os.path.relpath(path, BACKEND_DIR)}")
+    if previous is not None:
+        compare(previous, results)
+    return path
+
+def latest_results(name: str) -> Optional[Dict]:
+    if not os.path.isdir(RESULTS_DIR):
+        return None
+    runs = sorted(f for f in os.listdir(RESULTS_DIR) if f.startswith(f"{name}-") and f.endswith(".json"))
+    if not runs:
+        return None
+    with open(os.path.join(RESULTS_DIR, runs[-1])) as f:
+        return json.load(f)
+
+def compare(previous: Dict, results: Dict) -> None:
+    """Print the change in each shared metric against a previous run."""
+    print(f"Compared with {previous.get('revision') or 'previous run'}:")
+    for key, current in results.items():
+        before = previous["results"].get(key)
+        if not isinstance(current, dict) or not isinstance(before, dict):
+            continue
+        changes = []
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "rps", "bytes_per_request", "server_cpu_ms_per_request"):
+            if metric in current and before.get(metric):
+                delta = (current[metric] - before[metric]) / before[metric] * 100
+                changes.append(f"{metric} {delta:+.1f}%")
+        if changes:
+            print(f"  {key:28} {'  '.join(changes)}")
@@ -0,0 +1,60 @@
+"""
+Local stand-in for the FoodData Central search API, so load tests exercise
+the USDA path without network calls, quota or noise from the real service.
+
+Responses are deterministic per query and mimic the real payload shape;
+`--latency` adds a fixed upstream delay.
+
+Usage (from backend/):
+    python -m benchmarks.fake_usda [--port 8765] [--latency 80]
+    USDA_API_URL=http://127.0.0.1:8765/fdc/v1/foods/search USDA_API_KEY=x uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import hashlib
+
+from fastapi import FastAPI
+
+app = FastAPI(title="Fake FoodData Central")
+app.state.latency = 0.0
+app.state.calls = 0
+
+NUTRIENTS = ("Energy", "Protein", "Carbohydrate, by difference", "Total lipid (fat)")
+
+def fake_foods(query: str, page_size: int):
+    seed = int(hashlib.sha256(query.encode()).hexdigest()[:8], 16)
+    foods = []
+    for i in range(page_size):
+        value = (seed >> (i % 16)) % 400
+        foods.append({
+            "fdcId": seed % 1_000_000 * 100 + i,
+            "description": f"{query.upper()}, variety {i}",
+            "foodNutrients": [
+                {"nutrientName": name, "value": round(value / (k + 1), 2)}
+                for k, name in enumerate(NUTRIENTS)
+            ],
+        })
+    return foods
+
+@app.get("/fdc/v1/foods/search")
+async def search(query: str = "", pageSize: int = 10, api_key: str = ""):
+    app.state.calls += 1
+    if app.state.latency:
+        await asyncio.sleep(app.state.latency)
+    return {"totalHits": pageSize, "foods": fake_foods(query, pageSize)}
+
+@app.get("/stats")
+async def stats():
+    return {"calls": app.state.calls}
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake USDA FoodData Central search API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=80, help="Added delay per call, in ms")
+    args = parser.parse_args()
+
+    app.state.latency = args.latency / 1000
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
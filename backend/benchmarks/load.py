@@ -0,0 +1,262 @@
+"""
+Load test: drive the API over HTTP with a weighted mix of requests from
+many seeded users, and report p50/p95/p99 latency and requests/sec per
+endpoint, plus response bytes on the wire (after gzip/brotli, per
+--accept-encoding) and, for a single-worker server started here, server CPU
+time per request. Results are saved under benchmarks/results/ and compared
+with the previous run.
+
+By default this starts the fake USDA API and a uvicorn server on the seeded
+database (see benchmarks.seed), then tears both down. Use --url to target a
+server that is already running instead.
+
+Usage (from backend/):
+    python -m benchmarks.seed
+    python -m benchmarks.load [--concurrency 32] [--duration 30] [--workers 1] [--accept-encoding identity]
+"""
+import argparse
+import asyncio
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, List, Tuple
+
+import httpx
+from jose import jwt
+
+from benchmarks.common import BACKEND_DIR, save_results, summarize
+from benchmarks.seed import DEFAULT_DATABASE_URL, FOODS, PASSWORD
+
+SECRET_KEY = "benchmark-secret"
+ALGORITHM = "HS256"
+SEARCH_TERMS = ["apple", "banana", "chicken", "rice", "oat", "egg", "yogurt", "salmon",
+                "almond", "bread", "pasta", "beef", "milk", "cheese", "broccoli", "peanut"]
+
+def token_for(username: str) -> str:
+    """Mint a token directly, as /token would, so the run isn't dominated by bcrypt."""
+    expire = datetime.utcnow() + timedelta(hours=2)
+    return jwt.encode({"sub": username, "exp": expire}, SECRET_KEY, algorithm=ALGORITHM)
+
+# Each scenario: (name, weight, request factory)
+Request = Tuple[str, str, Dict]
+
+def list_food_log(rng: random.Random) -> Request:
+    return "GET", "/api/food-log", {"params": {"limit": 50}}
+
+def list_food_log_today(rng: random.Random) -> Request:
+    start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return "GET", "/api/food-log", {"params": {"from": start.isoformat()}}
+
+def summary_week(rng: random.Random) -> Request:
+    end = date.today()
+    return "GET", "/api/food-log/summary", {"params": {"start": str(end - timedelta(days=6)), "end": str(end)}}
+
+def create_food_log(rng: random.Random) -> Request:
+    name, calories, protein, carbs, fat = rng.choice(FOODS)
+    return "POST", "/api/food-log", {"json": {
+        "food_name": name, "calories": calories, "protein": protein, "carbs": carbs, "fat": fat, "grams": 100,
+    }}
+
+def macro(rng: random.Random) -> Request:
+    return "POST", "/macro", {}
+
+def search_foods(rng: random.Random) -> Request:
+    return "GET", "/api/search-foods", {"params": {"query": rng.choice(SEARCH_TERMS)}}
+
+def quick_add(rng: random.Random) -> Request:
+    return "GET", "/api/food-log/quick-add", {}
+
+def trends(rng: random.Random) -> Request:
+    return "GET", "/api/food-log/trends", {}
+
+def me(rng: random.Random) -> Request:
+    return "GET", "/me", {}
+
+SCENARIOS: List[Tuple[str, int, Callable[[random.Random], Request]]] = [
+    ("GET /api/food-log", 20, list_food_log),
+    ("GET /api/food-log?from=today", 15, list_food_log_today),
+    ("GET /api/food-log/summary", 15, summary_week),
+    ("POST /api/food-log", 20, create_food_log),
+    ("POST /macro", 10, macro),
+    ("GET /api/search-foods", 10, search_foods),
+    ("GET /api/food-log/quick-add", 10, quick_add),
+    ("GET /api/food-log/trends", 5, trends),
+    ("GET /me", 10, me),
+]
+
+def login_scenario(users: int):
+    def login(rng: random.Random) -> Request:
+        return "POST", "/token", {"data": {"username": f"user{rng.randrange(users)}@example.com", "password": PASSWORD}}
+    return ("POST /token", 2, login)
+
+async def run(
+    url: str, users: int, concurrency: int, duration: float, seed: int, logins: bool, accept_encoding: str
+) -> Dict:
+    scenarios = SCENARIOS + ([login_scenario(users)] if logins else [])
+    names = [name for name, _, _ in scenarios]
+    weights = [weight for _, weight, _ in scenarios]
+    tokens: Dict[int, str] = {}
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    wire_bytes: Dict[str, int] = defaultdict(int)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    headers = {"Accept-Encoding": accept_encoding}
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30, headers=headers) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(index: int) -> None:
+            rng = random.Random(seed + index)
+            while time.perf_counter() < deadline:
+                [i] = rng.choices(range(len(scenarios)), weights)
+                name, _, make = scenarios[i]
+                user = rng.randrange(users)
+                token = tokens.get(user) or tokens.setdefault(user, token_for(f"user{user}"))
+                method, path, kwargs = make(rng)
+                started = time.perf_counter()
+                try:
+                    response = await client.request(
+                        method, path, headers={"Authorization": f"Bearer {token}"}, **kwargs
+                    )
+                    ok = response.status_code < 400
+                    wire_bytes[name] += response.num_bytes_downloaded
+                except httpx.HTTPError:
+                    ok = False
+                latencies[name].append(time.perf_counter() - started)
+                if not ok:
+                    errors[name] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    results = {}
+    for name in names:
+        if latencies[name]:
+            results[name] = {
+                **summarize(latencies[name], elapsed),
+                "errors": errors[name],
+                "bytes_per_request": wire_bytes[name] / len(latencies[name]),
+            }
+    everything = [value for values in latencies.values() for value in values]
+    results["all"] = {
+        **summarize(everything, elapsed),
+        "errors": sum(errors.values()),
+        "bytes_per_request": sum(wire_bytes.values()) / len(everything),
+    }
+    return results
+
+def process_cpu_seconds(pid: int) -> float:
+    """User + system CPU time of a process so far (Linux /proc)."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+def print_results(results: Dict) -> None:
+    print(f"\n{'endpoint':30} {'count':>7} {'err':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'KB/req':>8}")
+    for name, r in results.items():
+        print(f"{name:30} {r['count']:7} {r['errors']:5} {r['rps']:8.1f} {r['p50_ms']:8.1f} {r['p95_ms']:8.1f} "
+              f"{r['p99_ms']:8.1f} {r['bytes_per_request'] / 1024:8.2f}")
+    if "server_cpu_ms_per_request" in results["all"]:
+        print(f"\nServer CPU per request: {results['all']['server_cpu_ms_per_request']:.2f} ms")
+
+def wait_until_up(url: str, timeout: float = 60) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+def start_servers(args) -> List[subprocess.Popen]:
+    """Fake USDA API plus uvicorn on the seeded database."""
+    usda_url = f"http://127.0.0.1:{args.usda_port}"
+    usda = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_usda", "--port", str(args.usda_port), "--latency", str(args.usda_latency)],
+        cwd=BACKEND_DIR,
+    )
+    env = {
+        **os.environ,
+        "DATABASE_URL": args.database_url,
+        "SECRET_KEY": SECRET_KEY,
+        "ALGORITHM": ALGORITHM,
+        "ACCESS_TOKEN_EXPIRE_MINUTES": "120",
+        "USDA_API_URL": f"{usda_url}/fdc/v1/foods/search",
+        "USDA_API_KEY": "benchmark",
+        # Every simulated user shares one address, so per-IP budgets would throttle the mix
+        "RATE_LIMIT_ENABLED": os.getenv("RATE_LIMIT_ENABLED", "0"),
+        # Fresh search cache per run, so the first lookups really go upstream
+        "USDA_CACHE_PATH": os.path.join(BACKEND_DIR, "benchmarks", "data", f"usda_cache_{os.getpid()}.db"),
+    }
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    servers = [usda, api]
+    try:
+        wait_until_up(f"{usda_url}/stats")
+        wait_until_up(f"http://127.0.0.1:{args.port}/")
+    except Exception:
+        stop_servers(servers)
+        raise
+    return servers
+
+def stop_servers(servers: List[subprocess.Popen]) -> None:
+    for server in servers:
+        server.send_signal(signal.SIGINT)
+    for server in servers:
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="Target a running server instead of starting one")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL, help="Seeded database for the started server")
+    parser.add_argument("--users", type=int, default=2000, help="Seeded users to spread requests over")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--usda-port", type=int, default=8765)
+    parser.add_argument("--usda-latency", type=float, default=80, help="Fake USDA delay per call, in ms")
+    parser.add_argument("--logins", action="store_true", help="Include POST /token (bcrypt) in the mix")
+    parser.add_argument("--accept-encoding", default="gzip, br", help="Sent with every request; 'identity' disables compression")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    servers = [] if args.url else start_servers(args)
+    url = args.url or f"http://127.0.0.1:{args.port}"
+    # With one worker the API is a single process, so its CPU time is the server's
+    api_pid = servers[1].pid if servers and args.workers == 1 and sys.platform == "linux" else None
+    try:
+        cpu_before = process_cpu_seconds(api_pid) if api_pid else None
+        results = asyncio.run(run(
+            url, args.users, args.concurrency, args.duration, args.seed, args.logins, args.accept_encoding
+        ))
+        if api_pid:
+            results["all"]["server_cpu_ms_per_request"] = (
+                (process_cpu_seconds(api_pid) - cpu_before) * 1000 / results["all"]["count"]
+            )
+    finally:
+        stop_servers(servers)
+        if not args.url:
+            cache = os.path.join(BACKEND_DIR, "benchmarks", "data", f"usda_cache_{os.getpid()}.db")
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(cache + suffix):
+                    os.remove(cache + suffix)
+
+    print_results(results)
+    save_results("load", results, {
+        key: value for key, value in vars(args).items() if key not in ("port", "usda_port")
+    })
@@ -0,0 +1,172 @@
+"""
+Micro-benchmarks for the per-request hot paths: model prediction (single and
+batched, cold and cached), token verification (full JWT decode vs the token
+cache), bcrypt hashing/verification, and serializing a page of food logs
+(FastAPI's response_model path vs orjson from column tuples, then gzip and
+brotli, with the bytes each produces). Results are saved under
+benchmarks/results/ and compared with the previous run.
+
+Usage (from backend/):
+    python -m benchmarks.micro [--repeat 2000] [--batch 256] [--only model,token,bcrypt,serialize]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from benchmarks.common import configure, save_results, summarize
+
+# Production bcrypt cost unless BCRYPT_ROUNDS says otherwise
+configure("micro", BCRYPT_ROUNDS="12")
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 3) -> Dict[str, float]:
+    """Latency summary of `repeat` calls to `fn`, plus calls/sec."""
+    for _ in range(warmup):
+        fn()
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call_started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+def random_keys(count: int, rng: random.Random) -> list:
+    from app.services.macros import feature_key
+
+    return [
+        feature_key(rng.randint(18, 75), rng.choice(["male", "female"]),
+                    rng.uniform(50, 120), rng.uniform(150, 200))
+        for _ in range(count)
+    ]
+
+def bench_model(repeat: int, batch: int, rng: random.Random) -> Dict:
+    from app.services import macros
+
+    singles = iter(random_keys(repeat + 3, rng))
+    batches = iter([random_keys(batch, rng) for _ in range(max(1, repeat // 20) + 3)])
+    hot_key = random_keys(1, rng)
+    macros.predict_base(hot_key)
+
+    results = {
+        "model.predict_single": measure(lambda: macros.predict_uncached([next(singles)]), repeat),
+        f"model.predict_batch{batch}": measure(lambda: macros.predict_uncached(next(batches)), max(1, repeat // 20)),
+        "model.predict_cached": measure(lambda: macros.predict_base(hot_key), repeat),
+    }
+    results[f"model.predict_batch{batch}"]["per_row_us"] = (
+        results[f"model.predict_batch{batch}"]["mean_ms"] / batch * 1000
+    )
+    return results
+
+def bench_token(repeat: int, rng: random.Random) -> Dict:
+    from app.utils import auth
+
+    tokens = [auth.create_access_token({"sub": f"user{i}"}, timedelta(minutes=30)) for i in range(1000)]
+
+    def uncached():
+        auth.token_cache.clear()
+        auth.decode_token(rng.choice(tokens))
+
+    def cached():
+        auth.decode_token(rng.choice(tokens))
+
+    uncached_results = measure(uncached, repeat)
+    for token in tokens:
+        auth.decode_token(token)
+    return {
+        "token.decode_jwt": uncached_results,
+        "token.decode_cached": measure(cached, repeat),
+        "token.create": measure(lambda: auth.create_access_token({"sub": "user0"}), repeat),
+    }
+
+def bench_bcrypt(repeat: int) -> Dict:
+    from app.utils import auth
+
+    hashed = auth.get_password_hash("benchmark-password")
+    return {
+        f"bcrypt.hash_r{auth.BCRYPT_ROUNDS}": measure(lambda: auth.get_password_hash("benchmark-password"), repeat, 1),
+        f"bcrypt.verify_r{auth.BCRYPT_ROUNDS}": measure(lambda: auth.verify_password("benchmark-password", hashed), repeat, 1),
+    }
+
+def food_log_rows(count: int, rng: random.Random) -> list:
+    """Column tuples shaped like a GET /api/food-log page (LEAN_COLUMNS order)."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return [
+        (i, 1, f"Food {rng.randrange(500)}", rng.uniform(20, 800), rng.uniform(0, 50),
+         rng.uniform(0, 100), rng.uniform(0, 40), 100.0, now - timedelta(minutes=17 * i))
+        for i in range(count, 0, -1)
+    ]
+
+def bench_serialize(repeat: int, rows: int, rng: random.Random) -> Dict:
+    import asyncio
+    from typing import List as ListOf
+
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    from app.routes.food_log import LEAN_KEYS
+    from app.schemas.food_log import FoodLogResponse
+    from app.utils import compression
+    from app.utils.responses import rows_response
+
+    page = food_log_rows(rows, rng)
+    dicts = [dict(zip(LEAN_KEYS, row)) for row in page]
+    field = create_response_field("Response_food_log", ListOf[FoodLogResponse])
+    loop = asyncio.new_event_loop()
+
+    def response_model_path() -> bytes:
+        # What a route returning rows with response_model=List[FoodLogResponse] costs
+        content = loop.run_until_complete(serialize_response(field=field, response_content=dicts))
+        return JSONResponse(content).body
+
+    def orjson_path() -> bytes:
+        return rows_response(LEAN_KEYS, page).body
+
+    body = orjson_path()
+    results = {
+        f"serialize.response_model_{rows}": measure(response_model_path, repeat),
+        f"serialize.orjson_rows_{rows}": measure(orjson_path, repeat),
+    }
+    results[f"serialize.response_model_{rows}"]["bytes_per_request"] = len(response_model_path())
+    results[f"serialize.orjson_rows_{rows}"]["bytes_per_request"] = len(body)
+
+    encodings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+    for encoding in encodings:
+        name = f"compress.{encoding}_{rows}"
+        results[name] = measure(lambda: compression._Compressor(encoding).compress(body, final=True), repeat)
+        results[name]["bytes_per_request"] = len(compression._Compressor(encoding).compress(body, final=True))
+    loop.close()
+    return results
+
+def print_results(results: Dict) -> None:
+    print(f"\n{'benchmark':28} {'count':>7} {'ops/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, r in results.items():
+        print(f"{name:28} {r['count']:7} {r['rps']:10.1f} {r['p50_ms']:9.3f} {r['p95_ms']:9.3f} {r['p99_ms']:9.3f}"
+              + (f"  {r['bytes_per_request']:,} bytes" if "bytes_per_request" in r else ""))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000, help="Calls per benchmark")
+    parser.add_argument("--bcrypt-repeat", type=int, default=20, help="Calls per bcrypt benchmark")
+    parser.add_argument("--batch", type=int, default=256, help="Rows per batched prediction")
+    parser.add_argument("--rows", type=int, default=500, help="Food logs per serialized page")
+    parser.add_argument("--only", default="model,token,bcrypt,serialize", help="Comma-separated groups to run")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    groups = set(args.only.split(","))
+    rng = random.Random(args.seed)
+    results: Dict = {}
+    if "model" in groups:
+        results.update(bench_model(args.repeat, args.batch, rng))
+    if "token" in groups:
+        results.update(bench_token(args.repeat, rng))
+    if "bcrypt" in groups:
+        results.update(bench_bcrypt(args.bcrypt_repeat))
+    if "serialize" in groups:
+        results.update(bench_serialize(max(1, args.repeat // 10), args.rows, rng))
+
+    print_results(results)
+    save_results("micro", results, vars(args))
@@ -0,0 +1,120 @@
+"""
+Seed a database with realistic volumes for load testing: users with varied
+profiles and a year of food logs each (default 2,000 users x 500 logs = 1M
+rows). Seeding is deterministic for a given --seed, so runs are comparable.
+
+Every user's password is "benchmark-password" and their email is
+user<N>@example.com.
+
+Usage (from backend/):
+    python -m benchmarks.seed [--database-url URL] [--users 2000] [--logs-per-user 500]
+
+The default database is benchmarks/data/bench.db.
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import BACKEND_DIR, configure, migrate
+
+DEFAULT_DATABASE_URL = f"sqlite:///{os.path.join(BACKEND_DIR, 'benchmarks', 'data', 'bench.db')}"
+PASSWORD = "benchmark-password"
+
+ACTIVITY_LEVELS = ["sedentary", "light", "moderate", "very_active", "extra_active"]
+FITNESS_GOALS = ["lose_weight", "maintain", "gain_muscle"]
+# (name, calories, protein, carbs, fat) per 100 g
+FOODS = [
+    ("Oatmeal", 68, 2.4, 12.0, 1.4), ("Banana", 89, 1.1, 22.8, 0.3),
+    ("Chicken breast", 165, 31.0, 0.0, 3.6), ("White rice", 130, 2.7, 28.2, 0.3),
+    ("Broccoli", 34, 2.8, 6.6, 0.4), ("Egg", 155, 13.0, 1.1, 11.0),
+    ("Greek yogurt", 59, 10.0, 3.6, 0.4), ("Salmon", 208, 20.0, 0.0, 13.0),
+    ("Almonds", 579, 21.0, 22.0, 50.0), ("Whole wheat bread", 247, 13.0, 41.0, 3.4),
+    ("Apple", 52, 0.3, 14.0, 0.2), ("Peanut butter", 588, 25.0, 20.0, 50.0),
+    ("Pasta", 131, 5.0, 25.0, 1.1), ("Ground beef", 250, 26.0, 0.0, 15.0),
+    ("Milk", 42, 3.4, 5.0, 1.0), ("Cheddar cheese", 403, 25.0, 1.3, 33.0),
+]
+BATCH = 20_000
+
+def users(count: int, rng: random.Random, hashed: str):
+    for i in range(count):
+        gender = rng.choice(["male", "female"])
+        height = rng.gauss(176 if gender == "male" else 162, 7)
+        yield {
+            "username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": hashed,
+            "age": rng.randint(18, 75), "gender": gender,
+            "weight": round(rng.gauss(24, 4) * (height / 100) ** 2, 1), "height": round(height, 1),
+            "activity_level": rng.choice(ACTIVITY_LEVELS), "fitness_goal": rng.choice(FITNESS_GOALS),
+        }
+
+def food_logs(user_ids, per_user: int, rng: random.Random, now: datetime):
+    for user_id in user_ids:
+        for _ in range(per_user):
+            name, calories, protein, carbs, fat = rng.choice(FOODS)
+            grams = rng.choice([50, 100, 150, 200, 250])
+            scale = grams / 100
+            yield {
+                "user_id": user_id, "food_name": name, "grams": float(grams),
+                "calories": round(calories * scale, 1), "protein": round(protein * scale, 1),
+                "carbs": round(carbs * scale, 1), "fat": round(fat * scale, 1),
+                "logged_at": now - timedelta(seconds=rng.randrange(365 * 24 * 3600)),
+            }
+
+def insert_batches(conn, table, rows) -> int:
+    total, batch = 0, []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            conn.execute(table.insert(), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        conn.execute(table.insert(), batch)
+        total += len(batch)
+    return total
+
+def seed(user_count: int, per_user: int, rng_seed: int) -> None:
+    from app.database import engine
+    from app.models.daily_total import DailyTotal
+    from app.models.food_log import FoodLog, FoodLogTombstone
+    from app.models.macro import Macro
+    from app.models.user import User
+    from app.models.user_food import UserFood
+    from app.services import daily_totals, user_foods
+    from app.utils.auth import get_password_hash
+
+    rng = random.Random(rng_seed)
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(DailyTotal.__table__.delete())
+        conn.execute(UserFood.__table__.delete())
+        conn.execute(FoodLogTombstone.__table__.delete())
+        conn.execute(FoodLog.__table__.delete())
+        conn.execute(Macro.__table__.delete())
+        conn.execute(User.__table__.delete())
+        insert_batches(conn, User.__table__, users(user_count, rng, get_password_hash(PASSWORD)))
+        user_ids = [row[0] for row in conn.execute(User.__table__.select().with_only_columns(User.id))]
+        logs = insert_batches(
+            conn, FoodLog.__table__,
+            food_logs(user_ids, per_user, rng, datetime.now(timezone.utc))
+        )
+        user_foods.rebuild(conn)
+        daily_totals.rebuild(conn)
+    print(f"Seeded {len(user_ids)} users and {logs} food logs in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--logs-per-user", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.database_url.startswith("sqlite:///"):
+        os.makedirs(os.path.dirname(os.path.abspath(args.database_url[len("sqlite:///"):])), exist_ok=True)
+    os.environ["DATABASE_URL"] = args.database_url
+    # Real cost hashes, so logins in the load test behave like production
+    configure("seed", BCRYPT_ROUNDS=os.getenv("BCRYPT_ROUNDS", "12"))
+    migrate()
+    seed(args.users, args.logs_per_user, args.seed)
@@ -0,0 +1,79 @@
+"""Baseline schema: users, macros and food_logs
+
+Matches the tables `Base.metadata.create_all` used to create at startup.
+Databases created that way already have them, so existing tables are left
+alone and `alembic upgrade head` works on old and new databases alike.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Offline (--sql) there is no database to inspect; emit the full schema
+    existing = set() if context.is_offline_mode() else set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'users' not in existing:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('username', sa.String(), nullable=True),
+            sa.Column('email', sa.String(), nullable=True),
+            sa.Column('hashed_password', sa.String(), nullable=True),
+            sa.Column('age', sa.Integer(), nullable=True),
+            sa.Column('gender', sa.String(), nullable=True),
+            sa.Column('weight', sa.Float(), nullable=True),
+            sa.Column('height', sa.Float(), nullable=True),
+            sa.Column('activity_level', sa.String(), nullable=True),
+            sa.Column('fitness_goal', sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_users_id', 'users', ['id'])
+        op.create_index('ix_users_username', 'users', ['username'], unique=True)
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    if 'macros' not in existing:
+        op.create_table(
+            'macros',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('total_calories', sa.Integer(), nullable=True),
+            sa.Column('protein', sa.Float(), nullable=True),
+            sa.Column('carbs', sa.Float(), nullable=True),
+            sa.Column('fat', sa.Float(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_macros_id', 'macros', ['id'])
+
+    if 'food_logs' not in existing:
+        op.create_table(
+            'food_logs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('food_name', sa.String(), nullable=True),
+            sa.Column('calories', sa.Float(), nullable=True),
+            sa.Column('protein', sa.Float(), nullable=True),
+            sa.Column('carbs', sa.Float(), nullable=True),
+            sa.Column('fat', sa.Float(), nullable=True),
+            sa.Column('grams', sa.Float(), nullable=True),
+            sa.Column('logged_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_food_logs_id', 'food_logs', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_table('food_logs')
+    op.drop_table('macros')
+    op.drop_table('users')
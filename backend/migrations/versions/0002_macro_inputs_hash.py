@@ -0,0 +1,32 @@
+"""Record what stored macro targets were computed from
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Older startups added these columns on the fly; only add what's missing
+    existing = set() if context.is_offline_mode() else {
+        column['name'] for column in sa.inspect(op.get_bind()).get_columns('macros')
+    }
+    with op.batch_alter_table('macros') as batch_op:
+        if 'inputs_hash' not in existing:
+            batch_op.add_column(sa.Column('inputs_hash', sa.String(length=64), nullable=True))
+        if 'computed_at' not in existing:
+            batch_op.add_column(sa.Column('computed_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('macros') as batch_op:
+        batch_op.drop_column('computed_at')
+        batch_op.drop_column('inputs_hash')
@@ -0,0 +1,29 @@
+"""Index food_logs on (user_id, logged_at)
+
+Every per-user listing, summary and the User.food_logs join filter on
+user_id and range over logged_at; without this they scan the whole table.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    indexes = set() if context.is_offline_mode() else {
+        index['name'] for index in sa.inspect(op.get_bind()).get_indexes('food_logs')
+    }
+    if 'ix_food_logs_user_id_logged_at' not in indexes:
+        op.create_index('ix_food_logs_user_id_logged_at', 'food_logs', ['user_id', 'logged_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_food_logs_user_id_logged_at', table_name='food_logs')
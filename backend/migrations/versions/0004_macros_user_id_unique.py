@@ -0,0 +1,28 @@
+"""Unique index on macros.user_id
+
+Each user has one row of targets. Duplicates left by older versions are
+removed first, keeping the newest row per user.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "DELETE FROM macros WHERE user_id IS NOT NULL AND id NOT IN "
+        "(SELECT MAX(id) FROM macros WHERE user_id IS NOT NULL GROUP BY user_id)"
+    )
+    op.create_index('ux_macros_user_id', 'macros', ['user_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ux_macros_user_id', table_name='macros')
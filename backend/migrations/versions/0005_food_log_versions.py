@@ -0,0 +1,49 @@
+"""Per-user food log versions and tombstones for delta sync
+
+Existing rows start at version 0.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Plain ADD COLUMNs, so SQLite doesn't rebuild the (large) food_logs table
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('food_log_version', sa.Integer(), nullable=False, server_default='0'))
+    with op.batch_alter_table('food_logs') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='0'))
+    op.create_index('ix_food_logs_user_id_version', 'food_logs', ['user_id', 'version'])
+
+    op.create_table(
+        'food_log_tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('food_log_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_food_log_tombstones_user_id_version', 'food_log_tombstones', ['user_id', 'version']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_food_log_tombstones_user_id_version', table_name='food_log_tombstones')
+    op.drop_table('food_log_tombstones')
+    op.drop_index('ix_food_logs_user_id_version', table_name='food_logs')
+    with op.batch_alter_table('food_logs') as batch_op:
+        batch_op.drop_column('version')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('food_log_version')
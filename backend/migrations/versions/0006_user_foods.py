@@ -0,0 +1,55 @@
+"""Per-user recent and frequent foods for quick-add
+
+Backfilled from food_logs: use count, last use, and the latest entry's
+values per (user, food name).
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_foods',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('food_name', sa.String(), nullable=False),
+        sa.Column('calories', sa.Float(), nullable=True),
+        sa.Column('protein', sa.Float(), nullable=True),
+        sa.Column('carbs', sa.Float(), nullable=True),
+        sa.Column('fat', sa.Float(), nullable=True),
+        sa.Column('grams', sa.Float(), nullable=True),
+        sa.Column('use_count', sa.Integer(), nullable=False),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id', 'food_name'),
+    )
+    op.create_index(
+        'ix_user_foods_user_id_use_count', 'user_foods', ['user_id', 'use_count', 'last_used_at']
+    )
+    op.create_index('ix_user_foods_user_id_last_used_at', 'user_foods', ['user_id', 'last_used_at'])
+
+    op.execute(
+        "INSERT INTO user_foods "
+        "(user_id, food_name, calories, protein, carbs, fat, grams, use_count, last_used_at) "
+        "SELECT user_id, food_name, calories, protein, carbs, fat, grams, use_count, logged_at FROM ("
+        "  SELECT user_id, food_name, calories, protein, carbs, fat, grams, logged_at,"
+        "    COUNT(*) OVER (PARTITION BY user_id, food_name) AS use_count,"
+        "    ROW_NUMBER() OVER (PARTITION BY user_id, food_name ORDER BY logged_at DESC, id DESC) AS recency_rank"
+        "  FROM food_logs WHERE user_id IS NOT NULL AND food_name IS NOT NULL"
+        ") ranked WHERE recency_rank = 1"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_foods_user_id_last_used_at', table_name='user_foods')
+    op.drop_index('ix_user_foods_user_id_use_count', table_name='user_foods')
+    op.drop_table('user_foods')
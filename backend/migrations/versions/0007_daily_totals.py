@@ -0,0 +1,56 @@
+"""Per-user timezone and daily nutrient totals rollup
+
+Existing users get UTC, so the backfill buckets food_logs by UTC date in
+SQL. Later rebuilds (python -m app.services.daily_totals) use each user's
+timezone.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('timezone', sa.String(), nullable=False, server_default='UTC'))
+
+    op.create_table(
+        'daily_totals',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('calories', sa.Float(), nullable=False),
+        sa.Column('protein', sa.Float(), nullable=False),
+        sa.Column('carbs', sa.Float(), nullable=False),
+        sa.Column('fat', sa.Float(), nullable=False),
+        sa.Column('grams', sa.Float(), nullable=False),
+        sa.Column('entries', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id', 'day'),
+    )
+
+    if op.get_bind().dialect.name == "postgresql":
+        day = "CAST(timezone('UTC', logged_at) AS DATE)"
+    else:
+        day = "date(logged_at)"
+    op.execute(
+        "INSERT INTO daily_totals (user_id, day, calories, protein, carbs, fat, grams, entries) "
+        f"SELECT user_id, {day}, "
+        "  SUM(COALESCE(calories, 0)), SUM(COALESCE(protein, 0)), SUM(COALESCE(carbs, 0)),"
+        "  SUM(COALESCE(fat, 0)), SUM(COALESCE(grams, 0)), COUNT(*) "
+        "FROM food_logs WHERE user_id IS NOT NULL AND logged_at IS NOT NULL "
+        f"GROUP BY user_id, {day}"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('daily_totals')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('timezone')
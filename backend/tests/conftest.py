@@ -0,0 +1,106 @@
+"""
+Test setup: a throwaway SQLite database migrated to head, a small macro
+model published as the live registry version, and one client for the app
+shared by every test. App modules read their settings at import time, so
+the environment is set before anything from `app` is imported.
+"""
+import os
+import tempfile
+import uuid
+
+import numpy as np
+import pytest
+
+_tmp = tempfile.mkdtemp(prefix="fitness-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_tmp}/test.db",
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "BCRYPT_ROUNDS": "4",
+    "RATE_LIMIT_ENABLED": "0",
+    "MODEL_REGISTRY_DIR": os.path.join(_tmp, "registry"),
+    "USDA_CACHE_PATH": os.path.join(_tmp, "usda_cache.db"),
+})
+
+from benchmarks.common import migrate
+
+migrate()
+
+MODEL_FEATURES = ["RIDAGEYR", "RIAGENDR", "BMXWT", "BMXHT"]
+
+def fit_macro_model(seed: int = 0):
+    """
+    A small stand-in for the trained macro predictor, fitted on synthetic
+    profiles: log calories, then protein, carbs and fat in grams.
+    """
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.multioutput import MultiOutputRegressor
+
+    rng = np.random.default_rng(seed)
+    age, gender = rng.integers(18, 80, 300), rng.integers(1, 3, 300)
+    weight, height = rng.uniform(45, 130, 300), rng.uniform(150, 200, 300)
+    calories = 1.2 * (10 * weight + 6.25 * height - 5 * age + np.where(gender == 1, 5, -161))
+    X = np.column_stack([age, gender, weight, height])
+    y = np.column_stack([np.log(calories), 0.3 * calories / 4, 0.45 * calories / 4, 0.25 * calories / 9])
+    forest = RandomForestRegressor(n_estimators=10, max_depth=8, random_state=seed)
+    return MultiOutputRegressor(forest).fit(X, y)
+
+# The trained model isn't checked in, so the app serves this one
+from app.services.forest import export_forest
+from app.services.model_registry import CURRENT, publish, write_pointer
+
+_model_path = tempfile.mkdtemp(dir=_tmp)
+export_forest(fit_macro_model(), _model_path, MODEL_FEATURES)
+os.makedirs(os.environ["MODEL_REGISTRY_DIR"])
+write_pointer(CURRENT, publish(_model_path))
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.database import SessionLocal
+from app.models import macro  # noqa: F401  (resolves User.macros)
+from app.models.user import User
+from app.utils.auth import create_access_token
+
+@pytest.fixture(scope="session")
+def compiled_models(tmp_path_factory):
+    """Directories holding two compiled stand-in models, fitted with different seeds."""
+    paths = []
+    for seed in (1, 2):
+        path = str(tmp_path_factory.mktemp(f"model-{seed}"))
+        export_forest(fit_macro_model(seed), path, MODEL_FEATURES)
+        paths.append(path)
+    return paths
+
+@pytest.fixture(scope="session")
+def client():
+    # One client, so the app's event loop (and the async engine's
+    # connections bound to it) lives for the whole session
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture
+def make_user():
+    """Create a user directly in the database; returns (user id, auth headers)."""
+    def make(timezone: str = "UTC"):
+        name = f"user-{uuid.uuid4().hex[:12]}"
+        db = SessionLocal()
+        try:
+            user = User(
+                username=name, email=f"{name}@example.com", hashed_password="unused",
+                age=30, gender="male", weight=80.0, height=180.0,
+                activity_level="moderate", fitness_goal="maintain", timezone=timezone
+            )
+            db.add(user)
+            db.commit()
+            user_id = user.id
+        finally:
+            db.close()
+        return user_id, {"Authorization": f"Bearer {create_access_token({'sub': name})}"}
+    return make
+
+@pytest.fixture
+def headers(make_user):
+    """Auth headers for a fresh UTC user."""
+    return make_user()[1]
@@ -0,0 +1,90 @@
+from app.database import SessionLocal
+from app.models.user import User
+from app.utils.auth import UserSnapshot, get_password_hash, user_cache
+
+USER = {
+    "username": "casey", "email": "casey@example.com", "password": "correct horse",
+    "age": 29, "gender": "female", "weight": 62.0, "height": 168.0,
+    "activity_level": "moderate", "fitness_goal": "maintain", "timezone": "Europe/Berlin",
+}
+
+def test_register_login_and_update_profile(client):
+    response = client.post("/register", json=USER)
+    assert response.status_code == 200
+    assert client.post("/register", json=USER).json()["detail"] == "Username already registered"
+    assert client.post("/register", json={**USER, "username": "other"}).json()["detail"] == "Email already registered"
+
+    response = client.post("/token", data={"username": USER["email"], "password": USER["password"]})
+    assert response.status_code == 200
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert client.get("/me", headers=headers).json()["timezone"] == "Europe/Berlin"
+
+    response = client.patch("/me", json={"weight": 63.5, "timezone": "Asia/Tokyo"}, headers=headers)
+    assert response.status_code == 200
+    assert (response.json()["weight"], response.json()["timezone"]) == (63.5, "Asia/Tokyo")
+
+def test_login_rejects_unknown_user_and_wrong_password(client, make_user):
+    response = client.post("/token", data={"username": "nobody@example.com", "password": "x"})
+    assert response.status_code == 401
+    # make_user stores a placeholder rather than a bcrypt hash; give it a real one
+    user_id, _ = make_user()
+    db = SessionLocal()
+    try:
+        user = db.get(User, user_id)
+        user.hashed_password = get_password_hash("right")
+        email = user.email
+        db.commit()
+    finally:
+        db.close()
+    assert client.post("/token", data={"username": email, "password": "wrong"}).status_code == 401
+    assert client.post("/token", data={"username": email, "password": "right"}).status_code == 200
+
+def test_me_rejects_bad_token(client):
+    assert client.get("/me", headers={"Authorization": "Bearer nonsense"}).status_code == 401
+
+def cache_snapshot(user_id: int) -> User:
+    """Put a user's snapshot in the auth cache; returns the user, detached."""
+    db = SessionLocal()
+    try:
+        user = db.get(User, user_id)
+        user_cache.set(user.username, UserSnapshot.from_user(user))
+        db.expunge(user)
+        return user
+    finally:
+        db.close()
+
+def test_user_cache_is_invalidated_on_commit_not_flush(make_user):
+    user = cache_snapshot(make_user()[0])
+    db = SessionLocal()
+    try:
+        db.get(User, user.id).weight = 90.0
+        db.flush()
+        # Flushed but not committed: other requests still see the old row
+        assert user_cache.get(user.username) is not None
+        db.commit()
+        assert user_cache.get(user.username) is None
+    finally:
+        db.close()
+
+def test_user_cache_keeps_snapshot_after_rollback(make_user):
+    user = cache_snapshot(make_user()[0])
+    db = SessionLocal()
+    try:
+        db.get(User, user.id).weight = 90.0
+        db.flush()
+        db.rollback()
+        assert not db.info
+        db.commit()
+        assert user_cache.get(user.username) is not None
+    finally:
+        db.close()
+
+def test_user_cache_drops_old_username_on_rename(make_user):
+    user = cache_snapshot(make_user()[0])
+    db = SessionLocal()
+    try:
+        db.get(User, user.id).username = f"{user.username}-renamed"
+        db.commit()
+        assert user_cache.get(user.username) is None
+    finally:
+        db.close()
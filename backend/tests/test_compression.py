@@ -0,0 +1,57 @@
+import pytest
+
+from app.utils import compression
+from app.utils.compression import choose_encoding
+
+@pytest.mark.skipif(compression.brotli is None, reason="Brotli not installed")
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, br", "br"),
+    ("gzip;q=1, br;q=0.1", "gzip"),
+    ("br;q=0.5, gzip;q=0.5", "br"),
+    ("gzip", "gzip"),
+    ("br;q=0, gzip;q=0.2", "gzip"),
+    ("*", "br"),
+    ("*;q=0.5, br;q=0.1", "gzip"),
+    ("gzip;q=0, br;q=0", None),
+    ("identity", None),
+    ("deflate", None),
+])
+def test_choose_encoding_follows_q_values(header, expected):
+    assert choose_encoding(header) == expected
+
+def test_choose_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding("br, gzip;q=0.5") == "gzip"
+    assert choose_encoding("br") is None
+
+@pytest.mark.parametrize("header, expected", [
+    ("br, gzip;q=0.5", "gzip"),
+    ("br", None),
+    ("gzip;q=0", None),
+    ("*", "gzip"),
+])
+def test_choose_encoding_among_given_encodings(header, expected):
+    assert choose_encoding(header, supported=("gzip",)) == expected
+
+FOOD = {"food_name": "oatmeal with blueberries and honey", "calories": 300.0, "protein": 8.0, "carbs": 55.0, "fat": 5.0}
+
+def test_large_json_is_compressed_and_small_is_not(client, headers):
+    client.post("/api/food-log/bulk", json=[FOOD] * 40, headers=headers)
+
+    response = client.get("/api/food-log", headers={**headers, "Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.headers["etag"].startswith("W/")
+    assert len(response.json()) == 40
+
+    response = client.get("/me", headers={**headers, "Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+def test_gzip_export_passes_through(client, headers):
+    client.post("/api/food-log/bulk", json=[FOOD] * 40, headers=headers)
+    response = client.get(
+        "/api/food-log/export", params={"format": "csv"}, headers={**headers, "Accept-Encoding": "gzip, br"}
+    )
+    assert response.headers["content-encoding"] == "gzip"
+    # Compressed once, by the export itself
+    assert response.text.count(FOOD["food_name"]) == 40
@@ -0,0 +1,82 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.models.daily_total import DailyTotal
+from app.services import daily_totals
+
+FOOD = {"food_name": "rice", "calories": 500.0, "protein": 10.0, "carbs": 100.0, "fat": 2.0}
+
+# Naive (UTC), Z, and positive and negative offsets
+LOGGED_AT_FORMS = [
+    "2026-10-10T08:00:00", "2026-10-10T08:00:00Z", "2026-10-10T08:00:00+09:00", "2026-10-10T08:00:00-04:00",
+]
+
+def rollup(user_id: int):
+    db = SessionLocal()
+    try:
+        return db.execute(
+            select(DailyTotal.day, DailyTotal.calories, DailyTotal.entries)
+            .where(DailyTotal.user_id == user_id).order_by(DailyTotal.day)
+        ).all()
+    finally:
+        db.close()
+
+def rebuilt(user_id: int):
+    db = SessionLocal()
+    try:
+        daily_totals.rebuild(db, user_id)
+        db.commit()
+    finally:
+        db.close()
+    return rollup(user_id)
+
+def test_offset_logged_at_is_stored_as_utc_and_rolls_back_on_delete(client, make_user):
+    user_id, headers = make_user()
+    response = client.post("/api/food-log", json={**FOOD, "logged_at": "2026-10-18T01:00:00+09:00"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["logged_at"].startswith("2026-10-17T16:00:00")
+    assert rollup(user_id) == [(date(2026, 10, 17), 500.0, 1)]
+
+    assert client.delete(f"/api/food-log/{response.json()['id']}", headers=headers).status_code == 200
+    assert rollup(user_id) == []
+
+def test_offset_logged_at_buckets_in_user_timezone(client, make_user):
+    user_id, headers = make_user("America/Toronto")
+    response = client.post("/api/food-log", json={**FOOD, "logged_at": "2026-10-18T01:00:00+09:00"}, headers=headers)
+    assert response.status_code == 200
+    # 16:00 UTC is noon in Toronto
+    assert rollup(user_id) == [(date(2026, 10, 17), 500.0, 1)]
+    assert rebuilt(user_id) == [(date(2026, 10, 17), 500.0, 1)]
+
+    assert client.delete(f"/api/food-log/{response.json()['id']}", headers=headers).status_code == 200
+    assert rollup(user_id) == []
+
+@pytest.mark.parametrize("tz", ["UTC", "Asia/Tokyo", "America/Los_Angeles"])
+def test_rollup_matches_rebuild_after_create_update_delete(client, make_user, tz):
+    user_id, headers = make_user(tz)
+    created = client.post("/api/food-log/bulk", json=[
+        {**FOOD, "logged_at": form} for form in LOGGED_AT_FORMS
+    ], headers=headers).json()["results"]
+    ids = [result["id"] for result in created]
+    client.post("/api/food-log", json={**FOOD, "logged_at": "2026-10-11T23:30:00+05:30"}, headers=headers)
+    expected = rollup(user_id)
+    assert sum(row.entries for row in expected) == 5
+    assert rebuilt(user_id) == expected
+
+    client.put(f"/api/food-log/{ids[2]}", json={**FOOD, "calories": 300.0, "protein": 12.0}, headers=headers)
+    assert sum(row.calories for row in rollup(user_id)) == pytest.approx(4 * FOOD["calories"] + 300.0)
+    expected = rollup(user_id)
+    assert rebuilt(user_id) == expected
+
+    for food_log_id in ids:
+        assert client.delete(f"/api/food-log/{food_log_id}", headers=headers).status_code == 200
+    expected = rollup(user_id)
+    assert [row.entries for row in expected] == [1]
+    assert rebuilt(user_id) == expected
+
+    [remaining] = client.get("/api/food-log", headers=headers).json()
+    assert client.delete(f"/api/food-log/{remaining['id']}", headers=headers).status_code == 200
+    assert rollup(user_id) == []
@@ -0,0 +1,87 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from app.utils import export
+
+FOOD = {"food_name": "oats", "calories": 150.0, "protein": 5.0, "carbs": 27.0, "fat": 3.0, "grams": 40.0}
+
+@pytest.fixture
+def logged(client, make_user):
+    """
+    A user with 40 food logs; returns (user id, auth headers, ids oldest
+    first). Another user logs a food too, which the exports must leave out.
+    """
+    user_id, headers = make_user()
+    items = [{**FOOD, "food_name": f"oats, batch {i}", "logged_at": f"2026-09-{1 + i % 28:02d}T{i % 24:02d}:00:00Z"}
+             for i in range(40)]
+    results = client.post("/api/food-log/bulk", json=items, headers=headers).json()["results"]
+    client.post("/api/food-log", json=FOOD, headers=make_user()[1])
+    ids = [result["id"] for result in sorted(results, key=lambda r: (r["logged_at"], r["id"]))]
+    return user_id, headers, ids
+
+def download(client, headers, fmt: str, accept_encoding: str = "identity"):
+    return client.get("/api/food-log/export", params={"format": fmt},
+                      headers={**headers, "Accept-Encoding": accept_encoding})
+
+def test_csv_export_lists_every_row_oldest_first(client, logged):
+    _, headers, ids = logged
+    response = download(client, headers, "csv")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == 'attachment; filename="food_log.csv"'
+    assert "content-encoding" not in response.headers
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert list(rows[0]) == export.EXPORT_FIELDS
+    assert [int(row["id"]) for row in rows] == ids
+    assert rows[0]["food_name"].startswith("oats, batch")
+
+def test_ndjson_export_has_one_object_per_line(client, logged):
+    _, headers, ids = logged
+    response = download(client, headers, "ndjson")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    items = [json.loads(line) for line in response.text.splitlines()]
+    assert [item["id"] for item in items] == ids
+    assert set(items[0]) == set(export.EXPORT_FIELDS)
+    assert items[0]["calories"] == 150.0
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson"])
+def test_gzip_export_decompresses_to_the_plain_export(client, logged, fmt):
+    _, headers, _ = logged
+    plain = download(client, headers, fmt).content
+    with client.stream("GET", "/api/food-log/export", params={"format": fmt},
+                       headers={**headers, "Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        raw = b"".join(response.iter_raw())
+    assert gzip.decompress(raw) == plain
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson"])
+def test_export_streams_bounded_chunks(monkeypatch, logged, fmt):
+    user_id, _, ids = logged
+    monkeypatch.setattr(export, "FETCH_SIZE", 7)
+    monkeypatch.setattr(export, "CHUNK_SIZE", 512)
+    chunks = list(export.export_food_logs(user_id, fmt))
+    assert len(chunks) > 3
+    # A chunk is cut once it reaches CHUNK_SIZE, so it overshoots by at most one row
+    assert max(len(chunk) for chunk in chunks) < 512 + 200
+    body = b"".join(chunks).decode()
+    assert body.count("oats, batch") == len(ids)
+
+    compressed = list(export.export_food_logs(user_id, fmt, gzip=True))
+    assert gzip.decompress(b"".join(compressed)).decode() == body
+
+@pytest.mark.parametrize("accept_encoding, gzipped", [
+    ("gzip;q=0", False),
+    ("identity, gzip;q=0.0", False),
+    ("GZIP;q=0.3", True),
+    ("*", True),
+    ("*;q=0.5, gzip;q=0", False),
+])
+def test_export_gzips_by_q_value(client, logged, accept_encoding, gzipped):
+    _, headers, _ = logged
+    response = download(client, headers, "ndjson", accept_encoding)
+    assert (response.headers.get("content-encoding") == "gzip") == gzipped
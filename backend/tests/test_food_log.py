@@ -0,0 +1,128 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+FOOD = {"food_name": "apple", "calories": 95.0, "protein": 0.5, "carbs": 25.0, "fat": 0.3, "grams": 180.0}
+
+def parse_utc(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+# Every form of logged_at the bulk endpoint accepts, and the UTC instant it means
+LOGGED_AT_FORMS = [
+    ("2026-10-10T08:00:00", datetime(2026, 10, 10, 8, tzinfo=timezone.utc)),
+    ("2026-10-10T08:00:00Z", datetime(2026, 10, 10, 8, tzinfo=timezone.utc)),
+    ("2026-10-10T08:00:00+09:00", datetime(2026, 10, 9, 23, tzinfo=timezone.utc)),
+    ("2026-10-10T08:00:00-04:00", datetime(2026, 10, 10, 12, tzinfo=timezone.utc)),
+]
+
+def test_bulk_json_reports_per_item_errors_in_order(client, headers):
+    items = [
+        {**FOOD, "logged_at": LOGGED_AT_FORMS[0][0]},
+        {"food_name": "no nutrients"},
+        {**FOOD, "calories": "lots"},
+        {**FOOD, "logged_at": LOGGED_AT_FORMS[2][0]},
+        {**FOOD, "logged_at": "yesterday"},
+        FOOD,
+    ]
+    response = client.post("/api/food-log/bulk", json=items, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["inserted"], body["failed"]) == (3, 3)
+    assert [result["index"] for result in body["results"]] == list(range(6))
+    assert [result["id"] is not None for result in body["results"]] == [True, False, False, True, False, True]
+    assert "calories" in body["results"][1]["error"]
+    assert "calories" in body["results"][2]["error"]
+    assert "logged_at" in body["results"][4]["error"]
+    assert parse_utc(body["results"][0]["logged_at"]) == LOGGED_AT_FORMS[0][1]
+    assert parse_utc(body["results"][3]["logged_at"]) == LOGGED_AT_FORMS[2][1]
+    assert int(response.headers["X-Food-Log-Version"]) == 1
+
+    listed = client.get("/api/food-log", headers=headers).json()
+    assert sorted(row["id"] for row in listed) == sorted(
+        result["id"] for result in body["results"] if result["id"] is not None
+    )
+
+def test_bulk_ndjson_reports_unparseable_lines(client, headers):
+    lines = [json.dumps({**FOOD, "logged_at": form}) for form, _ in LOGGED_AT_FORMS]
+    lines.insert(2, "{not json")
+    lines.insert(3, "")
+    body = "\n".join(lines) + "\n"
+    response = client.post(
+        "/api/food-log/bulk", content=body, headers={**headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["inserted"], result["failed"]) == (4, 1)
+    assert result["results"][2]["error"].startswith("Invalid JSON")
+    stored = [parse_utc(item["logged_at"]) for item in result["results"] if item["id"] is not None]
+    assert stored == [instant for _, instant in LOGGED_AT_FORMS]
+
+@pytest.mark.parametrize("body", ['{"food_name": "apple"}', "[1, 2", ""])
+def test_bulk_json_rejects_a_body_that_is_not_an_array(client, headers, body):
+    response = client.post(
+        "/api/food-log/bulk", content=body, headers={**headers, "Content-Type": "application/json"}
+    )
+    assert response.status_code == 400
+
+def test_bulk_with_only_invalid_items_writes_nothing(client, headers):
+    response = client.post("/api/food-log/bulk", json=[{"food_name": "x"}], headers=headers)
+    assert response.json()["inserted"] == 0
+    assert "X-Food-Log-Version" not in response.headers
+    assert client.get("/api/food-log", headers=headers).json() == []
+
+def test_timestamps_are_written_with_a_utc_offset(client, headers):
+    created = client.post("/api/food-log", json={**FOOD, "logged_at": "2026-10-10T08:00:00+09:00"}, headers=headers)
+    bulk = client.post("/api/food-log/bulk", json=[FOOD], headers=headers).json()
+    timestamps = [created.json()["logged_at"], bulk["results"][0]["logged_at"]]
+    timestamps += [row["logged_at"] for row in client.get("/api/food-log", headers=headers).json()]
+    timestamps += [row["logged_at"] for row in
+                   client.get("/api/food-log/changes", params={"since": 0}, headers=headers).json()["upserts"]]
+    timestamps += [row["last_used_at"] for row in client.get("/api/food-log/quick-add", headers=headers).json()]
+    assert created.json()["logged_at"] == "2026-10-09T23:00:00Z"
+    assert len(timestamps) == 7
+    assert all(value.endswith("Z") for value in timestamps)
+
+    exported = client.get("/api/food-log/export", params={"format": "ndjson"}, headers=headers).text
+    assert [json.loads(line)["logged_at"][-6:] for line in exported.splitlines()] == ["+00:00"] * 2
+    exported = client.get("/api/food-log/export", params={"format": "csv"}, headers=headers).text
+    assert [line.rsplit(",", 1)[1][-6:] for line in exported.splitlines()[1:]] == ["+00:00"] * 2
+
+def list_pages(client, headers, **params):
+    """Follow X-Next-Cursor through a listing; returns the ids on each page."""
+    pages, cursor = [], None
+    while True:
+        response = client.get("/api/food-log", params={**params, **({"cursor": cursor} if cursor else {})},
+                              headers=headers)
+        assert response.status_code == 200
+        pages.append([row["id"] for row in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+
+def test_cursor_pages_neither_overlap_nor_skip_rows(client, headers):
+    # Several rows share a logged_at, so pages split inside a tie
+    items = [{**FOOD, "logged_at": f"2026-10-{day:02d}T12:00:00Z"} for day in (1, 2, 2, 2, 3, 3, 4, 5, 5, 5, 5, 6)]
+    created = client.post("/api/food-log/bulk", json=items, headers=headers).json()["results"]
+    newest_first = [result["id"] for result in sorted(created, key=lambda r: (r["logged_at"], r["id"]), reverse=True)]
+
+    pages = list_pages(client, headers, limit=5)
+    assert [len(page) for page in pages] == [5, 5, 2]
+    assert [row_id for page in pages for row_id in page] == newest_first
+
+    # A row logged while paging sorts before the cursor and can't shift later pages
+    first = client.get("/api/food-log", params={"limit": 5}, headers=headers)
+    client.post("/api/food-log", json={**FOOD, "logged_at": "2026-10-07T12:00:00Z"}, headers=headers)
+    rest = list_pages(client, headers, limit=5, cursor=first.headers["X-Next-Cursor"])
+    assert [row_id for page in rest for row_id in page] == newest_first[5:]
+
+    # Bounds apply across pages: from is inclusive, to exclusive
+    pages = list_pages(client, headers, limit=2, **{"from": "2026-10-02T12:00:00Z", "to": "2026-10-05T12:00:00Z"})
+    assert [row_id for page in pages for row_id in page] == newest_first[5:11]
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "bm9waXBl", "MjAyNi0xMC0wMXxhYmM"])
+def test_malformed_cursor_is_rejected(client, headers, cursor):
+    response = client.get("/api/food-log", params={"cursor": cursor}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,95 @@
+import json
+import sqlite3
+
+import pytest
+
+from app.services.import_foods import import_foods
+from app.utils.food_store import SCHEMA, FoodStore
+
+def nutrient(nutrient_id: int, amount: float) -> dict:
+    return {"nutrient": {"id": nutrient_id}, "amount": amount}
+
+SURVEY_FOODS = {"SurveyFoods": [
+    {"fdcId": 1, "description": "Chicken breast, roasted",
+     "foodNutrients": [nutrient(1008, 165.0), nutrient(1003, 31.0), nutrient(1004, 3.6), nutrient(1093, 74.0)]},
+    {"fdcId": 2, "description": "Chicken thigh, fried", "foodNutrients": [nutrient(1008, 240.0)]},
+    {"fdcId": 3, "description": "Crème brûlée", "foodNutrients": [nutrient(1008, 330.0), nutrient(1005, 30.0)]},
+    {"fdcId": 4, "description": "Chickpeas", "foodNutrients": []},
+    {"fdcId": 5, "description": "Bread, whole wheat", "foodNutrients": [nutrient(1008, 250.0)]},
+]}
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "foods.db")
+
+@pytest.fixture
+def store(tmp_path, store_path):
+    export = tmp_path / "survey.json"
+    export.write_text(json.dumps(SURVEY_FOODS))
+    assert import_foods(str(export), store_path) == 5
+    store = FoodStore(store_path)
+    yield store
+    store.close()
+
+def names(foods):
+    return [food["name"] for food in foods]
+
+def test_import_keeps_the_four_nutrients(store):
+    [food] = store.search("roasted")
+    assert food == {"name": "Chicken breast, roasted", "calories": 165.0, "protein": 31.0, "carbs": 0.0, "fat": 3.6}
+    assert store.count() == 5
+
+def test_import_reads_a_csv_download(tmp_path, store_path):
+    (tmp_path / "food.csv").write_text('fdc_id,description\n10,"Oats, rolled"\n11,Oat milk\n')
+    (tmp_path / "food_nutrient.csv").write_text(
+        "id,fdc_id,nutrient_id,amount\n1,10,1008,379\n2,10,1003,13.2\n3,11,1008,\n4,12,1008,99\n"
+    )
+    assert import_foods(str(tmp_path), store_path) == 2
+    store = FoodStore(store_path)
+    try:
+        assert [(food["name"], food["calories"]) for food in store.search("oat")] == [
+            ("Oat milk", 0.0), ("Oats, rolled", 379.0)
+        ]
+    finally:
+        store.close()
+
+@pytest.mark.parametrize("query, expected", [
+    ("chick", ["Chickpeas", "Chicken thigh, fried", "Chicken breast, roasted"]),
+    ("chick bre", ["Chicken breast, roasted"]),
+    ("BREAST chicken", ["Chicken breast, roasted"]),
+    ("creme brulee", ["Crème brûlée"]),
+    ("bread", ["Bread, whole wheat"]),
+    ("lamb", []),
+    ("  ,;  ", []),
+])
+def test_search_matches_every_word_as_a_prefix(store, query, expected):
+    assert store.has_fts
+    assert names(store.search(query)) == expected
+
+def test_search_respects_the_limit(store):
+    assert names(store.search("chick", limit=1)) == ["Chickpeas"]
+
+def test_reimport_updates_the_index(store, tmp_path, store_path):
+    export = tmp_path / "renamed.json"
+    export.write_text(json.dumps([{"fdcId": 4, "description": "Garbanzo beans", "foodNutrients": []}]))
+    import_foods(str(export), store_path)
+    assert names(store.search("chickpeas")) == []
+    assert names(store.search("garbanzo")) == ["Garbanzo beans"]
+    assert store.count() == 5
+
+def test_foods_stored_before_the_index_existed_are_indexed(store_path):
+    conn = sqlite3.connect(store_path)
+    conn.executescript(SCHEMA)
+    conn.execute("INSERT INTO foods VALUES (7, 'Greek yogurt, plain', 59, 10, 3.6, 0.4, 0)")
+    conn.commit()
+    conn.close()
+    store = FoodStore(store_path)
+    try:
+        assert names(store.search("yog")) == ["Greek yogurt, plain"]
+    finally:
+        store.close()
+
+def test_search_without_fts_falls_back_to_like(store):
+    store.has_fts = False
+    assert names(store.search("chick bre")) == ["Chicken breast, roasted"]
+    assert names(store.search("chick")) == ["Chickpeas", "Chicken thigh, fried", "Chicken breast, roasted"]
@@ -0,0 +1,66 @@
+import json
+import os
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.multioutput import MultiOutputRegressor
+
+from app.services.forest import CompiledForest, export_forest
+
+FEATURES = ['RIDAGEYR', 'RIAGENDR', 'BMXWT', 'BMXHT']
+
+def sample_inputs(rng, n: int) -> np.ndarray:
+    return np.column_stack([
+        rng.integers(18, 80, n),
+        rng.integers(1, 3, n),
+        rng.uniform(40, 140, n).round(1),
+        rng.uniform(145, 205, n).round(1),
+    ]).astype(np.float64)
+
+@pytest.fixture(scope="module")
+def model():
+    """A small stand-in for the macro predictor: four features, three targets."""
+    rng = np.random.default_rng(0)
+    X = sample_inputs(rng, 400)
+    y = np.column_stack([
+        10 * X[:, 2] + 6 * X[:, 3] - 5 * X[:, 0] + 150 * (X[:, 1] == 1),
+        0.8 * X[:, 2] + rng.normal(0, 5, len(X)),
+        rng.normal(250, 40, len(X)),
+    ])
+    forest = RandomForestRegressor(n_estimators=8, min_samples_leaf=2, random_state=0)
+    return MultiOutputRegressor(forest).fit(X, y)
+
+@pytest.fixture(scope="module")
+def compiled_path(model, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("forest") / "macro_predictor")
+    export_forest(model, path, FEATURES)
+    return path
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_compiled_forest_matches_sklearn(model, compiled_path, mmap):
+    compiled = CompiledForest(compiled_path, mmap=mmap)
+    X = sample_inputs(np.random.default_rng(1), 500)
+    np.testing.assert_allclose(compiled.predict(X), model.predict(X), rtol=0, atol=1e-9)
+    assert compiled.feature_names == FEATURES
+    assert compiled.n_outputs == 3
+
+def test_compiled_forest_matches_sklearn_on_split_thresholds(model, compiled_path):
+    # Inputs sitting exactly on split points exercise the float32 comparison
+    thresholds = np.concatenate([
+        tree.tree_.threshold[tree.tree_.children_left != -1]
+        for forest in model.estimators_ for tree in forest.estimators_
+    ])
+    X = np.tile(sample_inputs(np.random.default_rng(2), 1), (len(thresholds), 1))
+    X[np.arange(len(thresholds)), np.arange(len(thresholds)) % len(FEATURES)] = thresholds
+    np.testing.assert_allclose(CompiledForest(compiled_path).predict(X), model.predict(X), rtol=0, atol=1e-9)
+
+def test_compiled_forest_rejects_an_unknown_format(compiled_path, tmp_path):
+    path = tmp_path / "future"
+    path.mkdir()
+    for name in os.listdir(compiled_path):
+        (path / name).write_bytes(open(os.path.join(compiled_path, name), "rb").read())
+    meta = json.loads((path / "meta.json").read_text())
+    (path / "meta.json").write_text(json.dumps({**meta, "format_version": meta["format_version"] + 1}))
+    with pytest.raises(ValueError, match="Unsupported compiled forest version"):
+        CompiledForest(str(path))
@@ -0,0 +1,52 @@
+import threading
+
+from app.database import SessionLocal
+from app.models.macro import Macro
+from app.services.macros import get_stored_targets, store_targets
+
+TARGETS = {"total_calories": 2200, "protein": 140, "carbs": 250, "fat": 70}
+
+def test_store_overwrites_row_written_by_another_session(make_user):
+    user_id, _ = make_user()
+    first, second = SessionLocal(), SessionLocal()
+    try:
+        # Both callers saw no row before either stored, as /macro and the background refresh can
+        assert get_stored_targets(first, user_id, "a") is None
+        assert get_stored_targets(second, user_id, "b") is None
+        store_targets(first, user_id, TARGETS, "a")
+        store_targets(second, user_id, {**TARGETS, "total_calories": 2300}, "b")
+
+        rows = first.query(Macro).filter(Macro.user_id == user_id).all()
+        assert [(row.total_calories, row.inputs_hash) for row in rows] == [(2300, "b")]
+        assert get_stored_targets(first, user_id, "b").total_calories == 2300
+    finally:
+        first.close()
+        second.close()
+
+def test_racing_writers_for_a_new_user_all_succeed(make_user):
+    user_id, _ = make_user()
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def write(calories: int) -> None:
+        db = SessionLocal()
+        try:
+            barrier.wait()
+            store_targets(db, user_id, {**TARGETS, "total_calories": calories}, str(calories))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=write, args=(2000 + i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    db = SessionLocal()
+    try:
+        assert db.query(Macro).filter(Macro.user_id == user_id).count() == 1
+    finally:
+        db.close()
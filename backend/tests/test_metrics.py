@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.database import engine
+from app.utils import metrics
+
+def db_query_count() -> int:
+    series = metrics.stage_latency._series.get(("db_query",))
+    return 0 if series is None else sum(series[:-1])
+
+def test_failed_statements_are_counted_but_not_timed():
+    before = db_query_count()
+    counter = [0]
+    token = metrics._request_queries.set(counter)
+    try:
+        with engine.connect() as connection:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    connection.execute(text("SELECT * FROM no_such_table"))
+            # Counted as the request's queries, with no duration sample
+            assert counter == [3]
+            assert db_query_count() == before
+            connection.execute(text("SELECT 1"))
+    finally:
+        metrics._request_queries.reset(token)
+    # Only the statement that ran to completion is timed
+    assert counter == [4]
+    assert db_query_count() == before + 1
+
+def test_counters_and_gauges_are_typed(client):
+    body = client.get("/metrics").text
+    assert "# TYPE cache_hits_total counter" in body
+    assert "# TYPE worker_pool_rejected_total counter" in body
+    assert "# TYPE rate_limited_total counter" in body
+    assert "# TYPE requests_shed_total counter" in body
+    assert "# TYPE cache_entries gauge" in body
+    assert "# TYPE requests_in_flight gauge" in body
+    assert 'cache_hits_total{cache="auth_token"}' in body
+    assert "# TYPE http_request_duration_seconds histogram" in body
+
+def test_counter_names_need_total_suffix():
+    with pytest.raises(ValueError):
+        metrics.register_collector("cache_hits", "Cache hits", (), lambda: {(): 0}, kind="counter")
+    with pytest.raises(ValueError):
+        metrics.register_collector("cache_hits_total", "Cache hits", (), lambda: {(): 0}, kind="summary")
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import os
+
+import numpy as np
+import pytest
+
+from app.services import macros, model_registry
+from app.services.model_registry import (
+    CURRENT, SHADOW, ModelRegistry, list_versions, publish, read_metadata, read_pointer, write_pointer
+)
+
+PROFILE = {"age": 34, "gender": "female", "weight": 70.0, "height": 170.0,
+           "activity_level": "moderate", "fitness_goal": "maintain"}
+
+X = np.array([[34, 2, 70.0, 170.0], [61, 1, 95.5, 182.0], [22, 2, 55.0, 160.5]])
+
+@pytest.fixture
+def registry_dir(tmp_path):
+    return str(tmp_path / "registry")
+
+@pytest.fixture
+def versions(compiled_models, registry_dir):
+    """Two published versions, the first live."""
+    published = [publish(path, {"metrics": {"r2": 0.5 + i / 10}}, registry_dir=registry_dir)
+                 for i, path in enumerate(compiled_models)]
+    write_pointer(CURRENT, published[0], registry_dir)
+    return published
+
+def wait_for_shadow(registry: ModelRegistry) -> None:
+    # The shadow executor has one thread, so this runs after anything queued
+    registry._shadow_executor.submit(lambda: None).result()
+
+def test_publish_records_metadata_and_pointers_name_known_versions(versions, registry_dir):
+    assert list_versions(registry_dir) == sorted(versions)
+    metadata = read_metadata(versions[1], registry_dir)
+    assert metadata["version"] == versions[1]
+    assert metadata["features"] == ["RIDAGEYR", "RIAGENDR", "BMXWT", "BMXHT"]
+    assert (metadata["n_outputs"], metadata["metrics"]) == (4, {"r2": 0.6})
+    assert not [name for name in os.listdir(registry_dir) if name.startswith(".staging")]
+
+    with pytest.raises(ValueError, match="Unknown model version"):
+        write_pointer(CURRENT, "no-such-version", registry_dir)
+    assert read_pointer(CURRENT, registry_dir) == versions[0]
+
+def test_refresh_swaps_the_live_model(versions, registry_dir):
+    registry = ModelRegistry(registry_dir)
+    swapped = []
+    registry.on_swap(swapped.append)
+    before = registry.live
+    assert before.version == versions[0]
+    assert not registry.refresh()
+
+    write_pointer(CURRENT, versions[1], registry_dir)
+    assert registry.refresh()
+    assert registry.live.version == versions[1]
+    assert [loaded.version for loaded in swapped] == [versions[1]]
+    assert registry.info()["live"]["metrics"] == {"r2": 0.6}
+    # A caller still holding the old snapshot finishes on the old model
+    assert not np.allclose(before.model.predict(X), registry.live.model.predict(X))
+    assert not registry.refresh()
+    assert registry.reloads == 1
+
+def test_shadow_scores_in_the_background(versions, registry_dir):
+    write_pointer(SHADOW, versions[1], registry_dir)
+    registry = ModelRegistry(registry_dir)
+    assert registry.shadow.version == versions[1]
+
+    live_y = registry.live.model.predict(X)
+    shadow_y = registry.shadow.model.predict(X)
+    live_y[:, 0] = np.exp(live_y[:, 0])
+    shadow_y[:, 0] = np.exp(shadow_y[:, 0])
+    registry.score_shadow(X, live_y, 0.001)
+    registry.score_shadow(X, live_y, 0.003)
+    wait_for_shadow(registry)
+
+    summary = registry.info()["shadow"]
+    assert (summary["version"], summary["batches"], summary["rows"], summary["dropped"]) == (versions[1], 2, 6, 0)
+    assert summary["live_ms_per_batch"] == pytest.approx(2.0)
+    np.testing.assert_allclose(summary["max_abs_diff"], np.abs(shadow_y - live_y).max(axis=0))
+    np.testing.assert_allclose(summary["mean_abs_diff"], np.abs(shadow_y - live_y).mean(axis=0))
+
+    # Promoting the shadow leaves nothing to compare against
+    write_pointer(CURRENT, versions[1], registry_dir)
+    assert registry.refresh()
+    assert registry.shadow is None and registry.info()["shadow"] is None
+
+def test_shadow_drops_batches_past_the_backlog(monkeypatch, versions, registry_dir):
+    write_pointer(SHADOW, versions[1], registry_dir)
+    registry = ModelRegistry(registry_dir)
+    monkeypatch.setattr(model_registry, "MODEL_SHADOW_MAX_PENDING", 0)
+    registry.score_shadow(X, registry.live.model.predict(X), 0.001)
+    monkeypatch.setattr(model_registry, "MODEL_SHADOW_SAMPLE", 0.0)
+    registry.score_shadow(X, registry.live.model.predict(X), 0.001)
+    wait_for_shadow(registry)
+    assert (registry.shadow_stats.batches, registry.shadow_stats.dropped) == (0, 1)
+
+def test_a_broken_version_keeps_the_live_model(versions, registry_dir):
+    registry = ModelRegistry(registry_dir)
+    broken = os.path.join(registry_dir, "broken")
+    os.makedirs(broken)
+    with open(os.path.join(broken, "metadata.json"), "w") as f:
+        json.dump({"version": "broken"}, f)
+    write_pointer(CURRENT, "broken", registry_dir)
+
+    async def watch_briefly():
+        task = asyncio.ensure_future(registry.watch(interval=0.01))
+        for _ in range(200):
+            await asyncio.sleep(0.01)
+            if registry.last_error is not None:
+                break
+        task.cancel()
+
+    asyncio.run(watch_briefly())
+    assert registry.live.version == versions[0]
+    assert registry.last_error.startswith("FileNotFoundError")
+
+def test_promotion_is_served_without_a_restart(client, compiled_models, headers):
+    original = macros.registry.live.version
+    before = client.post("/macro/batch", json=[PROFILE], headers=headers).json()
+    assert len(macros.prediction_cache) > 0
+
+    version = publish(compiled_models[1])
+    write_pointer(CURRENT, version)
+    try:
+        macros.registry.refresh()
+        assert len(macros.prediction_cache) == 0
+        assert client.get("/macro/model", headers=headers).json()["live"]["version"] == version
+        assert client.post("/macro/batch", json=[PROFILE], headers=headers).json() != before
+    finally:
+        write_pointer(CURRENT, original)
+        macros.registry.refresh()
+    assert client.post("/macro/batch", json=[PROFILE], headers=headers).json() == before
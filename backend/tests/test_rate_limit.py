@@ -0,0 +1,97 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils import rate_limit
+from app.utils.rate_limit import (
+    Budget, LoadShedMiddleware, MemoryBackend, RateLimitBackend, load_backend
+)
+
+def test_memory_backend_refills_over_time():
+    now = [0.0]
+    backend = MemoryBackend(clock=lambda: now[0])
+    budget = Budget.parse("2/second")
+
+    async def takes(count):
+        return [await backend.take("key", budget) for _ in range(count)]
+
+    assert asyncio.run(takes(3)) == [0.0, 0.0, 0.5]
+    now[0] += 0.5
+    assert asyncio.run(takes(2)) == [0.0, 0.5]
+
+def test_memory_backend_drops_least_recently_used_keys():
+    backend = MemoryBackend(max_keys=2)
+    budget = Budget.parse("1/minute")
+
+    async def take(*keys):
+        for key in keys:
+            await backend.take(key, budget)
+
+    asyncio.run(take("a", "b", "a", "c"))
+    assert len(backend) == 2
+    assert asyncio.run(backend.take("a", budget)) > 0
+    # "b" was dropped, so it comes back with a full bucket
+    assert asyncio.run(backend.take("b", budget)) == 0.0
+
+def test_backend_missing_take_fails_at_construction():
+    class Incomplete(RateLimitBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    with pytest.raises(TypeError):
+        load_backend("collections:OrderedDict")
+
+def test_budget_rejects_unknown_period():
+    with pytest.raises(ValueError):
+        Budget.parse("10/fortnight")
+
+def test_over_budget_gets_429_with_retry_after(client, monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limit, "backend", MemoryBackend())
+    login = {"username": "nobody@example.com", "password": "x"}
+
+    # TestClient connects from the address "testclient"; the login budget is 10/minute
+    statuses = [client.post("/token", data=login).status_code for _ in range(10)]
+    assert statuses == [401] * 10
+    response = client.post("/token", data=login)
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["Retry-After"]) <= 6
+
+def test_per_user_budget_counts_each_user_separately(make_user, monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limit, "backend", MemoryBackend())
+    app = FastAPI()
+
+    @app.get("/limited", dependencies=[Depends(rate_limit.rate_limit("macro"))])
+    async def limited():
+        return {}
+
+    [(_, first), (_, second)] = make_user(), make_user()
+    with TestClient(app) as limited_client:
+        # The macro budget is 30/minute per user
+        assert all(limited_client.get("/limited", headers=first).status_code == 200 for _ in range(30))
+        assert limited_client.get("/limited", headers=first).status_code == 429
+        assert limited_client.get("/limited", headers=second).status_code == 200
+
+def test_load_shedding_over_the_concurrency_cap():
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(0.2)
+        return {}
+
+    app.add_middleware(LoadShedMiddleware, limit=2, wait_timeout=0.05)
+
+    async def burst():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.get("/slow") for _ in range(5)))
+
+    responses = asyncio.run(burst())
+    assert sorted(response.status_code for response in responses) == [200, 200, 503, 503, 503]
+    assert all(response.headers["Retry-After"] == "1" for response in responses if response.status_code == 503)
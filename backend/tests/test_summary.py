@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+TORONTO = ZoneInfo("America/Toronto")
+
+def log_at(client, headers, local: datetime, calories: float) -> None:
+    logged_at = local.replace(tzinfo=TORONTO).astimezone(timezone.utc).isoformat()
+    response = client.post("/api/food-log", json={
+        "food_name": "toast", "calories": calories, "protein": 3.0, "carbs": 15.0, "fat": 1.0,
+        "logged_at": logged_at,
+    }, headers=headers)
+    assert response.status_code == 200
+
+def summary(client, headers, start: str, end: str, period: str = "day"):
+    response = client.get("/api/food-log/summary", params={
+        "start": start, "end": end, "period": period, "tz": "America/Toronto"
+    }, headers=headers)
+    assert response.status_code == 200
+    return [(row["period_start"], row["calories"], row["entries"]) for row in response.json()]
+
+def test_daily_buckets_across_dst_transitions(client, headers):
+    # Spring forward on 2026-03-08 and fall back on 2026-11-01, each logged
+    # within an hour of local midnight on both sides of the change
+    log_at(client, headers, datetime(2026, 3, 7, 23, 30), 100)
+    log_at(client, headers, datetime(2026, 3, 9, 0, 30), 200)
+    log_at(client, headers, datetime(2026, 10, 31, 23, 30), 300)
+    log_at(client, headers, datetime(2026, 11, 1, 23, 30), 400)
+    log_at(client, headers, datetime(2026, 11, 2, 0, 30), 500)
+
+    assert summary(client, headers, "2026-03-01", "2026-11-30") == [
+        ("2026-03-07", 100, 1),
+        ("2026-03-09", 200, 1),
+        ("2026-10-31", 300, 1),
+        ("2026-11-01", 400, 1),
+        ("2026-11-02", 500, 1),
+    ]
+    # Ranges that start on either side of a change agree
+    assert summary(client, headers, "2026-03-09", "2026-03-09") == [("2026-03-09", 200, 1)]
+    assert summary(client, headers, "2026-11-02", "2026-11-02") == [("2026-11-02", 500, 1)]
+
+def test_weekly_buckets_across_dst_transition(client, headers):
+    # Sunday 23:30 after the fall back belongs to the week starting Monday 2026-10-26
+    log_at(client, headers, datetime(2026, 11, 1, 23, 30), 400)
+    log_at(client, headers, datetime(2026, 11, 2, 0, 30), 500)
+
+    assert summary(client, headers, "2026-10-01", "2026-11-30", "week") == [
+        ("2026-10-26", 400, 1),
+        ("2026-11-02", 500, 1),
+    ]
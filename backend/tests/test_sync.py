@@ -0,0 +1,68 @@
+FOOD = {"food_name": "apple", "calories": 95.0, "protein": 0.5, "carbs": 25.0, "fat": 0.3, "grams": 180.0}
+
+def test_listing_etag_revalidates_until_a_write(client, headers):
+    first = client.get("/api/food-log", headers=headers)
+    etag = first.headers["ETag"]
+    assert client.get("/api/food-log", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    client.post("/api/food-log", json=FOOD, headers=headers)
+    response = client.get("/api/food-log", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert len(response.json()) == 1
+
+SUMMARY = {"start": "2026-10-01", "end": "2026-10-31"}
+
+def test_etags_revalidate_only_their_own_resource(client, headers):
+    client.post("/api/food-log", json=FOOD, headers=headers)
+    requests = [
+        ("/api/food-log", {}),
+        ("/api/food-log", {"limit": 1}),
+        ("/api/food-log/summary", SUMMARY),
+        ("/api/food-log/summary", {**SUMMARY, "period": "week"}),
+        ("/api/food-log/quick-add", {}),
+        ("/api/food-log/changes", {"since": 0}),
+    ]
+    etags = [client.get(path, params=params, headers=headers).headers["ETag"] for path, params in requests]
+    assert len(set(etags)) == len(requests)
+
+    for (path, params), etag in zip(requests, etags):
+        for other in etags:
+            response = client.get(path, params=params, headers={**headers, "If-None-Match": other})
+            assert response.status_code == (304 if other == etag else 200)
+
+    # The same parameters in another order are the same resource
+    response = client.get("/api/food-log/summary", params={"end": SUMMARY["end"], "start": SUMMARY["start"]},
+                          headers={**headers, "If-None-Match": etags[2]})
+    assert response.status_code == 304
+
+def test_changes_returns_upserts_and_tombstones(client, headers):
+    created = [client.post("/api/food-log", json={**FOOD, "food_name": name}, headers=headers)
+               for name in ("apple", "pear", "plum")]
+    ids = [response.json()["id"] for response in created]
+    since = int(created[-1].headers["X-Food-Log-Version"])
+
+    client.put(f"/api/food-log/{ids[0]}", json={**FOOD, "calories": 120.0}, headers=headers)
+    client.delete(f"/api/food-log/{ids[1]}", headers=headers)
+
+    response = client.get("/api/food-log/changes", params={"since": since}, headers=headers)
+    assert response.status_code == 200
+    changes = response.json()
+    assert changes["version"] == since + 2
+    assert [(row["id"], row["calories"]) for row in changes["upserts"]] == [(ids[0], 120.0)]
+    assert changes["deleted"] == [ids[1]]
+
+    # From the start: every surviving row, and the deletion
+    changes = client.get("/api/food-log/changes", params={"since": 0}, headers=headers).json()
+    assert sorted(row["id"] for row in changes["upserts"]) == [ids[0], ids[2]]
+    assert changes["deleted"] == [ids[1]]
+
+    # Up to date: nothing new, then a 304 on the same ETag
+    response = client.get("/api/food-log/changes", params={"since": changes["version"]}, headers=headers)
+    assert response.json() == {"version": changes["version"], "upserts": [], "deleted": []}
+    response = client.get("/api/food-log/changes", params={"since": changes["version"]},
+                          headers={**headers, "If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+
+    assert client.get("/api/food-log/changes", params={"since": changes["version"] + 1},
+                      headers=headers).status_code == 410
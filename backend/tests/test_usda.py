@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from app.utils import usda
+from app.utils.food_store import FoodStore
+
+FOODS = [
+    {"fdcId": 1, "description": "Apple, raw", "foodNutrients": [
+        {"nutrientName": "Energy", "value": 52.0},
+        {"nutrientName": "Protein", "value": 0.3},
+        {"nutrientName": "Carbohydrate, by difference", "value": 13.8},
+        {"nutrientName": "Total lipid (fat)", "value": 0.2},
+    ]},
+    {"fdcId": 2, "description": "Apple juice", "foodNutrients": [{"nutrientName": "Energy", "value": 46.0}]},
+]
+
+@pytest.fixture
+def upstream(monkeypatch, tmp_path):
+    """Stub the USDA API behind fresh caches; returns the queries it was sent."""
+    queries = []
+
+    async def get(params):
+        queries.append(params["query"])
+        return {"foods": FOODS}
+
+    monkeypatch.setattr(usda.usda_client, "get", get)
+    monkeypatch.setattr(usda, "_store", FoodStore(str(tmp_path / "usda_cache.db")))
+    monkeypatch.setattr(usda, "search_cache", usda.TTLCache())
+    monkeypatch.setattr(usda, "store_stats", {"hits": 0, "misses": 0})
+    yield queries
+    usda._store.close()
+
+def test_repeated_searches_call_upstream_once(client, upstream):
+    for query in ("Apple", "apple", "  APPLE "):
+        response = client.get("/api/search-foods", params={"query": query})
+        assert response.status_code == 200
+        assert [food["name"] for food in response.json()] == ["Apple, raw", "Apple juice"]
+
+    assert upstream == ["apple"]
+    assert usda.search_cache.stats() == {"size": 1, "hits": 2, "misses": 1}
+    assert usda.store_stats == {"hits": 0, "misses": 1}
+
+def test_search_falls_back_to_the_store_after_the_memory_cache(client, upstream):
+    client.get("/api/search-foods", params={"query": "apple"})
+    # As after a restart: the in-process cache is empty, the store is not
+    usda.search_cache.clear()
+    response = client.get("/api/search-foods", params={"query": "apple"})
+    assert response.json()[0] == {"name": "Apple, raw", "calories": 52.0, "protein": 0.3, "carbs": 13.8, "fat": 0.2}
+
+    assert upstream == ["apple"]
+    assert usda.store_stats == {"hits": 1, "misses": 1}
+
+def test_concurrent_searches_share_one_upstream_call(monkeypatch, upstream):
+    async def slow_get(params):
+        upstream.append(params["query"])
+        await asyncio.sleep(0.01)
+        return {"foods": FOODS}
+
+    monkeypatch.setattr(usda.usda_client, "get", slow_get)
+
+    async def main():
+        return await asyncio.gather(*(usda.search_foods_async(query) for query in ("apple", "Apple", " apple")))
+
+    results = asyncio.run(main())
+    assert [[food["name"] for food in foods] for foods in results] == [["Apple, raw", "Apple juice"]] * 3
+    assert upstream == ["apple"]
+    # Every copy is the caller's own
+    results[0][0]["name"] = "changed"
+    assert results[1][0]["name"] == "Apple, raw"
@@ -0,0 +1,95 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.utils.usda_client import AsyncUSDAClient
+
+def make_client(**kwargs) -> AsyncUSDAClient:
+    return AsyncUSDAClient("http://usda.test/foods/search", "key", **kwargs)
+
+def test_concurrent_callers_share_one_call():
+    client = make_client()
+    calls = []
+
+    async def load(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return [key]
+
+    async def main():
+        return await asyncio.gather(
+            *(client.coalesce("apple", lambda: load("apple")) for _ in range(5)),
+            client.coalesce("pear", lambda: load("pear")),
+        )
+
+    results = asyncio.run(main())
+    assert results == [["apple"]] * 5 + [["pear"]]
+    assert sorted(calls) == ["apple", "pear"]
+    assert client.stats() == {"upstream_calls": 0, "coalesced": 4, "in_flight": 0}
+
+def test_a_failure_is_shared_then_retried():
+    client = make_client()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        if calls == 1:
+            raise RuntimeError("upstream down")
+        return "ok"
+
+    async def main():
+        first = await asyncio.gather(*(client.coalesce("apple", load) for _ in range(3)), return_exceptions=True)
+        return first, await client.coalesce("apple", load)
+
+    first, retried = asyncio.run(main())
+    assert [str(error) for error in first] == ["upstream down"] * 3
+    assert (retried, calls) == ("ok", 2)
+
+def test_a_cancelled_caller_does_not_cancel_the_shared_call():
+    client = make_client()
+
+    async def load():
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    async def main():
+        leader = asyncio.ensure_future(client.coalesce("apple", load))
+        follower = asyncio.ensure_future(client.coalesce("apple", load))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == "ok"
+
+def test_get_caps_concurrent_upstream_calls():
+    client = make_client(max_concurrency=2)
+    active, peak = 0, 0
+
+    async def handler(request):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if request.url.params["query"] == "bad":
+            return httpx.Response(500)
+        return httpx.Response(200, json={"foods": [], "query": request.url.params["query"]})
+
+    async def main():
+        client._bind()
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            results = await asyncio.gather(*(client.get({"query": f"q{i}"}) for i in range(6)))
+            with pytest.raises(Exception, match="Error fetching data from USDA API"):
+                await client.get({"query": "bad"})
+            return results
+        finally:
+            await client.aclose()
+
+    results = asyncio.run(main())
+    assert [result["query"] for result in results] == [f"q{i}" for i in range(6)]
+    assert peak == 2
+    assert client.stats()["upstream_calls"] == 7
@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+
+EGG = {"food_name": "egg", "calories": 78.0, "protein": 6.0, "carbs": 0.6, "fat": 5.0, "grams": 50.0}
+
+def test_bulk_mixing_naive_and_missing_logged_at(client, headers):
+    response = client.post(
+        "/api/food-log/bulk", json=[{**EGG, "logged_at": "2026-10-10T08:00:00"}, {**EGG, "grams": 60.0}],
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 2
+
+    [egg] = client.get("/api/food-log/quick-add", headers=headers).json()
+    assert egg["use_count"] == 2
+    # The entry without logged_at was logged now, so it is the latest
+    assert egg["grams"] == 60.0
+    last_used_at = datetime.fromisoformat(egg["last_used_at"]).replace(tzinfo=timezone.utc)
+    assert last_used_at > datetime(2026, 10, 10, 8, tzinfo=timezone.utc)
+
+def test_quick_add_latest_entry_across_offsets(client, headers):
+    # 07:59+09:00 is 22:59 UTC, a minute before the first entry, despite its later wall time
+    client.post("/api/food-log", json={**EGG, "grams": 40.0, "logged_at": "2026-10-09T23:00:00Z"}, headers=headers)
+    client.post("/api/food-log", json={**EGG, "grams": 70.0, "logged_at": "2026-10-10T07:59:00+09:00"}, headers=headers)
+
+    [egg] = client.get("/api/food-log/quick-add", headers=headers).json()
+    assert egg["use_count"] == 2
+    assert egg["grams"] == 40.0
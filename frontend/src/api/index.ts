@@ -1,4 +1,4 @@
-import axios from 'axios';
+import axios, { AxiosResponse } from 'axios';
 import { UserCreate, Token, User, MacroResponse } from '../types';
 
 const API_URL = 'https://smartfit-backend.onrender.com';
@@ -71,8 +71,117 @@ export interface LoggedFood extends FoodItem {
   grams: number;
 }
 
-export const getLoggedFoods = async (): Promise<LoggedFood[]> => {
-  const response = await api.get<LoggedFood[]>('/api/food-log');
+export interface FoodLogQuery {
+  from?: string;
+  to?: string;
+  cursor?: string;
+  limit?: number;
+}
+
+// Per-user counter bumped by every food log change; see getFoodLogChanges
+const versionOf = (headers: AxiosResponse['headers']): number =>
+  Number(headers['x-food-log-version']);
+
+export interface FoodLogPage {
+  foods: LoggedFood[];
+  version: number;
+}
+
+export const getLoggedFoods = async (query: FoodLogQuery = {}): Promise<FoodLogPage> => {
+  const response = await api.get<LoggedFood[]>('/api/food-log', { params: query });
+  return { foods: response.data, version: versionOf(response.headers) };
+};
+
+export interface FoodLogChanges {
+  version: number;
+  upserts: LoggedFood[];
+  deleted: number[];
+}
+
+// Rows changed since `since`, or null when the server can't give a delta and
+// the listing should be refetched instead
+export const getFoodLogChanges = async (since: number): Promise<FoodLogChanges | null> => {
+  try {
+    const response = await api.get<FoodLogChanges>('/api/food-log/changes', { params: { since } });
+    return response.data;
+  } catch (error) {
+    if (axios.isAxiosError(error) && error.response?.status === 410) {
+      return null;
+    }
+    throw error;
+  }
+};
+
+export interface QuickAddFood extends FoodItem {
+  grams: number;
+  use_count: number;
+  last_used_at: string;
+}
+
+// The user's most logged foods, with the values and grams of their latest entry
+export const getQuickAddFoods = async (limit: number = 10): Promise<QuickAddFood[]> => {
+  const response = await api.get<QuickAddFood[]>('/api/food-log/quick-add', { params: { limit } });
+  return response.data;
+};
+
+export interface FoodLogMutation {
+  version: number;
+  food?: LoggedFood;
+}
+
+export interface MacroTotals {
+  period_start: string;
+  calories: number;
+  protein: number;
+  carbs: number;
+  fat: number;
+  grams: number;
+  entries: number;
+}
+
+export const getFoodLogSummary = async (
+  start: string,
+  end: string,
+  period: 'day' | 'week' = 'day'
+): Promise<MacroTotals[]> => {
+  const tz = Intl.DateTimeFormat().resolvedOptions().timeZone;
+  const response = await api.get<MacroTotals[]>('/api/food-log/summary', {
+    params: { start, end, period, tz },
+  });
+  return response.data;
+};
+
+export interface MacroValues {
+  calories: number | null;
+  protein: number | null;
+  carbs: number | null;
+  fat: number | null;
+}
+
+export interface TrendDay {
+  day: string;
+  totals: MacroValues;
+  entries: number;
+  avg_7: MacroValues;
+  avg_30: MacroValues;
+  percent_of_target: MacroValues | null;
+}
+
+export interface FoodLogTrends {
+  start: string;
+  end: string;
+  timezone: string;
+  target: MacroValues | null;
+  current_streak: number;
+  longest_streak: number;
+  logged_days: number;
+  on_target_days: number | null;
+  days: TrendDay[];
+}
+
+// Daily totals with rolling averages and streaks, in the profile's timezone
+export const getFoodLogTrends = async (days: number = 90): Promise<FoodLogTrends> => {
+  const response = await api.get<FoodLogTrends>('/api/food-log/trends', { params: { days } });
   return response.data;
 };
 
@@ -87,7 +196,7 @@ export const searchFoods = async (query: string): Promise<FoodItem[]> => {
   }));
 };
 
-export const logFood = async (food: FoodItem, grams: number = 100): Promise<void> => {
+export const logFood = async (food: FoodItem, grams: number = 100): Promise<FoodLogMutation> => {
   const cleaned = {
     food_name: food.food_name,
     calories: (parseFloat(String(food.calories)) * grams) / 100,
@@ -97,10 +206,11 @@ export const logFood = async (food: FoodItem, grams: number = 100): Promise<void
     grams: grams,
   };
 
-  await api.post('/api/food-log', cleaned);
+  const response = await api.post<LoggedFood>('/api/food-log', cleaned);
+  return { version: versionOf(response.headers), food: response.data };
 };
 
-export const updateFoodLog = async (id: string, food: FoodItem, grams: number): Promise<void> => {
+export const updateFoodLog = async (id: string, food: FoodItem, grams: number): Promise<FoodLogMutation> => {
   const cleaned = {
     food_name: food.food_name,
     calories: (parseFloat(String(food.calories)) * grams) / 100,
@@ -110,9 +220,11 @@ export const updateFoodLog = async (id: string, food: FoodItem, grams: number):
     grams: grams,
   };
 
-  await api.put(`/api/food-log/${id}`, cleaned);
+  const response = await api.put<LoggedFood>(`/api/food-log/${id}`, cleaned);
+  return { version: versionOf(response.headers), food: response.data };
 };
 
-export const deleteFoodLog = async (id: string): Promise<void> => {
-  await api.delete(`/api/food-log/${id}`);
+export const deleteFoodLog = async (id: string): Promise<FoodLogMutation> => {
+  const response = await api.delete(`/api/food-log/${id}`);
+  return { version: versionOf(response.headers) };
 }; 
\ No newline at end of file
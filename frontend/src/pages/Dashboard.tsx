@@ -2,8 +2,8 @@ import { useState, useEffect } from 'react';
 import { useAuth } from '../context/AuthContext';
 import { Card, CardContent, CardHeader } from '@/components/ui/card';
 import { MacroProgressChart } from '@/components/MacroProgressChart';
-import { getLoggedFoods } from '../api';
-import { isToday } from 'date-fns';
+import { getFoodLogSummary } from '../api';
+import { format } from 'date-fns';
 
 const MacroCard = ({ title, value, unit }: { title: string; value: number; unit: string }) => (
   <Card className="bg-gray-800 border-none">
@@ -30,18 +30,16 @@ export const Dashboard = () => {
   useEffect(() => {
     const fetchTodayMacros = async () => {
       try {
-        const loggedFoods = await getLoggedFoods();
-        const todaysEntries = loggedFoods.filter(food => isToday(new Date(food.logged_at)));
-        const totals = todaysEntries.reduce(
-          (acc, food) => ({
-            calories: acc.calories + food.calories,
-            protein: acc.protein + food.protein,
-            carbs: acc.carbs + food.carbs,
-            fat: acc.fat + food.fat,
-          }),
-          { calories: 0, protein: 0, carbs: 0, fat: 0 }
-        );
-        setActualMacros(totals);
+        const today = format(new Date(), 'yyyy-MM-dd');
+        const [totals] = await getFoodLogSummary(today, today);
+        if (totals) {
+          setActualMacros({
+            calories: totals.calories,
+            protein: totals.protein,
+            carbs: totals.carbs,
+            fat: totals.fat,
+          });
+        }
       } catch (error) {
         console.error('Error fetching today\'s macros:', error);
       }
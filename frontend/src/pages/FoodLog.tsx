@@ -1,10 +1,22 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 //import { useAuth } from '../context/AuthContext';
 import { Card, CardContent, CardHeader } from '@/components/ui/card';
 import { Input } from '@/components/ui/input';
 import { Button } from '@/components/ui/button';
 import { Loader2, Plus, Pencil } from 'lucide-react';
-import { FoodItem, LoggedFood, getLoggedFoods, searchFoods, logFood, updateFoodLog, deleteFoodLog } from '../api';
+import {
+  FoodItem,
+  FoodLogMutation,
+  LoggedFood,
+  QuickAddFood,
+  getFoodLogChanges,
+  getLoggedFoods,
+  getQuickAddFoods,
+  searchFoods,
+  logFood,
+  updateFoodLog,
+  deleteFoodLog,
+} from '../api';
 import {
   Dialog,
   DialogContent,
@@ -17,7 +29,7 @@ import {
   DropdownMenuItem,
   DropdownMenuTrigger,
 } from "../components/ui/dropdown-menu";
-import { format, isToday as dateFnsIsToday } from 'date-fns';
+import { format, startOfToday, isToday as dateFnsIsToday } from 'date-fns';
 
 // Helper function to check if a timestamp is from today
 const isToday = (timestamp: string): boolean => {
@@ -29,7 +41,10 @@ export const FoodLog = () => {
   //const { user } = useAuth();
   const [searchQuery, setSearchQuery] = useState('');
   const [searchResults, setSearchResults] = useState<FoodItem[]>([]);
+  const [quickAddFoods, setQuickAddFoods] = useState<QuickAddFood[]>([]);
   const [loggedFoods, setLoggedFoods] = useState<LoggedFood[]>([]);
+  // Server food log version that loggedFoods reflects; null until first fetch
+  const versionRef = useRef<number | null>(null);
   const [isSearching, setIsSearching] = useState(false);
   const [isLoading, setIsLoading] = useState(false);
   const [selectedFood, setSelectedFood] = useState<FoodItem | null>(null);
@@ -54,6 +69,10 @@ export const FoodLog = () => {
 
   useEffect(() => {
     fetchLoggedFoods();
+    fetchQuickAddFoods();
+    // Pick up changes made elsewhere (another tab or device) when returning
+    window.addEventListener('focus', syncLoggedFoods);
+    return () => window.removeEventListener('focus', syncLoggedFoods);
   }, []);
 
   useEffect(() => {
@@ -72,13 +91,62 @@ export const FoodLog = () => {
 
   const fetchLoggedFoods = async () => {
     try {
-      const data = await getLoggedFoods();
-      setLoggedFoods(data);
+      const { foods, version } = await getLoggedFoods({ from: startOfToday().toISOString() });
+      setLoggedFoods(foods);
+      versionRef.current = version;
     } catch (error) {
       console.error('Error fetching logged foods:', error);
     }
   };
 
+  const fetchQuickAddFoods = async () => {
+    try {
+      setQuickAddFoods(await getQuickAddFoods(8));
+    } catch (error) {
+      console.error('Error fetching quick-add foods:', error);
+    }
+  };
+
+  // Merge changed rows into today's list and drop deleted or moved ones
+  const applyChanges = (upserts: LoggedFood[], deleted: string[]) => {
+    const replaced = new Set([...deleted, ...upserts.map((food) => String(food.id))]);
+    setLoggedFoods((prev) =>
+      [
+        ...upserts.filter((food) => isToday(food.logged_at)),
+        ...prev.filter((food) => !replaced.has(String(food.id))),
+      ].sort((a, b) => new Date(b.logged_at).getTime() - new Date(a.logged_at).getTime())
+    );
+  };
+
+  // Fetch only what changed since the last sync instead of the whole list
+  const syncLoggedFoods = async () => {
+    if (versionRef.current === null) {
+      return fetchLoggedFoods();
+    }
+    try {
+      const changes = await getFoodLogChanges(versionRef.current);
+      if (!changes) {
+        return fetchLoggedFoods();
+      }
+      applyChanges(changes.upserts, changes.deleted.map(String));
+      versionRef.current = changes.version;
+    } catch (error) {
+      console.error('Error syncing logged foods:', error);
+    }
+  };
+
+  // When the mutation is the only change since our copy, apply it locally;
+  // otherwise something else changed too, so sync
+  const applyMutation = async ({ version, food }: FoodLogMutation, deletedId?: string) => {
+    if (versionRef.current !== null && version === versionRef.current + 1) {
+      applyChanges(food ? [food] : [], deletedId ? [deletedId] : []);
+      versionRef.current = version;
+    } else {
+      await syncLoggedFoods();
+    }
+    fetchQuickAddFoods();
+  };
+
   const handleSearch = async () => {
     if (!searchQuery.trim()) return;
     
@@ -99,13 +167,26 @@ export const FoodLog = () => {
     setIsDialogOpen(true);
   };
 
+  // Open the log dialog with the food's last-used amount, scaled back to per 100 g
+  const handleQuickAdd = (food: QuickAddFood) => {
+    const scale = food.grams ? 100 / food.grams : 1;
+    setSelectedFood({
+      food_name: food.food_name,
+      calories: food.calories * scale,
+      protein: food.protein * scale,
+      carbs: food.carbs * scale,
+      fat: food.fat * scale,
+    });
+    setGrams(food.grams || 100);
+    setIsDialogOpen(true);
+  };
+
   const handleSubmitLog = async () => {
     if (!selectedFood) return;
     
     setIsLoading(true);
     try {
-      await logFood(selectedFood, grams);
-      await fetchLoggedFoods();
+      await applyMutation(await logFood(selectedFood, grams));
       setIsDialogOpen(false);
     } catch (error) {
       console.error('Error logging food:', error);
@@ -124,8 +205,7 @@ export const FoodLog = () => {
         carbs: (food.carbs * 100) / food.grams,
         fat: (food.fat * 100) / food.grams,
       };
-      await updateFoodLog(food.id, baseFood, newGrams);
-      await fetchLoggedFoods();
+      await applyMutation(await updateFoodLog(food.id, baseFood, newGrams));
     } catch (error) {
       console.error('Error updating food:', error);
     } finally {
@@ -136,8 +216,7 @@ export const FoodLog = () => {
   const handleDeleteFood = async (id: string) => {
     setIsLoading(true);
     try {
-      await deleteFoodLog(id);
-      await fetchLoggedFoods();
+      await applyMutation(await deleteFoodLog(id), id);
     } catch (error) {
       console.error('Error deleting food:', error);
     } finally {
@@ -157,8 +236,7 @@ export const FoodLog = () => {
         fat: parseFloat(customFood.fat),
       };
       
-      await logFood(foodItem, parseFloat(customFood.grams));
-      await fetchLoggedFoods();
+      await applyMutation(await logFood(foodItem, parseFloat(customFood.grams)));
       
       // Reset form
       setCustomFood({
@@ -187,6 +265,29 @@ export const FoodLog = () => {
   return (
     <div className="space-y-8">
 
+      {/* Quick Add Section */}
+      {quickAddFoods.length > 0 && (
+        <Card className="bg-gray-800 border-none">
+          <CardHeader>
+            <h2 className="text-xl font-semibold text-white">Quick Add</h2>
+          </CardHeader>
+          <CardContent>
+            <div className="flex flex-wrap gap-2">
+              {quickAddFoods.map((food) => (
+                <Button
+                  key={food.food_name}
+                  onClick={() => handleQuickAdd(food)}
+                  disabled={isLoading}
+                  variant="secondary"
+                >
+                  {food.food_name} • {food.grams}g
+                </Button>
+              ))}
+            </div>
+          </CardContent>
+        </Card>
+      )}
+
       {/* Search Section */}
       <Card className="bg-gray-800 border-none">
         <CardHeader>
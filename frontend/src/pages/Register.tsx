@@ -45,6 +45,7 @@ export const Register = () => {
       height: parseFloat(formData.get('height') as string),
       activity_level: formData.get('activity_level') as ActivityLevel,
       fitness_goal: formData.get('fitness_goal') as FitnessGoal,
+      timezone: Intl.DateTimeFormat().resolvedOptions().timeZone,
     };
 
     try {
@@ -11,6 +11,7 @@ export interface User {
   height: number;
   activity_level: ActivityLevel;
   fitness_goal: FitnessGoal;
+  timezone?: string;  // IANA name; defines the days of trends
 }
 
 export interface UserCreate extends Omit<User, 'id'> {
@@ -1,32 +1,165 @@
-import pandas as pd
+"""
+Build nhanes_cleaned.csv from the raw NHANES .XPT files.
+
+    python scripts/clean_nhanes.py [--raw-dir DIR] [--cycles J I ...] [--force]
+
+Each raw file is converted once into a columnar cache (one memory-mapped
+.npy per needed column, plus a meta.json with the file's checksum), keeping
+only the columns the model uses. Later runs reuse the cache and only
+re-read files whose checksum changed.
+
+Files are grouped by survey cycle from their names: DEMO_J.XPT, BMX_J.XPT
+and DR1TOT_J.XPT form cycle J (2017-2018), DEMO_I.XPT etc. cycle I, and the
+2017-March 2020 pre-pandemic files (P_DEMO.XPT, ...) cycle P. Each cycle is
+joined on SEQN on its own and the cycles are then concatenated once, so
+adding a cycle adds one more join rather than re-merging everything.
+"""
+import argparse
+import hashlib
+import json
 import os
+import re
+
+import numpy as np
+import pandas as pd
 
 # Set paths
 base_dir = os.path.dirname(os.path.abspath(__file__))
 raw_dir = os.path.join(base_dir, '../backend/app/data/nhanes_raw')
+cache_dir = os.path.join(base_dir, '../backend/app/data/cache/nhanes')
 save_path = os.path.join(base_dir, '../backend/app/data/nhanes_cleaned.csv')
 
-# Load raw NHANES files
-demo = pd.read_sas(os.path.join(raw_dir, 'DEMO_J.XPT'))
-bmx = pd.read_sas(os.path.join(raw_dir, 'BMX_J.XPT'))
-diet = pd.read_sas(os.path.join(raw_dir, 'DR1TOT_J.XPT'))
+# Columns kept from each NHANES component, joined on SEQN (participant ID)
+COMPONENTS = {
+    'DEMO': ['SEQN', 'RIDAGEYR', 'RIAGENDR'],
+    'BMX': ['SEQN', 'BMXWT', 'BMXHT'],
+    'DR1TOT': ['SEQN', 'DR1TKCAL', 'DR1TPROT', 'DR1TCARB', 'DR1TTFAT'],
+}
+OUTPUT_COLUMNS = ['RIDAGEYR', 'RIAGENDR', 'BMXWT', 'BMXHT',
+                  'DR1TKCAL', 'DR1TPROT', 'DR1TCARB', 'DR1TTFAT']
+
+# e.g. DEMO_J.XPT -> (DEMO, J); P_BMX.XPT -> (BMX, P); DEMO.XPT -> (DEMO, 'A')
+FILE_PATTERN = re.compile(r'^(P_)?(DEMO|BMX|DR1TOT)(?:_([A-Z]))?\.XPT$', re.IGNORECASE)
+
+CHUNK_ROWS = 5000
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def find_raw_files(directory):
+    """Map each cycle to its {component: path}."""
+    cycles = {}
+    for name in sorted(os.listdir(directory)):
+        match = FILE_PATTERN.match(name)
+        if match is None:
+            continue
+        prepandemic, component, suffix = match.groups()
+        cycle = 'P' if prepandemic else (suffix or 'A').upper()
+        cycles.setdefault(cycle, {})[component.upper()] = os.path.join(directory, name)
+    return cycles
+
+def read_columns(path, columns):
+    """
+    Read `columns` of an XPT file, a chunk at a time. The XPORT reader can't
+    select columns, so each chunk is parsed in full and then sliced; only the
+    slices are kept, so memory holds one full chunk at most.
+    """
+    parts = []
+    with pd.read_sas(path, format='xport', chunksize=CHUNK_ROWS) as reader:
+        for chunk in reader:
+            missing = set(columns) - set(chunk.columns)
+            if missing:
+                raise ValueError(f"{os.path.basename(path)} is missing columns: {sorted(missing)}")
+            parts.append(chunk[columns])
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns)
+
+def convert(path, columns, force=False):
+    """
+    Columnar cache for one raw file, rebuilt only when the file (or the
+    requested columns) changed. Returns the cache directory.
+    """
+    target = os.path.join(cache_dir, os.path.splitext(os.path.basename(path))[0].upper())
+    meta_path = os.path.join(target, 'meta.json')
+    checksum = file_checksum(path)
+    if not force and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get('checksum') == checksum and meta.get('columns') == columns:
+            print(f"  • {os.path.basename(path)}: unchanged, using cache")
+            return target
+
+    df = read_columns(path, columns)
+    os.makedirs(target, exist_ok=True)
+    for column in columns:
+        values = df[column].to_numpy(dtype=np.float64)
+        if column == 'SEQN':
+            values = values.astype(np.int64)
+        np.save(os.path.join(target, f'{column}.npy'), values)
+    # Written last, so a partial conversion is never mistaken for a valid cache
+    with open(meta_path, 'w') as f:
+        json.dump({'source': os.path.basename(path), 'checksum': checksum,
+                   'columns': columns, 'rows': len(df)}, f, indent=2)
+    print(f"  • {os.path.basename(path)}: converted {len(df)} rows")
+    return target
+
+def load_cached(target, columns):
+    return pd.DataFrame({
+        column: np.load(os.path.join(target, f'{column}.npy'), mmap_mode='r')
+        for column in columns
+    })
+
+def build_cycle(files, force=False):
+    """Join one cycle's components on SEQN."""
+    frames = [
+        load_cached(convert(files[component], columns, force), columns).set_index('SEQN')
+        for component, columns in COMPONENTS.items()
+    ]
+    return frames[0].join(frames[1:], how='inner')
+
+def clean(df):
+    # Drop rows with missing values
+    df_clean = df[OUTPUT_COLUMNS].dropna()
+
+    # Filter extreme calorie values
+    return df_clean[
+        (df_clean['DR1TKCAL'] >= 1000) &
+        (df_clean['DR1TKCAL'] <= 4500)
+    ]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the cleaned NHANES training set")
+    parser.add_argument('--raw-dir', default=raw_dir, help="Directory with the raw .XPT files")
+    parser.add_argument('--cycles', nargs='+', help="Only use these cycles (e.g. J I P)")
+    parser.add_argument('--output', default=save_path)
+    parser.add_argument('--force', action='store_true', help="Reconvert every file")
+    args = parser.parse_args(argv)
+
+    cycles = find_raw_files(args.raw_dir)
+    if args.cycles:
+        cycles = {cycle: cycles[cycle] for cycle in map(str.upper, args.cycles) if cycle in cycles}
 
-# Merge by SEQN (participant ID)
-df = demo.merge(bmx, on='SEQN').merge(diet, on='SEQN')
+    merged = []
+    for cycle, files in sorted(cycles.items()):
+        missing = set(COMPONENTS) - set(files)
+        if missing:
+            print(f"⚠️  Skipping cycle {cycle}: missing {', '.join(sorted(missing))}")
+            continue
+        print(f"📦 Cycle {cycle}")
+        merged.append(build_cycle(files, args.force))
 
-# Select relevant features
-df_clean = df[['RIDAGEYR', 'RIAGENDR', 'BMXWT', 'BMXHT',
-               'DR1TKCAL', 'DR1TPROT', 'DR1TCARB', 'DR1TTFAT']]
+    if not merged:
+        raise SystemExit(f"No complete NHANES cycle found in {args.raw_dir}")
 
-# Drop rows with missing values
-df_clean = df_clean.dropna()
+    # Concatenate all cycles in one pass
+    df_clean = clean(pd.concat(merged))
 
-# Filter extreme calorie values
-df_clean = df_clean[
-    (df_clean['DR1TKCAL'] >= 1000) &
-    (df_clean['DR1TKCAL'] <= 4500)
-]
+    # Save cleaned dataset
+    df_clean.to_csv(args.output, index=False)
+    print(f"✅ Cleaned and filtered data saved to: {args.output} ({len(df_clean)} rows, {len(merged)} cycle(s))")
 
-# Save cleaned dataset
-df_clean.to_csv(save_path, index=False)
-print(f"✅ Cleaned and filtered data saved to: {save_path}")
+if __name__ == '__main__':
+    main()
@@ -1,53 +1,85 @@
 import os
-import pandas as pd
+import json
 import numpy as np
 import matplotlib.pyplot as plt
-import joblib
-from sklearn.model_selection import train_test_split
 from datetime import datetime
 
 # Paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_PATH = os.path.join(BASE_DIR, '../backend/app/data/nhanes_cleaned.csv')
-MODEL_PATH = os.path.join(BASE_DIR, '../backend/app/model/macro_predictor.pkl')
+EVALUATION_PATH = os.path.join(BASE_DIR, '../backend/app/model/evaluation')
 
 # Get current date for versioned output
 
 timestamp_str = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')  # Example: 2025-06-03_14-22-35
 OUTPUT_DIR = os.path.join(BASE_DIR, 'outputs')
-OUTPUT_FILENAME = f'predicted_vs_actual_calories_{timestamp_str}.png'
-OUTPUT_PATH = os.path.join(OUTPUT_DIR, OUTPUT_FILENAME)
 
-# Load data
-df = pd.read_csv(DATA_PATH)
+LABELS = {
+    'DR1TKCAL': 'Calories',
+    'DR1TPROT': 'Protein (g)',
+    'DR1TCARB': 'Carbs (g)',
+    'DR1TTFAT': 'Fat (g)',
+}
 
-# Features and target
-X = df[['RIDAGEYR', 'RIAGENDR', 'BMXWT', 'BMXHT']]
-y = df[['DR1TKCAL']]
+# Load the evaluation artifact written by `python -m app.services.train_model`:
+# test-set actuals and predictions in original units, plus metrics
+arrays = np.load(f'{EVALUATION_PATH}.npz')
+with open(f'{EVALUATION_PATH}.json') as f:
+    report = json.load(f)
 
-# Train/test split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.1, random_state=42)
+targets = report['targets']
+y_true = arrays['y_true']
+y_pred = arrays['y_pred']
 
-# Load trained model
-model = joblib.load(MODEL_PATH)
+def save(figure, name):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    path = os.path.join(OUTPUT_DIR, f'{name}_{timestamp_str}.png')
+    figure.tight_layout()
+    figure.savefig(path)
+    plt.close(figure)
+    print(f"✅ Plot saved to {path}")
 
-# Predict
-y_pred = model.predict(X_test)
-y_true = y_test.values.flatten()
-y_pred_cal = np.exp(y_pred[:, 0]) if y_pred.ndim > 1 else np.exp(y_pred)
-
-# Create scatterplot
-plt.figure(figsize=(8, 6))
-plt.scatter(y_true, y_pred_cal, alpha=0.5, color='teal')
-plt.plot([y_true.min(), y_true.max()], [y_true.min(), y_true.max()], 'r--', label='Perfect prediction')
+# Predicted vs actual calories
+figure = plt.figure(figsize=(8, 6))
+plt.scatter(y_true[:, 0], y_pred[:, 0], alpha=0.5, color='teal')
+plt.plot([y_true[:, 0].min(), y_true[:, 0].max()], [y_true[:, 0].min(), y_true[:, 0].max()], 'r--', label='Perfect prediction')
 plt.xlabel("Actual Calories")
 plt.ylabel("Predicted Calories")
 plt.title("Predicted vs Actual Calories")
 plt.grid(True)
 plt.legend()
-plt.tight_layout()
+save(figure, 'predicted_vs_actual_calories')
+
+# Residuals per macro
+figure, axes = plt.subplots(2, 2, figsize=(10, 8))
+for i, (target, ax) in enumerate(zip(targets, axes.flat)):
+    ax.scatter(y_pred[:, i], y_pred[:, i] - y_true[:, i], alpha=0.4, s=10, color='teal')
+    ax.axhline(0, color='r', linestyle='--')
+    ax.set_xlabel(f"Predicted {LABELS[target]}")
+    ax.set_ylabel("Residual (predicted - actual)")
+    ax.set_title(LABELS[target])
+    ax.grid(True)
+save(figure, 'residuals')
+
+# Calibration: mean actual vs mean predicted per prediction decile
+figure, axes = plt.subplots(2, 2, figsize=(10, 8))
+for target, ax in zip(targets, axes.flat):
+    bins = report['calibration'][target]
+    ax.plot(bins['predicted'], bins['actual'], 'o-', color='teal', label='Model')
+    low, high = min(bins['predicted'] + bins['actual']), max(bins['predicted'] + bins['actual'])
+    ax.plot([low, high], [low, high], 'r--', label='Perfect calibration')
+    ax.set_xlabel(f"Mean predicted {LABELS[target]}")
+    ax.set_ylabel(f"Mean actual {LABELS[target]}")
+    ax.set_title(LABELS[target])
+    ax.grid(True)
+    ax.legend()
+save(figure, 'calibration')
 
-# Save the plot
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-plt.savefig(OUTPUT_PATH)
-print(f"✅ Plot saved to {OUTPUT_PATH}")
+# Text report
+metrics = report['metrics']
+print(f"\n📊 Test set ({metrics['n']} rows): MSE {metrics['mse']:.2f}, R² {metrics['r2']:.2f}")
+for target in targets:
+    values = metrics['targets'][target]
+    print(f"  • {LABELS[target]}: R² {values['r2']:.2f}, MAE {values['mae']:.1f}, bias {values['bias']:+.1f}")
+    bins = report['calibration'][target]
+    worst = max(range(len(bins['count'])), key=lambda b: abs(bins['predicted'][b] - bins['actual'][b]))
+    print(f"    largest calibration gap: predicted {bins['predicted'][worst]:.1f} vs actual {bins['actual'][worst]:.1f}")